@@ -9,5 +9,6 @@ export const tinyTroupeConfig = {
   model: process.env.OPENAI_MODEL || 'gpt-4o-mini',
   cacheEnabled: process.env.CACHE_ENABLED === 'true',
   cacheDir: process.env.CACHE_DIR || './cache/tinytroupe',
-  loggingLevel: process.env.LOGGING_LEVEL || 'info'
+  loggingLevel: process.env.LOGGING_LEVEL || 'info',
+  outputProtocol: (process.env.TINYTROUPE_OUTPUT_PROTOCOL || 'lines') as 'lines' | 'frames'
 };
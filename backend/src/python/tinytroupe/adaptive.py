@@ -0,0 +1,166 @@
+import math
+import random
+import threading
+from collections import Counter
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_MARGIN = 0.15
+DEFAULT_MIN_SAMPLES = 5
+DEFAULT_STABILITY = 0.8
+TOP_KEY_POINTS = 5
+
+class ScenarioStats:
+    """Running sentiment and key-point distribution of one scenario's responses."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.key_points: Counter = Counter()
+        self._previous_top: Optional[Set[str]] = None
+        self._compared_count = 0
+        self.stability = 0.0
+
+    def add(self, result: Dict[str, Any]):
+        metadata = result.get("metadata") or {}
+        sentiment = float(metadata.get("sentiment") or 0.0)
+        # Média e variância incrementais (Welford)
+        self.count += 1
+        delta = sentiment - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (sentiment - self.mean)
+        self.key_points.update(point.strip().lower() for point in metadata.get("keyPoints") or [] if point.strip())
+
+    def end_round(self):
+        """Compare the most frequent key points with those of the previous round."""
+        if self.count == self._compared_count:
+            return
+        self._compared_count = self.count
+        top = {point for point, _ in self.key_points.most_common(TOP_KEY_POINTS)}
+        if self._previous_top is not None:
+            union = top | self._previous_top
+            self.stability = len(top & self._previous_top) / len(union) if union else 1.0
+        self._previous_top = top
+
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else float("inf")
+
+    def half_width(self, z: float) -> float:
+        """Half-width of the confidence interval of the mean sentiment."""
+        return z * self.stdev / math.sqrt(self.count) if self.count > 1 else float("inf")
+
+    def summary(self, z: float) -> Dict[str, Any]:
+        half_width = self.half_width(z)
+        return {
+            "samples": self.count,
+            "sentimentMean": round(self.mean, 4),
+            "ciHalfWidth": round(half_width, 4) if math.isfinite(half_width) else None,
+            "keyPointStability": round(self.stability, 4)
+        }
+
+class AdaptiveSampler:
+    """Decides which persona x scenario pairs to run, round by round.
+
+    Each round hands out ``round_size`` pairs, favouring scenarios whose
+    sentiment confidence interval is widest. A scenario stops being sampled
+    once it has ``min_samples`` responses, its interval half-width is within
+    ``margin`` and its top key points stayed stable between rounds. Pairs
+    never run are reported by ``skipped`` as ``converged`` or, when
+    ``budget`` runs out first, ``budget_exhausted``.
+    """
+
+    def __init__(self, scenario_count: int, person_count: int, round_size: int,
+                 confidence: float = DEFAULT_CONFIDENCE, margin: float = DEFAULT_MARGIN,
+                 min_samples: int = DEFAULT_MIN_SAMPLES, stability: float = DEFAULT_STABILITY,
+                 budget: Optional[int] = None, seed: Optional[int] = 0):
+        self.round_size = max(1, round_size)
+        self.z = NormalDist().inv_cdf((1 + confidence) / 2)
+        self.margin = margin
+        self.min_samples = max(2, min_samples)
+        self.stability = stability
+        self.budget = scenario_count * person_count if budget is None else budget
+        self.stats = [ScenarioStats() for _ in range(scenario_count)]
+        self.converged: Dict[int, Dict[str, Any]] = {}
+        self.used = 0
+        self._lock = threading.Lock()
+        # Ordem aleatória (reprodutível) das personas por cenário, para não enviesar a amostra
+        rng = random.Random(seed)
+        self._queues: List[List[int]] = []
+        for _ in range(scenario_count):
+            order = list(range(person_count))
+            rng.shuffle(order)
+            self._queues.append(order)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], scenario_count: int, person_count: int,
+                    round_size: int) -> "AdaptiveSampler":
+        budget = config.get("adaptive_budget")
+        return cls(
+            scenario_count, person_count,
+            round_size=int(config.get("adaptive_round_size", round_size)),
+            confidence=float(config.get("adaptive_confidence", DEFAULT_CONFIDENCE)),
+            margin=float(config.get("adaptive_margin", DEFAULT_MARGIN)),
+            min_samples=int(config.get("adaptive_min_samples", DEFAULT_MIN_SAMPLES)),
+            stability=float(config.get("adaptive_key_point_stability", DEFAULT_STABILITY)),
+            budget=int(budget) if budget is not None else None,
+            seed=config.get("adaptive_seed", 0)
+        )
+
+    def mark_done(self, scenario_index: int, person_index: int, result: Dict[str, Any]):
+        """Count a pair finished elsewhere (e.g. restored from a checkpoint)."""
+        self._queues[scenario_index].remove(person_index)
+        self.observe(scenario_index, result)
+
+    def observe(self, scenario_index: int, result: Optional[Dict[str, Any]]):
+        if result is not None:
+            with self._lock:
+                self.stats[scenario_index].add(result)
+
+    def next_round(self) -> List[Tuple[int, int]]:
+        """Close the previous round and pick the pairs of the next one (empty when finished)."""
+        for scenario_index, stats in enumerate(self.stats):
+            if scenario_index in self.converged or not self._queues[scenario_index]:
+                continue
+            stats.end_round()
+            if self._has_converged(stats):
+                self.converged[scenario_index] = stats.summary(self.z)
+
+        active = [s for s in range(len(self.stats)) if s not in self.converged and self._queues[s]]
+        slots = min(self.round_size, self.budget - self.used)
+        pairs: List[Tuple[int, int]] = []
+        while slots > 0 and active:
+            # Cenários com intervalo mais largo (ou poucas amostras) recebem as vagas primeiro
+            active.sort(key=lambda s: (self.stats[s].count >= self.min_samples, -self.stats[s].half_width(self.z),
+                                       self.stats[s].count))
+            for scenario_index in list(active):
+                if slots == 0:
+                    break
+                pairs.append((scenario_index, self._queues[scenario_index].pop(0)))
+                slots -= 1
+                if not self._queues[scenario_index]:
+                    active.remove(scenario_index)
+        self.used += len(pairs)
+        return pairs
+
+    def _has_converged(self, stats: ScenarioStats) -> bool:
+        return (stats.count >= self.min_samples
+                and stats.half_width(self.z) <= self.margin
+                and stats.stability >= self.stability)
+
+    def skipped(self) -> List[Dict[str, Any]]:
+        """Pairs that were never run, grouped by scenario, with the reason."""
+        report = []
+        for scenario_index, queue in enumerate(self._queues):
+            if not queue:
+                continue
+            reason = "converged" if scenario_index in self.converged else "budget_exhausted"
+            report.append({
+                "scenarioIndex": scenario_index,
+                "reason": reason,
+                "personaIndexes": sorted(queue),
+                "stats": self.converged.get(scenario_index) or self.stats[scenario_index].summary(self.z)
+            })
+        return report
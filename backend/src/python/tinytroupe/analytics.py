@@ -0,0 +1,316 @@
+import functools
+from itertools import compress, count
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+DEFAULT_LANGUAGE = "en"
+# Palavras de distância em que uma negação ainda inverte o sentimento ("not very good")
+NEGATION_WINDOW = 3
+
+LEXICONS: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    "en": {
+        "positive": ("great", "excellent", "good", "like", "love", "useful", "helpful", "amazing",
+                     "fantastic", "positive", "easy", "intuitive", "clear", "nice", "enjoy", "best"),
+        "negative": ("bad", "poor", "dislike", "hate", "useless", "unhelpful", "terrible", "negative",
+                     "awful", "confusing", "difficult", "hard", "frustrating", "slow", "annoying", "worst"),
+        "negators": ("not", "no", "never", "nor", "hardly", "cannot", "can't", "don't", "doesn't",
+                     "didn't", "isn't", "wasn't", "aren't", "won't", "wouldn't", "shouldn't"),
+    },
+    "pt": {
+        "positive": ("ótimo", "ótima", "excelente", "bom", "boa", "gosto", "gostei", "adoro", "adorei",
+                     "útil", "úteis", "incrível", "fantástico", "fantástica", "positivo", "positiva",
+                     "fácil", "intuitivo", "intuitiva", "claro", "clara", "melhor"),
+        "negative": ("ruim", "péssimo", "péssima", "odeio", "detesto", "inútil", "terrível", "negativo",
+                     "negativa", "horrível", "confuso", "confusa", "difícil", "lento", "lenta",
+                     "frustrante", "chato", "chata", "pior"),
+        "negators": ("não", "nao", "nunca", "nem", "jamais", "nenhum", "nenhuma"),
+    },
+    "es": {
+        "positive": ("genial", "excelente", "bueno", "buena", "gusta", "encanta", "útil", "útiles",
+                     "increíble", "fantástico", "fantástica", "positivo", "positiva", "fácil",
+                     "intuitivo", "intuitiva", "claro", "clara", "mejor"),
+        "negative": ("malo", "mala", "pésimo", "pésima", "odio", "inútil", "terrible", "negativo",
+                     "negativa", "horrible", "confuso", "confusa", "difícil", "lento", "lenta",
+                     "frustrante", "molesto", "molesta", "peor"),
+        "negators": ("no", "nunca", "ni", "jamás", "jamas", "tampoco", "ningún", "ninguna"),
+    },
+}
+
+# Caracteres que encerram uma oração e, portanto, o alcance de uma negação
+CLAUSE_BREAKS = frozenset(".,;:!?\n…")
+# Pontuação fora do ASCII, trocada antes da tokenização (só em texto que não é ASCII)
+_UNICODE_PUNCTUATION = (("\u2019", "'"), ("\u2018", "'"), ("…", "."), ("\u201c", " "), ("\u201d", " "),
+                        ("«", " "), ("»", " "), ("\u2014", " "), ("\u2013", " "), ("¡", " "), ("¿", " "))
+# Marcador de fim de oração no texto tokenizado
+_CLAUSE = b"\x01"
+POSITIVE, NEGATIVE, NEGATOR = 1, 2, 3
+# Respostas pontuadas juntas por score_batch: amortiza as chamadas NumPy sem que os buffers saiam do cache
+_BATCH_GROUP = 256
+# Bytes após uma negação examinados de uma vez; distâncias maiores são verificadas uma a uma
+_NEGATION_SPAN = 32
+# Multiplicadores dos dois hashes dos três primeiros bytes de cada palavra
+_PREFIX_HASHES = ((37, 11), (101, 59))
+_MIX = 0x9E3779B97F4A7C15
+
+def _token_table() -> bytes:
+    """Byte map for ``bytes.translate``: word bytes kept, clause breaks to ``_CLAUSE``, the rest to spaces.
+
+    Bytes of multi-byte UTF-8 characters are kept, so accented words stay whole.
+    """
+    table = bytearray(range(256))
+    for byte in range(128):
+        char = chr(byte)
+        if not (char.isalnum() or char in "_'"):
+            table[byte] = _CLAUSE[0] if char in CLAUSE_BREAKS else ord(" ")
+    return bytes(table)
+
+_TOKEN_TABLE = _token_table()
+
+def _batch_table() -> bytes:
+    """Byte map for the batch path: ASCII word bytes lowercased, clause breaks to 1, the rest to 0.
+
+    Bytes of multi-byte UTF-8 characters are kept, as in ``_TOKEN_TABLE``.
+    """
+    table = bytearray(range(256))
+    for byte in range(128):
+        char = chr(byte)
+        if char.isalnum() or char in "_'":
+            table[byte] = ord(char.lower())
+        else:
+            table[byte] = _CLAUSE[0] if char in CLAUSE_BREAKS else 0
+    return bytes(table)
+
+_BATCH_TABLE = _batch_table()
+
+class SentimentAnalyzer:
+    """Lexicon sentiment scorer for one language.
+
+    Words are matched whole (``like`` does not match ``unlikely``). A negator
+    up to ``negation_window`` words before a sentiment word, in the same
+    clause, flips its polarity. Tokenizing is one ``translate`` and ``split``
+    and every token is looked up in a single table, so only the lexicon hits
+    reach Python code.
+    """
+
+    def __init__(self, positive: Iterable[str], negative: Iterable[str], negators: Iterable[str] = (),
+                 negation_window: int = NEGATION_WINDOW):
+        self.positive: FrozenSet[str] = frozenset(positive)
+        self.negative: FrozenSet[str] = frozenset(negative)
+        self.negators: FrozenSet[str] = frozenset(negators)
+        self.negation_window = negation_window
+        # Negadores têm precedência sobre as palavras de sentimento
+        self._kinds: Dict[bytes, int] = {}
+        for words, kind in ((self.negative, NEGATIVE), (self.positive, POSITIVE), (self.negators, NEGATOR)):
+            self._kinds.update((word.encode(), kind) for word in words)
+        self._batch: Optional[_BatchLexicon] = None
+
+    def score(self, text: str) -> float:
+        """Sentiment of ``text`` in [-1.0, 1.0]; 0.0 when nothing matched."""
+        tokens = _tokenize(text)
+        kinds = list(map(self._kinds.get, tokens))
+        positive = negative = 0
+        negator = None
+        for position in compress(count(), kinds):
+            kind = kinds[position]
+            if kind == NEGATOR:
+                negator = position
+                continue
+            negated = negator is not None and self._in_scope(tokens[negator + 1:position])
+            negator = None
+            if (kind == POSITIVE) != negated:
+                positive += 1
+            else:
+                negative += 1
+        return _ratio(positive, negative)
+
+    def score_batch(self, texts: Iterable[str]) -> List[float]:
+        """Score many responses in one call, in input order.
+
+        With NumPy installed the whole batch is matched as one byte array (see
+        ``_BatchLexicon``); otherwise each text goes through ``score``.
+        """
+        texts = list(texts)
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            return list(map(self.score, texts))
+        if self._batch is None:
+            self._batch = _BatchLexicon(self._kinds, self.negation_window)
+        if not self._batch.complete:
+            return list(map(self.score, texts))
+        return self._batch.score(texts)
+
+    def _in_scope(self, between: List[bytes]) -> bool:
+        return len(between) < self.negation_window and _CLAUSE not in between
+
+class _BatchLexicon:
+    """An analyzer's lexicon laid out for scoring a whole batch with NumPy.
+
+    The batch is joined, translated with ``_BATCH_TABLE`` and read as one byte
+    array. Word starts are filtered by two hashes of their first three bytes
+    (one ``bytes.translate`` each), and the few left are compared with the
+    lexicon as two little-endian ``uint64`` halves. Results match ``score``.
+    """
+
+    def __init__(self, kinds: Dict[bytes, int], negation_window: int):
+        import numpy as np
+
+        self.negation_window = negation_window
+        # Palavras com maiúsculas ou pontuação nunca casam com um token; podem ser descartadas
+        words = {word: kind for word, kind in kinds.items()
+                 if word and min(word) > 1 and word.translate(_BATCH_TABLE) == word}
+        # Palavras de 16 bytes ou mais não cabem nas duas metades; esses léxicos ficam com score()
+        self.complete = all(len(word) < 16 for word in words)
+        if not self.complete:
+            return
+        halves = np.frombuffer(b"".join(word.ljust(16, b"\0") for word in words), "<u8").reshape(-1, 2)
+        mixed = halves[:, 0] ^ (halves[:, 1] * np.uint64(_MIX))
+        if len(set(mixed.tolist())) < len(words):
+            self.complete = False
+            return
+        order = np.argsort(mixed)
+        self.mixed, self.low, self.high = mixed[order], halves[order, 0], halves[order, 1]
+        self.kinds = np.fromiter(words.values(), np.uint8, len(words))[order]
+        heads = {head for word in words for head in _heads(word)}
+        self.prefix_tables = []
+        for first, second in _PREFIX_HASHES:
+            table = bytearray(256)
+            for head in heads:
+                table[(head[0] * first + head[1] * second + head[2]) & 0xFF] = 1
+            self.prefix_tables.append(bytes(table))
+
+    def score(self, texts: List[str]) -> List[float]:
+        import numpy as np
+
+        texts = [text if text.isascii() else _normalize(text) for text in texts]
+        positive = np.zeros(len(texts), np.intp)
+        negative = np.zeros(len(texts), np.intp)
+        for first in range(0, len(texts), _BATCH_GROUP):
+            window = slice(first, first + _BATCH_GROUP)
+            self._count(texts[window], positive[window], negative[window])
+        total = positive + negative
+        ratio = np.divide(positive - negative, total, out=np.zeros(len(texts)), where=total > 0)
+        return ratio.tolist()
+
+    def _count(self, texts: List[str], positive, negative) -> None:
+        """Add each text's positive and negative hits to ``positive``/``negative``."""
+        import numpy as np
+
+        joined = "\n".join(texts)
+        if joined.isascii():
+            lengths = np.fromiter(map(len, texts), np.intp, len(texts))
+        else:
+            lengths = np.fromiter((len(text.encode()) for text in texts), np.intp, len(texts))
+        # Cada texto começa após um "\n" (fim de oração): palavras e negações não passam de um texto ao outro
+        ends = np.cumsum(lengths + 1)
+        data = bytearray(("\n" + joined + "\n" * (16 + _NEGATION_SPAN)).encode()).translate(_BATCH_TABLE)
+        codes = np.frombuffer(data, np.uint8)
+        size = len(codes) - 16
+
+        word = codes > 1
+        candidates = np.zeros(size, np.bool_)
+        np.greater(word[1:size], word[:size - 1], out=candidates[1:])
+        hashed = bytearray(size)
+        hashes = np.frombuffer(hashed, np.uint8)
+        for (first, second), table in zip(_PREFIX_HASHES, self.prefix_tables):
+            np.multiply(codes[:size], first, out=hashes)
+            hashes += codes[1:size + 1] * np.uint8(second)
+            hashes += codes[2:size + 2]
+            candidates &= np.frombuffer(hashed.translate(table), np.bool_)
+        starts = np.flatnonzero(candidates)
+        if not len(starts):
+            return
+
+        # Os 16 bytes a partir de cada candidato, cortados no primeiro separador
+        blocks = np.ndarray((len(codes) - 7,), "<u8", data, strides=(1,))
+        low, low_end = _word_prefix(blocks[starts])
+        high, high_end = _word_prefix(blocks[starts + 8])
+        high[low_end != 0] = 0
+        mixed = low ^ (high * np.uint64(_MIX))
+        slot = np.minimum(np.searchsorted(self.mixed, mixed), len(self.mixed) - 1)
+        found = ((low_end | high_end) != 0) & (self.low[slot] == low) & (self.high[slot] == high)
+        hits, kinds = starts[found], self.kinds[slot[found]]
+        if not len(hits):
+            return
+
+        negated = np.zeros(len(hits), np.bool_)
+        pairs = np.flatnonzero((kinds[:-1] == NEGATOR) & (kinds[1:] != NEGATOR))
+        negated[pairs + 1] = self._in_scope(codes, hits[pairs], hits[pairs + 1])
+        sentiment = kinds != NEGATOR
+        is_positive = sentiment & ((kinds == POSITIVE) != negated)
+        owners = np.searchsorted(ends, hits, side="right")
+        positive += np.bincount(owners[is_positive], minlength=len(texts))
+        negative += np.bincount(owners[sentiment & ~is_positive], minlength=len(texts))
+
+    def _in_scope(self, codes, negators, words):
+        """Whether each word is close enough to the negator before it, in the same clause."""
+        import numpy as np
+        from numpy.lib.stride_tricks import as_strided
+
+        span = words - negators
+        rows = as_strided(codes, (len(codes) - _NEGATION_SPAN, _NEGATION_SPAN), (1, 1))[negators]
+        inside = np.arange(_NEGATION_SPAN) < span[:, None]
+        word = rows > 1
+        between = (word[:, 1:] & ~word[:, :-1] & inside[:, 1:]).sum(axis=1)
+        clause = ((rows == 1) & inside).any(axis=1)
+        scoped = (between < self.negation_window) & ~clause
+        # Raro: a palavra está além de _NEGATION_SPAN bytes e nada até ali encerrou o alcance
+        for pair in np.flatnonzero(scoped & (span > _NEGATION_SPAN)):
+            segment = codes[negators[pair]:words[pair]]
+            word = segment > 1
+            scoped[pair] = (np.count_nonzero(word[1:] > word[:-1]) < self.negation_window
+                            and not (segment == 1).any())
+        return scoped
+
+def _heads(word: bytes) -> List[bytes]:
+    """Every first three bytes the batch text can hold where ``word`` starts."""
+    if len(word) >= 3:
+        return [word[:3]]
+    # Palavras curtas terminam num separador (0 ou 1), seguido de qualquer byte
+    tails = [bytes((end, byte)) for end in (0, 1) for byte in range(256)]
+    return [(word + tail)[:3] for tail in tails]
+
+def _word_prefix(blocks):
+    """Mask each 8-byte block after its first separator byte (0 or 1).
+
+    Returns the masked blocks and a per-block marker that is non-zero when
+    a separator was found.
+    """
+    import numpy as np
+
+    ones = np.uint64(0x0101010101010101)
+    ends = (blocks - ones * np.uint64(2)) & ~blocks & (ones * np.uint64(0x80))
+    masks = ((ends & (~ends + np.uint64(1))) >> np.uint64(7)) - np.uint64(1)
+    return blocks & masks, ends
+
+def _normalize(text: str) -> str:
+    text = text.lower()
+    if not text.isascii():
+        for char, replacement in _UNICODE_PUNCTUATION:
+            text = text.replace(char, replacement)
+    return text
+
+def _tokenize(text: str) -> List[bytes]:
+    return _normalize(text).encode().translate(_TOKEN_TABLE).replace(_CLAUSE, b" \x01 ").split()
+
+def _ratio(positive: int, negative: int) -> float:
+    total = positive + negative
+    if total == 0:
+        return 0.0  # neutro
+    return (positive - negative) / total
+
+def normalize_language(language: Optional[str]) -> str:
+    """Map ``"pt-BR"``/``"PT"``-style codes to a lexicon key, defaulting to English."""
+    code = (language or DEFAULT_LANGUAGE).split("-")[0].split("_")[0].lower()
+    return code if code in LEXICONS else DEFAULT_LANGUAGE
+
+@functools.lru_cache(maxsize=None)
+def _analyzer(language: str) -> SentimentAnalyzer:
+    lexicon = LEXICONS[language]
+    return SentimentAnalyzer(lexicon["positive"], lexicon["negative"], lexicon["negators"])
+
+def get_analyzer(language: Optional[str] = None) -> SentimentAnalyzer:
+    """Shared analyzer for a test's ``language`` field."""
+    return _analyzer(normalize_language(language))
+
+def score_batch(texts: Iterable[str], language: Optional[str] = None) -> List[float]:
+    return get_analyzer(language).score_batch(texts)
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from scheduler import CHARS_PER_TOKEN
+
+# (conteúdo, usage, tentativas) devolvido por LLMBackend.complete
+Completion = Tuple[str, Optional[Dict[str, Any]], int]
+
+class LLMBackend:
+    """Where TinyPerson sends its chat completions.
+
+    ``complete`` receives the same parameters as ``chat.completions.create``
+    and returns ``(content, usage, retries)``. When ``on_delta`` is given the
+    text must also be passed to it incrementally.
+    """
+
+    def complete(self, params: Dict[str, Any], on_delta: Optional[Callable[[str], None]] = None) -> Completion:
+        raise NotImplementedError
+
+def request_key(params: Dict[str, Any]) -> str:
+    """Stable key of the parts of a request that determine its response."""
+    key = {name: params.get(name) for name in ("model", "messages", "max_tokens", "temperature", "response_format")}
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()
+
+def stream_text(content: str, on_delta: Optional[Callable[[str], None]]):
+    """Feed ``content`` to ``on_delta`` word by word, like a streamed completion."""
+    if on_delta is None:
+        return
+    for index, word in enumerate(content.split(" ")):
+        on_delta(word if index == 0 else " " + word)
+
+def estimated_usage(params: Dict[str, Any], content: str) -> Dict[str, int]:
+    prompt_tokens = sum(len(message.get("content") or "") for message in params["messages"]) // CHARS_PER_TOKEN
+    completion_tokens = len(content) // CHARS_PER_TOKEN
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens}
+
+class FixtureMissingError(KeyError):
+    pass
+
+class ReplayBackend(LLMBackend):
+    """Answers from a JSONL fixture written by ``RecordingBackend``; never calls the API."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.responses: Dict[str, Dict[str, Any]] = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self.responses[record["key"]] = record
+
+    def complete(self, params: Dict[str, Any], on_delta: Optional[Callable[[str], None]] = None) -> Completion:
+        record = self.responses.get(request_key(params))
+        if record is None:
+            raise FixtureMissingError(f"Requisição sem resposta gravada em {self.path}")
+        stream_text(record["content"], on_delta)
+        return record["content"], record.get("usage"), 0
+
+class RecordingBackend(LLMBackend):
+    """Passes calls through to ``backend`` and appends every response to a JSONL fixture."""
+
+    def __init__(self, backend: LLMBackend, path: str):
+        self.backend = backend
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def complete(self, params: Dict[str, Any], on_delta: Optional[Callable[[str], None]] = None) -> Completion:
+        content, usage, retries = self.backend.complete(params, on_delta)
+        record = {"key": request_key(params), "model": params["model"], "content": content,
+                  "usage": _as_dict(usage)}
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        return content, usage, retries
+
+class SyntheticBackend(LLMBackend):
+    """Offline backend with a configurable latency, for measuring the bridge's own overhead.
+
+    Each call sleeps ``latency_ms`` plus a uniform ``jitter_ms`` and returns a
+    deterministic reply in the scenario format (or valid structured JSON when
+    a ``response_format`` is requested).
+    """
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, seed: Optional[int] = None,
+                 responder: Optional[Callable[[Dict[str, Any]], str]] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.responder = responder or synthetic_reply
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def complete(self, params: Dict[str, Any], on_delta: Optional[Callable[[str], None]] = None) -> Completion:
+        with self._lock:
+            delay_ms = self.latency_ms + self._random.uniform(0, self.jitter_ms)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000.0)
+        content = self.responder(params)
+        stream_text(content, on_delta)
+        return content, estimated_usage(params, content), 0
+
+def synthetic_reply(params: Dict[str, Any]) -> str:
+    prompt = params["messages"][-1]["content"]
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+    schema = (params.get("response_format") or {}).get("json_schema", {}).get("name")
+    if schema == "persona_traits":
+        # Uma persona por linha do prompt, como o TraitGenerator envia
+        count = len(prompt.splitlines())
+        return json.dumps({"results": [{"index": index, "traits": [f"synthetic {digest}"]} for index in range(count)]})
+    if params.get("response_format"):
+        return json.dumps({"response": f"Synthetic answer {digest}.", "keyPoints": ["synthetic"],
+                           "referencedPersonas": [], "tags": ["synthetic"], "sentiment": 0.0})
+    return (f"Synthetic answer {digest}, it looks good.\n\n"
+            "Key points:\n- Clear layout\n- Easy to use\n\n"
+            "Referenced personas:\n\n"
+            "Tags:\n- synthetic\n- benchmark")
+
+def _as_dict(usage: Any) -> Optional[Dict[str, Any]]:
+    if usage is None or isinstance(usage, dict):
+        return usage
+    if hasattr(usage, "model_dump"):
+        return usage.model_dump()
+    return {name: getattr(usage, name, None) for name in ("prompt_tokens", "completion_tokens", "total_tokens")}
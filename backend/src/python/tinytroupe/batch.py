@@ -0,0 +1,165 @@
+import io
+import json
+import os
+import time
+import uuid
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+class BatchError(RuntimeError):
+    pass
+
+class BatchRunner:
+    """Submit many chat completions through the OpenAI Batch API and wait for them.
+
+    ``client`` is an ``openai.OpenAI`` instance or anything exposing the same
+    ``files`` and ``batches`` methods (see ``LocalBatchClient``).
+    """
+
+    def __init__(self, client: Any, work_dir: str, poll_interval: float = 10.0,
+                 timeout: Optional[float] = None, completion_window: str = "24h",
+                 on_status: Optional[Callable[[Any], None]] = None):
+        self.client = client
+        self.work_dir = work_dir
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.completion_window = completion_window
+        self.on_status = on_status
+
+    def run(self, requests: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Run ``{custom_id: completion params}`` and return ``{custom_id: outcome}``.
+
+        Each outcome is either ``{"content": str, "usage": dict}`` or ``{"error": str}``.
+        """
+        if not requests:
+            return {}
+
+        input_path = self.write_input(requests)
+        with open(input_path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window
+        )
+        batch = self.wait(batch)
+
+        outcomes = {}
+        if batch.output_file_id:
+            outcomes.update(self.read_output(batch.output_file_id))
+        if getattr(batch, "error_file_id", None):
+            outcomes.update(self.read_output(batch.error_file_id))
+        for custom_id in requests:
+            outcomes.setdefault(custom_id, {"error": "Sem resposta no lote"})
+        return outcomes
+
+    def write_input(self, requests: Dict[str, Dict[str, Any]]) -> str:
+        os.makedirs(self.work_dir, exist_ok=True)
+        path = os.path.join(self.work_dir, f"batch_{uuid.uuid4().hex}.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for custom_id, params in requests.items():
+                f.write(json.dumps({
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": BATCH_ENDPOINT,
+                    "body": params
+                }) + "\n")
+        return path
+
+    def wait(self, batch: Any) -> Any:
+        started = time.monotonic()
+        while batch.status not in FINAL_STATUSES:
+            if self.timeout is not None and time.monotonic() - started > self.timeout:
+                raise BatchError(f"Lote {batch.id} não terminou em {self.timeout}s")
+            time.sleep(self.poll_interval)
+            batch = self.client.batches.retrieve(batch.id)
+            if self.on_status:
+                self.on_status(batch)
+
+        if batch.status != "completed":
+            raise BatchError(f"Lote {batch.id} terminou com status {batch.status}")
+        return batch
+
+    def read_output(self, file_id: str) -> Dict[str, Dict[str, Any]]:
+        outcomes = {}
+        for line in self.client.files.content(file_id).text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            response = record.get("response") or {}
+            if record.get("error") or response.get("status_code", 200) >= 400:
+                error = record.get("error") or response.get("body", {}).get("error")
+                outcomes[record["custom_id"]] = {"error": json.dumps(error)}
+            else:
+                body = response["body"]
+                outcomes[record["custom_id"]] = {
+                    "content": body["choices"][0]["message"]["content"],
+                    "usage": body.get("usage")
+                }
+        return outcomes
+
+class LocalBatchClient:
+    """File-backed stand-in for the OpenAI files/batches endpoints.
+
+    Uploaded files and batch outputs are written to ``root``. Requests are
+    answered by ``responder(body) -> str``; a batch reports ``in_progress`` for
+    ``polls_until_complete`` retrievals before completing.
+    """
+
+    def __init__(self, root: str, responder: Callable[[Dict[str, Any]], str],
+                 polls_until_complete: int = 1):
+        self.root = root
+        self.responder = responder
+        self.polls_until_complete = polls_until_complete
+        self._batches: Dict[str, Dict[str, Any]] = {}
+        os.makedirs(root, exist_ok=True)
+        self.files = SimpleNamespace(create=self._create_file, content=self._file_content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve_batch)
+
+    def _create_file(self, file: Any, purpose: str) -> Any:
+        file_id = f"file-{uuid.uuid4().hex}"
+        with open(os.path.join(self.root, file_id), "wb") as f:
+            f.write(file.read())
+        return SimpleNamespace(id=file_id, purpose=purpose)
+
+    def _file_content(self, file_id: str) -> Any:
+        with open(os.path.join(self.root, file_id), encoding="utf-8") as f:
+            return SimpleNamespace(text=f.read())
+
+    def _create_batch(self, input_file_id: str, endpoint: str, completion_window: str) -> Any:
+        batch_id = f"batch-{uuid.uuid4().hex}"
+        self._batches[batch_id] = {"input_file_id": input_file_id, "polls": 0, "output_file_id": None}
+        return self._batch_view(batch_id)
+
+    def _retrieve_batch(self, batch_id: str) -> Any:
+        batch = self._batches[batch_id]
+        batch["polls"] += 1
+        if batch["polls"] >= self.polls_until_complete and batch["output_file_id"] is None:
+            batch["output_file_id"] = self._process(batch["input_file_id"])
+        return self._batch_view(batch_id)
+
+    def _process(self, input_file_id: str) -> str:
+        lines: List[str] = []
+        for line in self._file_content(input_file_id).text.splitlines():
+            request = json.loads(line)
+            content = self.responder(request["body"])
+            lines.append(json.dumps({
+                "custom_id": request["custom_id"],
+                "response": {
+                    "status_code": 200,
+                    "body": {"choices": [{"message": {"role": "assistant", "content": content}}]}
+                },
+                "error": None
+            }))
+        output_id = self._create_file(io.BytesIO("\n".join(lines).encode("utf-8")), "batch_output").id
+        return output_id
+
+    def _batch_view(self, batch_id: str) -> Any:
+        batch = self._batches[batch_id]
+        status = "completed" if batch["output_file_id"] else "in_progress"
+        return SimpleNamespace(id=batch_id, status=status, output_file_id=batch["output_file_id"],
+                               error_file_id=None)
@@ -1,55 +1,492 @@
 #!/usr/bin/env python3
 
 import argparse
+import contextvars
 import json
+import mmap
 import os
 import sys
-from typing import Dict, List, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime
 
-from mock import TinyPerson, TinyWorld
+from adaptive import AdaptiveSampler
+from batch import BatchRunner
+from checkpoint import checkpoint_path, load_checkpoint, open_checkpoint, scenario_key
+from clustering import ResponseClusterer, summarize_scenarios
+from framing import FrameWriter
+from personas import hydrate_personas, person_from_dict
+from population import PersonaPopulation
+from mock import (RunConfig, TinyPerson, TinyWorld, configure, configure_clients, configure_scheduler,
+                  cache_stats, cache_lookup, cache_store, get_client, start_run, stop_run)
+from traits import get_generator
+from sharding import DEFAULT_SHARD_QUEUE, LocalShardRunner, RedisShardRunner, serve_shards, split_shards
+from usage import UsageTracker, add_call, record_usage, start_tracking, stop_tracking
+from validation import validate_simulation
+from log import configure_logging, get_logger
+from profiling import Profiler, stage
 
-def setup_config(config_json: str) -> Dict[str, Any]:
-    config = json.loads(config_json)
-    api_key = config.get("api_key", "").strip()
-    if not api_key:
-        raise ValueError("API key não fornecida ou inválida")
-    
-    print("[DEBUG] Configurando API key (primeiros 4 caracteres: {}...)".format(api_key[:4]), file=sys.stderr)
+# Em modo --serve cada requisição tem um id; os frames emitidos durante a
+# requisição são marcados com ele para o processo Node poder demultiplexar.
+_request_id = contextvars.ContextVar("request_id", default=None)
+_output_lock = threading.Lock()
+# Com output_protocol=frames todo o stdout passa a ser frames com prefixo de tamanho
+_frames: Optional[FrameWriter] = None
+logger = get_logger("bridge")
+
+def configure_output(config: Dict[str, Any], stream=None):
+    """Select the stdout protocol: JSON lines (``lines``, default) or length-prefixed ``frames``."""
+    global _frames
+    protocol = config.get("output_protocol", "lines")
+    if protocol == "lines":
+        _frames = None
+    elif protocol == "frames":
+        _frames = FrameWriter(stream or sys.stdout.buffer, config.get("frame_codec", "auto"))
+    else:
+        raise ValueError(f"output_protocol inválido: {protocol}")
+
+def emit(payload: Any, framed: bool = False):
+    """Write one payload to stdout, routed to the current serve request if any."""
+    request_id = _request_id.get()
+    with stage("serialize"):
+        if _frames is not None:
+            _frames.write(payload if request_id is None else {"id": request_id, "type": "frame", "data": payload})
+            return
+        if request_id is not None:
+            line = json.dumps({"id": request_id, "type": "frame", "data": payload})
+        elif framed:
+            line = "__RESULT_START__" + json.dumps(payload) + "__RESULT_END__"
+        else:
+            line = json.dumps(payload)
+        write_line(line)
+
+def respond(message: Dict[str, Any]):
+    """Write a final ``result``/``error`` message in the configured protocol."""
+    if _frames is not None:
+        _frames.write(message)
+    else:
+        write_line(json.dumps(message))
+
+def write_line(line: str):
+    """Write a complete line to stdout without interleaving between threads."""
+    with _output_lock:
+        sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+
+def load_json(value: Any) -> Any:
+    """Accept either a JSON string (argv) or an already decoded value (--serve)."""
+    return json.loads(value) if isinstance(value, str) else value
+
+def open_input(path: str) -> Iterator[bytes]:
+    """Iterate over the lines of the input envelope: stdin for ``-``, else a memory-mapped file."""
+    if path == "-":
+        yield from sys.stdin.buffer
+        return
+
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield from iter(mapped.readline, b"")
+
+def read_envelope(lines: Iterator[bytes]) -> Tuple[Dict[str, Any], Iterator[Any]]:
+    """Split an NDJSON input envelope into its header and a lazy persona iterator.
+
+    The first line is the header (``config``, ``test``, optional ``mode`` and
+    ``persona_count``); every following line is one persona. Keeping the
+    payload out of argv avoids ARG_MAX and keeps the API key out of the
+    process list.
+    """
+    lines = iter(lines)
+    header = None
+    for line in lines:
+        if line.strip():
+            header = json.loads(line)
+            break
+    if header is None:
+        raise ValueError("Envelope de entrada vazio")
+
+    def personas() -> Iterator[Any]:
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+
+    return header, personas()
+
+def setup_config(config_json: Any) -> Dict[str, Any]:
+    """Apply a config process-wide, for one-shot CLI runs and shard workers."""
+    config = load_json(config_json)
+    api_key = require_api_key(config)
+    configure_logging(config)
+    logger.debug("Configurando API key (primeiros 4 caracteres: %s...)", api_key[:4])
     os.environ["OPENAI_API_KEY"] = api_key
+    configure(config)
     return config
 
-def create_tiny_person(persona_json: str, config: Dict[str, Any]) -> TinyPerson:
-    persona = json.loads(persona_json)
-    return TinyPerson(
-        name=persona.get("name", "Anonymous"),
-        age=persona.get("age", 30),
-        occupation=persona.get("occupation", "Unknown"),
-        interests=persona.get("interests", []),
-        traits=persona.get("traits", []),
-        skills=persona.get("skills", []),
-        background=persona.get("background", ""),
-        goals=persona.get("goals", [])
+def setup_request(config: Dict[str, Any]) -> RunConfig:
+    """Settings of one --serve request, kept out of the process-wide state.
+
+    Concurrent requests share the process, so their API key, cache, LLM
+    backend and model router travel in a ``RunConfig`` (see ``start_run``)
+    instead of ``os.environ`` and the module globals that ``setup_config``
+    rewrites.
+    """
+    require_api_key(config)
+    return RunConfig.from_config(config)
+
+def require_api_key(config: Dict[str, Any]) -> str:
+    api_key = (config.get("api_key") or "").strip()
+    if not api_key:
+        raise ValueError("API key não fornecida ou inválida")
+    return api_key
+
+def create_tiny_person(persona_json: Any, config: Dict[str, Any]) -> TinyPerson:
+    return person_from_dict(load_json(persona_json))
+
+def get_max_concurrency(config: Dict[str, Any]) -> int:
+    """Read the max number of in-flight interactions from the config."""
+    try:
+        return max(1, int(config.get("max_concurrency", 1)))
+    except (TypeError, ValueError):
+        raise ValueError("max_concurrency inválido: {}".format(config.get("max_concurrency")))
+
+def stream_deltas(person: TinyPerson, scenario_index: int) -> Callable[[str], None]:
+    """Build the callback that forwards streamed text to Node as message_delta frames."""
+    def on_delta(text: str):
+        emit({
+            "type": "message_delta",
+            "data": {
+                "personaId": person.name,
+                "personaName": person.name,
+                "scenarioIndex": scenario_index,
+                "delta": text
+            }
+        }, framed=True)
+    return on_delta
+
+def run_concurrent(world: TinyWorld, people: Iterable[Tuple[int, TinyPerson]], scenarios: List[Dict[str, Any]],
+                   config: Dict[str, Any], record: Callable,
+                   restored: Optional[Dict[Tuple[int, int], Dict[str, Any]]] = None):
+    """Run each persona's scenarios in order, with personas running concurrently.
+
+    ``people`` is consumed lazily: a persona is only decoded once a worker is
+    about to be free, so large inputs start running before they are fully read.
+    Pairs in ``restored`` (checkpoint entries, on ``--resume``) are not run again.
+    """
+    restored = {} if restored is None else restored
+    max_concurrency = get_max_concurrency(config)
+    logger.debug("Executando com até %d interações simultâneas", max_concurrency)
+
+    stream = bool(config.get("stream"))
+
+    def run_persona(person_index: int, person: TinyPerson):
+        """Run every scenario for one persona, in order."""
+        for scenario_index, scenario in enumerate(scenarios):
+            entry = restored.get((scenario_index, person_index))
+            if entry is not None:
+                world.replay(person, scenario, entry["result"], entry.get("raw"))
+                continue
+            on_delta = stream_deltas(person, scenario_index) if stream else None
+            try:
+                result = world.interact(person, scenario, on_delta=on_delta)
+                # Em sessão a resposta crua vai para o checkpoint, para o --resume refazer o histórico
+                record(scenario_index, person_index, result=result,
+                       raw_response=person.last_response if world.session else None)
+            except Exception as e:
+                record(scenario_index, person_index, error=str(e))
+
+    # Limita quantas personas ficam decodificadas à espera de um worker
+    pending = threading.BoundedSemaphore(max_concurrency * 2)
+    futures = []
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        for person_index, person in people:
+            pending.acquire()
+            future = executor.submit(contextvars.copy_context().run, run_persona, person_index, person)
+            future.add_done_callback(lambda _: pending.release())
+            futures.append(future)
+        for future in futures:
+            future.result()
+
+def parse_outcome(person: TinyPerson, raw_response: str, params: Dict[str, Any], structured: bool,
+                  scenario_index: int, person_index: int, record: Callable):
+    try:
+        result = person.parse_scenario_response(raw_response, structured=structured)
+    except ValueError as e:
+        record(scenario_index, person_index, error=str(e))
+        return
+    record(scenario_index, person_index, result=routed(result, params))
+
+def routed(result: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
+    """Report the model of a batch interaction; batches never escalate."""
+    result["metadata"]["model"] = params["model"]
+    result["metadata"]["escalations"] = []
+    return result
+
+def run_batch(world: TinyWorld, people: Iterable[Tuple[int, TinyPerson]], scenarios: List[Dict[str, Any]],
+              config: Dict[str, Any], record: Callable, client: Any = None,
+              restored: Optional[Dict[Tuple[int, int], Dict[str, Any]]] = None):
+    """Run every persona x scenario prompt through the OpenAI Batch API.
+
+    Prompts already in the response cache are answered locally; the rest are
+    submitted as one batch. Results go through the same parsing as the
+    interactive mode, so the output is identical. Each request uses the
+    first model of a ``cascade_models`` chain; batches don't escalate.
+    """
+    if world.session:
+        raise ValueError("O modo --batch não suporta conversation_mode=session")
+
+    tiny_people = dict(people)
+    restored = {} if restored is None else restored
+    requests = {}
+    for scenario_index, scenario in enumerate(scenarios):
+        for person_index, person in tiny_people.items():
+            if (scenario_index, person_index) in restored:
+                continue
+            params = person.scenario_request(scenario, structured=world.structured_output)
+            cached = cache_lookup(params)
+            if cached is not None:
+                parse_outcome(person, cached, params, world.structured_output, scenario_index, person_index, record)
+            else:
+                requests[f"{scenario_index}-{person_index}"] = params
+
+    logger.info("Enviando lote com %d requisições", len(requests))
+    runner = BatchRunner(
+        client or get_client(),
+        work_dir=config.get("batch_dir") or os.path.join(os.path.dirname(__file__), "temp_results"),
+        poll_interval=float(config.get("batch_poll_interval", 10.0)),
+        timeout=config.get("batch_timeout"),
+        on_status=lambda batch: logger.info("Lote %s: %s", batch.id, batch.status)
     )
+    outcomes = runner.run(requests)
 
-def run_simulation(test_json: str, personas_json: str, config: Dict[str, Any]) -> Dict[str, Any]:
-    """Run a simulation with the given test and personas."""
-    print("[DEBUG] Iniciando simulação", file=sys.stderr)
-    
-    test = json.loads(test_json)
-    print(f"[DEBUG] Teste carregado: {test.get('id', 'unknown')}", file=sys.stderr)
+    # Respostas em texto livre têm o sentimento calculado de uma vez para o lote inteiro
+    parsed = []
+    for custom_id, params in requests.items():
+        scenario_index, person_index = (int(part) for part in custom_id.split("-"))
+        outcome = outcomes[custom_id]
+        if "error" in outcome:
+            record(scenario_index, person_index, error=outcome["error"])
+            continue
+        record_usage(params["model"], outcome.get("usage"), call_type="scenario")
+        try:
+            result = tiny_people[person_index].parse_scenario_response(
+                outcome["content"], structured=world.structured_output, score=False)
+        except ValueError as e:
+            record(scenario_index, person_index, error=str(e))
+            continue
+        # Só respostas válidas vão para o cache
+        cache_store(params, outcome["content"])
+        parsed.append((scenario_index, person_index, routed(result, params)))
+
+    unscored = [result for _, _, result in parsed if result["metadata"]["sentiment"] is None]
+    with stage("sentiment"):
+        sentiments = world.analyzer.score_batch(r["content"] for r in unscored)
+    for result, sentiment in zip(unscored, sentiments):
+        result["metadata"]["sentiment"] = sentiment
+    for scenario_index, person_index, result in parsed:
+        record(scenario_index, person_index, result=result)
+
+def run_adaptive(world: TinyWorld, people: Iterable[Tuple[int, TinyPerson]], scenarios: List[Dict[str, Any]],
+                 config: Dict[str, Any], record: Callable,
+                 restored: Optional[Dict[Tuple[int, int], Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """Run persona x scenario pairs in rounds until each scenario's responses stabilize.
+
+    See ``AdaptiveSampler`` for the stopping rule and how rounds are shared
+    between scenarios. Returns the pairs that were not run, with the reason.
+    """
+    if world.session:
+        raise ValueError("O modo adaptativo não suporta conversation_mode=session")
+
+    tiny_people = dict(people)
+    person_indexes = sorted(tiny_people)
+    restored = {} if restored is None else restored
+    max_concurrency = get_max_concurrency(config)
+    sampler = AdaptiveSampler.from_config(config, len(scenarios), len(person_indexes),
+                                          round_size=max(max_concurrency, len(scenarios)))
+    # O amostrador trabalha com posições; os índices reais das personas podem ter lacunas
+    positions = {person_index: position for position, person_index in enumerate(person_indexes)}
+    for (scenario_index, person_index), entry in restored.items():
+        sampler.mark_done(scenario_index, positions[person_index], entry["result"])
+
+    stream = bool(config.get("stream"))
+
+    def run_pair(scenario_index: int, person_index: int):
+        person = tiny_people[person_index]
+        on_delta = stream_deltas(person, scenario_index) if stream else None
+        try:
+            result = world.interact(person, scenarios[scenario_index], on_delta=on_delta)
+        except Exception as e:
+            record(scenario_index, person_index, error=str(e))
+            return
+        sampler.observe(scenario_index, result)
+        record(scenario_index, person_index, result=result)
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        while True:
+            pairs = sampler.next_round()
+            if not pairs:
+                break
+            logger.debug("Rodada adaptativa com %d interações", len(pairs))
+            futures = [executor.submit(contextvars.copy_context().run, run_pair, scenario_index,
+                                       person_indexes[position])
+                       for scenario_index, position in pairs]
+            for future in futures:
+                future.result()
+
+    skipped = sampler.skipped()
+    for entry in skipped:
+        entry["personaIndexes"] = [person_indexes[position] for position in entry["personaIndexes"]]
+    return skipped
+
+def get_shard_runner(config: Dict[str, Any]):
+    timeout = config.get("shard_timeout")
+    backend = config.get("shard_backend", "local")
+    if backend == "local":
+        return LocalShardRunner(workers=config.get("shard_workers"),
+                                start_method=config.get("shard_start_method", "spawn"), timeout=timeout)
+    if backend == "redis":
+        redis_url = config.get("redis_url") or os.getenv("REDIS_URL")
+        if not redis_url:
+            raise ValueError("shard_backend=redis requer redis_url ou REDIS_URL")
+        return RedisShardRunner(redis_url, config.get("shard_queue", DEFAULT_SHARD_QUEUE), timeout=timeout)
+    raise ValueError(f"shard_backend inválido: {backend}")
+
+def run_sharded(world: TinyWorld, people: Iterable[Tuple[int, TinyPerson]], scenarios: List[Dict[str, Any]],
+                config: Dict[str, Any], record: Callable,
+                restored: Optional[Dict[Tuple[int, int], Dict[str, Any]]] = None):
+    """Split the personas into ``config["shards"]`` shards and run them in other processes.
+
+    Shards run locally on a process pool or on ``--shard-worker`` hosts fed
+    through Redis. Their results and usage come back as events and go through
+    ``record`` here, so ordering, progress, checkpoints and the final result
+    are the same as in a single-process run. Each shard gets an equal share
+    of the rate limits. Returns the cache hits and misses of all shards.
+    """
+    restored = {} if restored is None else restored
+    chunks = split_shards(list(people), int(config["shards"]))
+    shard_config = {key: value for key, value in config.items() if key not in ("shards", "resume")}
+    # Os shards dividem a mesma conta: juntos não podem passar dos limites configurados
+    shard_config["rate_limit_share"] = float(config.get("rate_limit_share", 1.0)) / max(1, len(chunks))
+    if config.get("shard_backend") == "redis":
+        # A chave não vai para o Redis; os workers usam a própria configuração
+        shard_config.pop("api_key", None)
+
+    shards = []
+    for shard_index, chunk in enumerate(chunks):
+        indices = {person_index for person_index, _ in chunk}
+        shards.append({
+            "shard": shard_index,
+            "scenarios": scenarios,
+            "language": world.language,
+            "config": shard_config,
+            "people": [[person_index, describe_person(person)] for person_index, person in chunk],
+            "restored": [[s, p, entry] for (s, p), entry in restored.items() if p in indices]
+        })
+    logger.info("Executando %d shards", len(shards))
+
+    cache = {"hits": 0, "misses": 0}
+
+    def on_event(event: Dict[str, Any]):
+        if event["type"] == "result":
+            record(event["scenario"], event["persona"], result=event.get("result"), error=event.get("error"),
+                   raw_response=event.get("raw"))
+        elif event["type"] == "usage":
+            add_call(event["call"])
+        elif event["type"] == "cache":
+            cache["hits"] += event["hits"]
+            cache["misses"] += event["misses"]
+
+    get_shard_runner(config).run(shards, on_event)
+    return cache
+
+def execute_shard(shard: Dict[str, Any], send: Callable[[Dict[str, Any]], None]):
+    """Run one shard inside a worker process, reporting results, usage and cache counters through ``send``."""
+    config = shard["config"]
+    if config.get("api_key"):
+        os.environ["OPENAI_API_KEY"] = config["api_key"]
+    configure(config)
+    configure_logging(config)
+    # Os deltas de streaming se misturariam no stdout de vários processos
+    worker_config = {**config, "stream": False}
+
+    world = TinyWorld.from_config(config, language=shard.get("language"))
+    people = []
+    for person_index, persona in shard["people"]:
+        person = person_from_dict(persona)
+        world.add_person(person)
+        people.append((person_index, person))
+    restored = {(s, p): entry for s, p, entry in shard["restored"]}
+
+    def record(scenario_index: int, person_index: int, result: Dict[str, Any] = None, error: str = None,
+               raw_response: Optional[str] = None):
+        send({"type": "result", "scenario": scenario_index, "persona": person_index,
+              "result": result, "error": error, "raw": raw_response})
+
+    cache_before = cache_stats()
+    tracking = start_tracking(UsageTracker(on_record=lambda call: send({"type": "usage", "call": call})))
+    try:
+        if config.get("batch"):
+            run_batch(world, people, shard["scenarios"], worker_config, record, restored=restored)
+        else:
+            run_concurrent(world, people, shard["scenarios"], worker_config, record, restored=restored)
+    finally:
+        stop_tracking(tracking)
+        cache_after = cache_stats()
+        send({"type": "cache", "hits": cache_after["hits"] - cache_before["hits"],
+              "misses": cache_after["misses"] - cache_before["misses"]})
+
+def run_simulation(test_json: Any, personas_json: Any, config: Dict[str, Any],
+                   persona_count: Optional[int] = None) -> Dict[str, Any]:
+    """Run a simulation with the given test and personas.
+
+    ``personas_json`` may also be an iterator (see ``read_envelope``), in which
+    case personas are decoded while the simulation is already running;
+    ``persona_count`` then sizes the progress totals up front, if known.
+
+    Finished interactions are appended to the test's checkpoint log; with
+    ``config["resume"]`` the pairs already in the log are restored instead of
+    being run (and billed) again.
+
+    With ``config["adaptive"]`` scenarios stop being sampled once their
+    responses stabilize (see ``run_adaptive``); the pairs left out are listed
+    under ``skipped`` in the result.
+
+    With ``output_protocol=frames`` every interaction is sent once, as an
+    ``interaction`` frame, and the returned ``results`` only reference them by
+    persona index.
+
+    With ``config["cluster_responses"]`` each scenario's responses are
+    clustered and only one representative per cluster is returned in full
+    (see ``summarize_scenarios``); the rest can be read back from the
+    checkpoint log with ``fetch_responses``.
+
+    A ``population`` object in the test (``age_min``, ``age_max``,
+    ``occupations``, ``traits``, ``sample``, ``seed``) loads the personas into
+    a ``PersonaPopulation`` and only runs the ones it selects; persona indexes
+    are then positions within that selection.
+    """
+    test = load_json(test_json)
+    logger.info("Iniciando simulação", extra={"fields": {"testId": test.get("id")}})
     
-    personas = personas_json if isinstance(personas_json, list) else json.loads(personas_json)
-    print(f"[DEBUG] {len(personas)} personas carregadas", file=sys.stderr)
+    personas = load_json(personas_json)
+    if isinstance(personas, list):
+        persona_count = len(personas)
+        logger.debug("%d personas carregadas", persona_count)
+
+    population, selected = None, None
+    if test.get("population") is not None:
+        population = PersonaPopulation.from_personas(personas)
+        selected = population.apply(test["population"])
+        persona_count = len(selected)
+        logger.info("%d de %d personas selecionadas da população", persona_count, len(population))
     
-    tiny_people = []
+    world = TinyWorld.from_config(config, language=test.get("language"))
+    tiny_people = world.people
     results = []
-    iteration_count = 0
     scenarios = test.get("scenarios", [])
     total_iterations = len(scenarios)
     
-    print(f"[DEBUG] Total de cenários: {total_iterations}", file=sys.stderr)
-    
     # Initialize progress tracking
     progress = {
         "status": "initializing",
@@ -57,106 +494,175 @@ def run_simulation(test_json: str, personas_json: str, config: Dict[str, Any]) -
         "total_iterations": total_iterations,
         "current_persona": "",
         "completed_interactions": 0,
-        "total_interactions": total_iterations * len(personas)
+        "total_interactions": total_iterations * (persona_count or 0)
     }
     
-    print(f"[DEBUG] Progresso inicial configurado: {json.dumps(progress)}", file=sys.stderr)
-    
     # Enviar progresso inicial
-    print("__RESULT_START__" + json.dumps({
+    emit({
         "type": "test_update",
         "data": progress
-    }) + "__RESULT_END__")
-    sys.stdout.flush()
+    }, framed=True)
+
+    # Respostas indexadas por [cenário][persona] para manter a ordem original
+    responses = [{} for _ in scenarios]
+    progress_lock = threading.Lock()
 
-    # Create tiny people instances
-    for persona_id in personas:
-        print(f"[DEBUG] Criando TinyPerson para persona {persona_id}", file=sys.stderr)
+    test_id = test.get("id")
+    checkpoint = open_checkpoint(config, test_id)
+    checkpointed = load_checkpoint(checkpoint.path) if checkpoint and config.get("resume") else {}
+    scenario_hashes = [scenario_key(scenario) for scenario in scenarios] if checkpoint else []
+    restored: Dict[Tuple[int, int], Dict[str, Any]] = {}
+    persona_ids: Dict[int, Any] = {}
+    # Interações concluídas por cenário, para a iteração atual ser o primeiro cenário ainda pendente
+    scenario_done = [0] * total_iterations
+
+    def create_people() -> Iterator[Tuple[int, TinyPerson]]:
+        """Create tiny people instances as the personas are decoded."""
         try:
-            persona = {
-                "name": f"Persona_{persona_id}",
-                "age": 30,
-                "occupation": "Unknown",
-                "interests": [],
-                "traits": [],
-                "skills": [],
-                "background": "",
-                "goals": []
-            }
-            tiny_person = create_tiny_person(json.dumps(persona), config)
-            tiny_people.append(tiny_person)
-            print(f"[DEBUG] TinyPerson criada com sucesso: {tiny_person.name}", file=sys.stderr)
+            if population is not None:
+                hydrated = population.people(selected)
+            else:
+                hydrated = hydrate_personas(personas, config)
+            for person_index, (persona_id, tiny_person) in enumerate(hydrated):
+                logger.debug("TinyPerson criada: %s", tiny_person.name)
+                register_person(person_index, persona_id, tiny_person)
+                yield person_index, tiny_person
         except Exception as e:
-            print(f"[ERROR] Erro ao criar TinyPerson: {str(e)}", file=sys.stderr)
+            logger.error("Erro ao criar TinyPerson: %s", e)
             raise
+
+    def register_person(person_index: int, persona_id: Any, tiny_person: TinyPerson):
+        with progress_lock:
+            world.add_person(tiny_person)
+            persona_ids[person_index] = persona_id
+            if persona_count is None:
+                progress["total_interactions"] += total_iterations
+            restore_person(person_index, persona_id)
+
+    def restore_person(person_index: int, persona_id: Any):
+        """Take a persona's finished pairs from the checkpoint, if persona and scenario are unchanged."""
+        for scenario_index in range(total_iterations):
+            entry = checkpointed.get((scenario_index, person_index))
+            # Cenário editado desde o checkpoint: a resposta antiga não vale mais
+            if (entry is None or entry["personaId"] != persona_id
+                    or entry.get("scenarioHash") != scenario_hashes[scenario_index]):
+                continue
+            restored[(scenario_index, person_index)] = entry
+            responses[scenario_index][person_index] = entry["result"]
+            progress["completed_interactions"] += 1
+            scenario_done[scenario_index] += 1
+        if any(scenario_done):
+            advance_iteration()
+
+    def advance_iteration():
+        """Point current_iteration at the first scenario some persona has not finished."""
+        people_count = max(persona_count or 0, len(persona_ids))
+        pending = next((scenario_index for scenario_index, done in enumerate(scenario_done)
+                        if done < people_count), total_iterations - 1)
+        progress["current_iteration"] = pending + 1
     
+    cache_before = cache_stats()
     progress["status"] = "running"
     # socketio.emit('testProgress', {"type": "progress", "data": progress}, room=test["test_id"])
-    
-    # Run scenarios
-    for scenario in scenarios:
-        iteration_count += 1
-        progress["current_iteration"] = iteration_count
-        
-        scenario_results = []
-        for person in tiny_people:
-            progress["current_persona"] = person.name
+
+    def record(scenario_index: int, person_index: int, result: Dict[str, Any] = None, error: str = None,
+               raw_response: Optional[str] = None):
+        """Store one finished interaction and report it to Node."""
+        output = result if error is None else {
+            "type": "error",
+            "data": {"error": error}
+        }
+        with progress_lock:
+            scenario_done[scenario_index] += 1
+            advance_iteration()
+            progress["current_persona"] = tiny_people[person_index].name
             progress["completed_interactions"] += 1
-            
-            try:
-                result = person.interact_with_scenario(scenario)
-                print(json.dumps(result))
-                sys.stdout.flush()
-                
-                # Add to scenario results
-                scenario_results.append(result)
-            except Exception as e:
-                error = {
-                    "type": "error",
-                    "data": {"error": str(e)}
-                }
-                print(json.dumps(error))
-                sys.stdout.flush()
-        
-        results.append({
-            "scenario": scenario,
-            "responses": scenario_results
-        })
+            responses[scenario_index][person_index] = result
+            if checkpoint is not None and result is not None:
+                with stage("serialize"):
+                    checkpoint.append(scenario_index, person_index, persona_ids.get(person_index), result,
+                                      raw_response, scenario_hashes[scenario_index])
+
+            if _frames is not None:
+                # Em frames a interação leva os índices, para o resultado final só referenciá-la
+                emit({"type": "interaction", "scenarioIndex": scenario_index, "personaIndex": person_index,
+                      "personaId": persona_ids.get(person_index), "data": output})
+            else:
+                emit(output)
+            emit({
+                "type": "test_update",
+                "data": progress
+            }, framed=True)
+
+    usage = UsageTracker(on_record=lambda call: emit({"type": "usage", "data": call}, framed=True))
+    tracking = start_tracking(usage)
+    skipped = None
+    shard_cache = {"hits": 0, "misses": 0}
+    try:
+        if config.get("adaptive"):
+            if config.get("batch") or int(config.get("shards", 1)) > 1:
+                raise ValueError("O modo adaptativo não pode ser combinado com batch ou shards")
+            skipped = run_adaptive(world, create_people(), scenarios, config, record, restored=restored)
+        elif int(config.get("shards", 1)) > 1:
+            shard_cache = run_sharded(world, create_people(), scenarios, config, record, restored=restored)
+        elif config.get("batch"):
+            run_batch(world, create_people(), scenarios, config, record, restored=restored)
+        else:
+            run_concurrent(world, create_people(), scenarios, config, record, restored=restored)
+        if config.get("cluster_responses"):
+            if checkpoint is None:
+                logger.warning("Checkpoint desativado: respostas agrupadas não poderão ser consultadas depois")
+            # Dentro do rastreamento, para as chamadas de embeddings entrarem no uso
+            results = summarize_scenarios(scenarios, responses, persona_ids, ResponseClusterer.from_config(config))
+    finally:
+        stop_tracking(tracking)
+        if checkpoint is not None:
+            checkpoint.close()
+
+    if not config.get("cluster_responses") and _frames is not None:
+        results = [{
+            "scenarioIndex": scenario_index,
+            "personaIndexes": [person_index for person_index in sorted(scenario_responses)
+                               if scenario_responses[person_index] is not None]
+        } for scenario_index, scenario_responses in enumerate(responses)]
+    elif not config.get("cluster_responses"):
+        for scenario, scenario_responses in zip(scenarios, responses):
+            results.append({
+                "scenario": scenario,
+                "responses": [
+                    scenario_responses[person_index]
+                    for person_index in sorted(scenario_responses)
+                    if scenario_responses[person_index] is not None
+                ]
+            })
     
+    if skipped is not None:
+        for entry in skipped:
+            entry["personaIds"] = [persona_ids.get(person_index) for person_index in entry["personaIndexes"]]
+        progress["skipped_interactions"] = sum(len(entry["personaIndexes"]) for entry in skipped)
+
     progress["status"] = "completed"
+    # Pares pulados pelo modo adaptativo nunca são registrados
+    progress["current_iteration"] = total_iterations
+    cache_after = cache_stats()
     final_result = {
         "results": results,
-        "progress": progress
+        "progress": progress,
+        "usage": usage.summary(),
+        "cache": {
+            "enabled": cache_after["enabled"],
+            "hits": cache_after["hits"] - cache_before["hits"] + shard_cache["hits"],
+            "misses": cache_after["misses"] - cache_before["misses"] + shard_cache["misses"]
+        }
     }
+    if skipped is not None:
+        final_result["skipped"] = skipped
     
-    # Retornar resultado final
-    print("__RESULT_START__" + json.dumps(final_result) + "__RESULT_END__")
+    # Em frames o resultado (só resumo e referências) é enviado uma única vez por quem chamou
+    if _frames is None:
+        emit(final_result, framed=True)
     return final_result
 
-def save_intermediate_results(test_id: str, result: Dict[str, Any]):
-    """Save intermediate results to a temporary file or database."""
-    results_dir = os.path.join(os.path.dirname(__file__), "temp_results")
-    os.makedirs(results_dir, exist_ok=True)
-    
-    result_file = os.path.join(results_dir, f"test_{test_id}_results.json")
-    
-    try:
-        # Load existing results
-        if os.path.exists(result_file):
-            with open(result_file, 'r') as f:
-                existing_results = json.load(f)
-        else:
-            existing_results = {"results": []}
-        
-        # Append new result
-        existing_results["results"].append(result)
-        
-        # Save updated results
-        with open(result_file, 'w') as f:
-            json.dump(existing_results, f)
-    except Exception as e:
-        print(f"Error saving intermediate results: {str(e)}", file=sys.stderr)
-
 def format_response(response, format_type):
     """Format the response according to the specified format type."""
     if format_type == "summary":
@@ -182,18 +688,146 @@ def structure_response(response):
         "timestamp": datetime.now().isoformat()
     }
 
-def generate_traits(base_persona_json: str, config: Dict[str, Any]) -> List[str]:
-    base_persona = json.loads(base_persona_json)
-    
-    # Use TinyPerson to generate complementary traits
-    person = TinyPerson(
-        name=base_persona.get("name", "Anonymous"),
-        age=base_persona.get("age", 30),
-        occupation=base_persona.get("occupation", "Unknown")
-    )
-    
-    # Generate additional traits based on the base persona
-    return person.generate_traits()
+def generate_traits(base_persona_json: Any, config: Dict[str, Any]) -> List[str]:
+    return generate_traits_batch([load_json(base_persona_json)], config)[0]
+
+def generate_traits_batch(base_personas_json: Any, config: Dict[str, Any]) -> List[List[str]]:
+    """Generate traits for many base personas at once; results are in input order."""
+    base_personas = load_json(base_personas_json)
+    logger.info("Gerando traços para %d personas", len(base_personas))
+    return get_generator(config).generate(base_personas)
+
+def fetch_responses(test_id: Any, pairs: List[List[int]], config: Dict[str, Any]) -> List[Optional[Dict[str, Any]]]:
+    """Full responses of ``[scenario_index, person_index]`` pairs, read from the test's checkpoint log.
+
+    Used to expand the clusters of a ``cluster_responses`` run on demand;
+    pairs not in the log come back as ``None``.
+    """
+    path = checkpoint_path(config, test_id)
+    if path is None:
+        raise ValueError("fetch_responses requer checkpoint_enabled e o id do teste")
+    completed = load_checkpoint(path)
+    return [(completed.get((scenario_index, person_index)) or {}).get("result")
+            for scenario_index, person_index in pairs]
+
+def describe_person(person: TinyPerson) -> Dict[str, Any]:
+    """Serializable view of a TinyPerson."""
+    return {
+        "name": person.name,
+        "age": person.age,
+        "occupation": person.occupation,
+        "interests": person.interests,
+        "traits": person.traits,
+        "skills": person.skills,
+        "background": person.background,
+        "goals": person.goals
+    }
+
+SERVE_MODES = {
+    "run_simulation": lambda request, config: run_simulation(request["test"], request["personas"], config,
+                                                             request.get("persona_count")),
+    "generate_traits": lambda request, config: generate_traits(request["base_persona"], config),
+    "generate_traits_batch": lambda request, config: generate_traits_batch(request["base_personas"], config),
+    "create_person": lambda request, config: describe_person(create_tiny_person(request["persona"], config)),
+    "fetch_responses": lambda request, config: fetch_responses(request["test_id"], request["pairs"], config),
+    "validate": lambda request, config: validate_simulation(load_json(request["test"]),
+                                                            load_json(request["personas"]), config),
+}
+
+def run_profiled(config: Dict[str, Any], run: Callable[[], Any]) -> Any:
+    """Call ``run``, profiling it when ``config["profile"]`` is set.
+
+    The profile files go to ``profile_dir`` and the summary is added to a
+    dict result under ``profile``.
+    """
+    profiler = Profiler.from_config(config)
+    if profiler is None:
+        return run()
+    profiler.start()
+    try:
+        result = run()
+    finally:
+        report = profiler.stop()
+        logger.info("Perfil salvo em %s", profiler.output_dir)
+    if isinstance(result, dict):
+        result["profile"] = report
+    return result
+
+def handle_request(request: Dict[str, Any], base_config: Dict[str, Any]):
+    """Run one --serve request and write its result or error line."""
+    request_id = request.get("id")
+    _request_id.set(request_id)
+    try:
+        handler = SERVE_MODES.get(request.get("mode"))
+        if handler is None:
+            raise ValueError("Modo inválido: {}".format(request.get("mode")))
+        config = {**base_config, **request.get("config", {})}
+        run = start_run(setup_request(config))
+        try:
+            # Requisições simultâneas não têm perfis próprios; com --profile o perfil cobre o worker inteiro
+            data = handler(request, config)
+        finally:
+            stop_run(run)
+        response = {"id": request_id, "type": "result", "data": data}
+    except Exception as e:
+        logger.error("Requisição %s falhou: %s", request_id, e)
+        response = {"id": request_id, "type": "error", "error": str(e)}
+
+    respond(response)
+
+def serve(base_config: Dict[str, Any], stream=None, output=None):
+    """Serve newline-delimited JSON requests from stdin in one warm process.
+
+    Each request is ``{"id", "mode", "config"?, ...mode arguments}`` and gets
+    exactly one ``result`` or ``error`` line back; ``run_simulation`` requests
+    also stream their intermediate output as ``frame`` lines with the same id.
+    Requests are handled concurrently, up to ``serve_workers``. The output
+    protocol, logging, HTTP pool and rate limits are fixed by ``base_config``
+    for the whole process; each request only changes its own run (see
+    ``setup_request``). With ``profile`` the whole worker is profiled, from
+    start until the input ends.
+    """
+    configure_output(base_config, output)
+    configure_logging(base_config)
+    # Cache, backend e roteador vêm de cada requisição (RunConfig); aqui só o que é do processo
+    configure_clients(base_config)
+    configure_scheduler(base_config)
+    stream = stream or sys.stdin
+    workers = max(1, int(base_config.get("serve_workers", 4)))
+    logger.info("Worker pronto (%d requisições simultâneas)", workers)
+
+    run_profiled(base_config, lambda: serve_requests(stream, base_config, workers))
+
+def serve_requests(stream, base_config: Dict[str, Any], workers: int):
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.error("Requisição inválida: %s", e)
+                continue
+            executor.submit(contextvars.copy_context().run, handle_request, request, base_config)
+
+def run_local_mode(args: argparse.Namespace):
+    """Answer ``--create-person`` and ``--validate`` without configuring the API client.
+
+    Neither mode calls the model, so they skip ``setup_config`` (no API key
+    needed) and never load ``openai``.
+    """
+    try:
+        if args.create_person:
+            result = describe_person(create_tiny_person(args.persona, {}))
+        else:
+            config = json.loads(args.config) if args.config else {}
+            result = validate_simulation(load_json(args.test), load_json(args.personas), config)
+        print(json.dumps(result))
+        sys.exit(0)
+    except (ValueError, TypeError) as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
 
 def main():
     parser = argparse.ArgumentParser(description="TinyTroupe Bridge Script")
@@ -201,24 +835,68 @@ def main():
     parser.add_argument("--personas", type=str, help="Personas JSON")
     parser.add_argument("--generate-traits", action="store_true", help="Generate traits mode")
     parser.add_argument("--base-persona", type=str, help="Base persona for trait generation")
+    parser.add_argument("--base-personas", type=str, help="JSON list of base personas for batch trait generation")
     parser.add_argument("--create-person", action="store_true", help="Create person mode")
     parser.add_argument("--persona", type=str, help="Persona JSON for creation")
-    parser.add_argument("--config", type=str, required=True, help="Configuration JSON")
+    parser.add_argument("--validate", action="store_true", help="Validate --test/--personas/--config without running")
+    parser.add_argument("--batch", action="store_true", help="Run the simulation through the OpenAI Batch API")
+    parser.add_argument("--serve", action="store_true", help="Serve NDJSON requests from stdin")
+    parser.add_argument("--shard-worker", action="store_true", help="Run simulation shards taken from Redis")
+    parser.add_argument("--resume", action="store_true", help="Skip interactions already in the test's checkpoint log")
+    parser.add_argument("--profile", action="store_true", help="Record stage timings, cProfile, tracemalloc and stack samples")
+    parser.add_argument("--input", type=str, help="Read an NDJSON envelope from a file, or '-' for stdin")
+    parser.add_argument("--config", type=str, help="Configuration JSON")
     
     args = parser.parse_args()
-    config = setup_config(args.config)
+    if (args.create_person and args.persona) or (args.validate and args.test and args.personas):
+        run_local_mode(args)
+    if args.serve:
+        base_config = json.loads(args.config) if args.config else {}
+        if args.profile:
+            base_config["profile"] = True
+        serve(base_config)
+        sys.exit(0)
+    if args.shard_worker:
+        config = setup_config(args.config)
+        serve_shards(config.get("redis_url") or os.getenv("REDIS_URL"),
+                     config.get("shard_queue", DEFAULT_SHARD_QUEUE))
+        sys.exit(0)
+    if args.input:
+        header, personas = read_envelope(open_input(args.input))
+        base_config = json.loads(args.config) if args.config else {}
+        config = setup_config({**base_config, **header.get("config", {})})
+        header.setdefault("personas", personas)
+    elif args.config:
+        config = setup_config(args.config)
+    else:
+        parser.error("--config ou --input é obrigatório fora do modo --serve")
+    configure_output(config)
+    if args.batch:
+        config["batch"] = True
+    if args.resume:
+        config["resume"] = True
+    if args.profile:
+        config["profile"] = True
     
     try:
-        if args.test and args.personas:
-            result = run_simulation(args.test, args.personas, config)
+        if args.input:
+            handler = SERVE_MODES.get(header.get("mode", "run_simulation"))
+            if handler is None:
+                raise ValueError("Modo inválido: {}".format(header.get("mode")))
+            result = run_profiled(config, lambda: handler(header, config))
+        elif args.test and args.personas:
+            result = run_profiled(config, lambda: run_simulation(args.test, args.personas, config))
         elif args.generate_traits and args.base_persona:
-            result = generate_traits(args.base_persona, config)
-        elif args.create_person and args.persona:
-            result = create_tiny_person(args.persona, config)
+            result = run_profiled(config, lambda: generate_traits(args.base_persona, config))
+        elif args.generate_traits and args.base_personas:
+            result = run_profiled(config, lambda: generate_traits_batch(args.base_personas, config))
         else:
             raise ValueError("Invalid combination of arguments")
         
-        print(json.dumps(result))
+        if _frames is not None:
+            respond({"type": "result", "data": result})
+        else:
+            print(json.dumps(result))
         sys.exit(0)
     except Exception as e:
         print(f"Error: {str(e)}", file=sys.stderr)
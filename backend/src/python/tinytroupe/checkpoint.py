@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_CHECKPOINT_DIR = os.path.join(os.path.dirname(__file__), "temp_results")
+
+class CheckpointLog:
+    """Append-only JSONL log of finished interactions.
+
+    Every record is written and flushed as soon as it is appended; ``fsync``
+    is batched to once every ``fsync_every`` records or ``fsync_interval``
+    seconds, whichever comes first, and always on ``close``.
+    """
+
+    def __init__(self, path: str, resume: bool = False, fsync_every: int = 20, fsync_interval: float = 1.0):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Sem --resume a execução recomeça do zero e o log antigo é descartado
+        self._file = open(path, "a" if resume else "w", encoding="utf-8")
+
+    def append(self, scenario_index: int, person_index: int, persona_id: Any, result: Dict[str, Any],
+               raw_response: Optional[str] = None, scenario_hash: Optional[str] = None):
+        """Log one interaction.
+
+        ``raw_response`` is kept for session replays (see ``TinyWorld.replay``);
+        ``scenario_hash`` (see ``scenario_key``) lets ``--resume`` tell an
+        edited scenario from the one that was answered.
+        """
+        entry = {
+            "scenario": scenario_index,
+            "persona": person_index,
+            "personaId": persona_id,
+            "scenarioHash": scenario_hash,
+            "result": result
+        }
+        if raw_response is not None:
+            entry["raw"] = raw_response
+        line = json.dumps(entry)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            self._unsynced += 1
+            if (self._unsynced >= self.fsync_every
+                    or time.monotonic() - self._synced_at >= self.fsync_interval):
+                self._sync()
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._sync()
+            self._file.close()
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+
+    def __enter__(self) -> "CheckpointLog":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def scenario_key(scenario: Dict[str, Any]) -> str:
+    """Hash of a scenario's full definition, stored with each checkpointed answer."""
+    encoded = json.dumps(scenario, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+def load_checkpoint(path: str) -> Dict[Tuple[int, int], Dict[str, Any]]:
+    """Read ``{(scenario_index, person_index): record}`` from a checkpoint log.
+
+    A partially written last line (a crash mid-append) is ignored.
+    """
+    completed = {}
+    if not os.path.exists(path):
+        return completed
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            completed[(record["scenario"], record["persona"])] = record
+    return completed
+
+def checkpoint_path(config: Dict[str, Any], test_id: Any) -> Optional[str]:
+    """Where a test's checkpoint lives, or ``None`` when checkpointing is off."""
+    if not config.get("checkpoint_enabled", True) or test_id is None:
+        return None
+    checkpoint_dir = config.get("checkpoint_dir") or DEFAULT_CHECKPOINT_DIR
+    return os.path.join(checkpoint_dir, f"test_{test_id}.checkpoint.jsonl")
+
+def open_checkpoint(config: Dict[str, Any], test_id: Any) -> Optional[CheckpointLog]:
+    path = checkpoint_path(config, test_id)
+    if path is None:
+        return None
+    return CheckpointLog(
+        path,
+        resume=bool(config.get("resume")),
+        fsync_every=int(config.get("checkpoint_fsync_every", 20)),
+        fsync_interval=float(config.get("checkpoint_fsync_interval", 1.0))
+    )
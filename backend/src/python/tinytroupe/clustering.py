@@ -0,0 +1,211 @@
+import math
+import operator
+import re
+import zlib
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from log import get_logger
+from mock import OpenAIBackend, embed, get_backend
+
+logger = get_logger("clustering")
+DEFAULT_EMBEDDING_MODEL = "text-embedding-3-small"
+# Vetores reduzidos: a similaridade é calculada em Python puro
+DEFAULT_EMBEDDING_DIMENSIONS = 256
+DEFAULT_EMBEDDING_BATCH_SIZE = 256
+DEFAULT_THRESHOLDS = {"embeddings": 0.9, "minhash": 0.6}
+
+MINHASH_PERMUTATIONS = 64
+MINHASH_BANDS = 16
+SHINGLE_SIZE = 3
+_MERSENNE_PRIME = (1 << 61) - 1
+_WORD = re.compile(r"\w+")
+
+def _permutations(count: int) -> List[Tuple[int, int]]:
+    # Coeficientes fixos, para que as assinaturas sejam iguais entre execuções e processos
+    return [(zlib.crc32(f"a{i}".encode()) | 1, zlib.crc32(f"b{i}".encode())) for i in range(count)]
+
+_PERMUTATIONS = _permutations(MINHASH_PERMUTATIONS)
+
+def shingles(text: str) -> set:
+    """Word trigrams of ``text`` (the words themselves when it is shorter)."""
+    words = _WORD.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return set(words)
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+def minhash_signature(text: str) -> Tuple[int, ...]:
+    hashes = [zlib.crc32(shingle.encode()) for shingle in shingles(text)] or [0]
+    return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+def _signature_similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+def _cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    # Os vetores já chegam normalizados
+    return sum(map(operator.mul, a, b))
+
+def _normalize(vector: Sequence[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+def cluster_minhash(texts: List[str], threshold: float) -> List[List[int]]:
+    """Group near-duplicate texts by estimated Jaccard similarity of their shingles.
+
+    Candidate pairs come from LSH banding of the MinHash signatures, so texts
+    are not compared all against all. Each cluster starts with its
+    representative, the member closest to the cluster's consensus signature.
+    """
+    signatures = [minhash_signature(text) for text in texts]
+    rows = MINHASH_PERMUTATIONS // MINHASH_BANDS
+    parent = list(range(len(texts)))
+
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    for band in range(MINHASH_BANDS):
+        buckets = defaultdict(list)
+        for index, signature in enumerate(signatures):
+            buckets[signature[band * rows:(band + 1) * rows]].append(index)
+        for members in buckets.values():
+            for position, i in enumerate(members):
+                for j in members[position + 1:]:
+                    root_i, root_j = find(i), find(j)
+                    if root_i != root_j and _signature_similarity(signatures[i], signatures[j]) >= threshold:
+                        parent[root_i] = root_j
+
+    groups = defaultdict(list)
+    for index in range(len(texts)):
+        groups[find(index)].append(index)
+
+    clusters = []
+    for members in groups.values():
+        # Assinatura de consenso: o valor mais frequente de cada permutação
+        consensus = [Counter(values).most_common(1)[0][0] for values in zip(*(signatures[i] for i in members))]
+        representative = max(members, key=lambda i: (_signature_similarity(signatures[i], consensus), -i))
+        clusters.append([representative] + [i for i in members if i != representative])
+    return _ordered(clusters)
+
+def cluster_vectors(vectors: List[Sequence[float]], threshold: float) -> List[List[int]]:
+    """Group embeddings whose cosine similarity to a cluster's leader reaches ``threshold``.
+
+    Each cluster starts with its representative, the member closest to the
+    cluster centroid.
+    """
+    vectors = [_normalize(vector) for vector in vectors]
+    leaders: List[int] = []
+    groups: List[List[int]] = []
+    for index, vector in enumerate(vectors):
+        for leader, members in zip(leaders, groups):
+            if _cosine(vectors[leader], vector) >= threshold:
+                members.append(index)
+                break
+        else:
+            leaders.append(index)
+            groups.append([index])
+
+    clusters = []
+    for members in groups:
+        centroid = _normalize([sum(values) for values in zip(*(vectors[i] for i in members))])
+        representative = max(members, key=lambda i: _cosine(vectors[i], centroid))
+        clusters.append([representative] + [i for i in members if i != representative])
+    return _ordered(clusters)
+
+def _ordered(clusters: List[List[int]]) -> List[List[int]]:
+    """Largest clusters first; ties keep the order of their first member."""
+    return sorted(clusters, key=lambda members: (-len(members), min(members)))
+
+class ResponseClusterer:
+    """Clusters each scenario's responses, by embeddings or by MinHash.
+
+    Embeddings are requested for every scenario's texts at once, in batches of
+    ``batch_size``. Without the OpenAI backend (synthetic or replay runs), or
+    if the embedding calls fail, MinHash is used instead.
+    """
+
+    def __init__(self, method: str = "embeddings", threshold: Optional[float] = None,
+                 model: str = DEFAULT_EMBEDDING_MODEL, dimensions: Optional[int] = DEFAULT_EMBEDDING_DIMENSIONS,
+                 batch_size: int = DEFAULT_EMBEDDING_BATCH_SIZE):
+        if method not in DEFAULT_THRESHOLDS:
+            raise ValueError(f"Método de agrupamento inválido: {method}")
+        self.method = method
+        self.threshold = threshold
+        self.model = model
+        self.dimensions = dimensions
+        self.batch_size = max(1, batch_size)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "ResponseClusterer":
+        method = config.get("cluster_responses")
+        return cls(
+            method="embeddings" if method is True else method,
+            threshold=config.get("cluster_threshold"),
+            model=config.get("embedding_model", DEFAULT_EMBEDDING_MODEL),
+            dimensions=config.get("embedding_dimensions", DEFAULT_EMBEDDING_DIMENSIONS),
+            batch_size=int(config.get("embedding_batch_size", DEFAULT_EMBEDDING_BATCH_SIZE))
+        )
+
+    def cluster(self, groups: List[List[str]]) -> List[List[List[int]]]:
+        """Cluster each list of texts separately; returns the clusters of each list."""
+        method = self.method
+        vectors = None
+        if method == "embeddings":
+            vectors = self._embed_all([text for texts in groups for text in texts])
+            if vectors is None:
+                method = "minhash"
+
+        # O limiar configurado vale para o método pedido; no fallback usa o padrão do MinHash
+        threshold = self.threshold if self.threshold is not None and method == self.method else DEFAULT_THRESHOLDS[method]
+        clustered, offset = [], 0
+        for texts in groups:
+            if method == "embeddings":
+                clustered.append(cluster_vectors(vectors[offset:offset + len(texts)], threshold))
+            else:
+                clustered.append(cluster_minhash(texts, threshold))
+            offset += len(texts)
+        return clustered
+
+    def _embed_all(self, texts: List[str]) -> Optional[List[List[float]]]:
+        if not isinstance(get_backend(), OpenAIBackend):
+            logger.info("Backend sem embeddings; agrupando por MinHash")
+            return None
+        vectors = []
+        try:
+            for start in range(0, len(texts), self.batch_size):
+                params = {"model": self.model, "input": [text or " " for text in texts[start:start + self.batch_size]]}
+                if self.dimensions:
+                    params["dimensions"] = int(self.dimensions)
+                vectors.extend(embed(params))
+        except Exception as e:
+            logger.warning("Falha ao gerar embeddings (%s); agrupando por MinHash", e)
+            return None
+        return vectors
+
+def summarize_scenarios(scenarios: List[Dict[str, Any]], responses: List[Dict[int, Optional[Dict[str, Any]]]],
+                        persona_ids: Dict[int, Any], clusterer: ResponseClusterer) -> List[Dict[str, Any]]:
+    """Compact per-scenario results: one full representative per cluster plus its members.
+
+    Members are ``{"personaIndex", "personaId"}``; their full responses stay in
+    the checkpoint log and can be fetched with ``fetch_responses``.
+    """
+    answered = [[(person_index, response) for person_index, response in sorted(scenario_responses.items())
+                 if response is not None]
+                for scenario_responses in responses]
+    clustered = clusterer.cluster([[response.get("content") or "" for _, response in pairs] for pairs in answered])
+
+    results = []
+    for scenario, pairs, clusters in zip(scenarios, answered, clustered):
+        results.append({
+            "scenario": scenario,
+            "responseCount": len(pairs),
+            "clusters": [{
+                "representative": pairs[members[0]][1],
+                "count": len(members),
+                "members": [{"personaIndex": pairs[i][0], "personaId": persona_ids.get(pairs[i][0])}
+                            for i in members]
+            } for members in clusters]
+        })
+    return results
@@ -0,0 +1,66 @@
+import json
+import struct
+import threading
+from typing import Any, BinaryIO, Callable, Iterator, Tuple
+
+# Cabeçalho de cada frame: tamanho do corpo (uint32 big-endian) e o codec usado
+FRAME_HEADER = struct.Struct(">IB")
+CODEC_JSON = ord("j")
+CODEC_MSGPACK = ord("m")
+
+Encoder = Callable[[Any], bytes]
+
+def _json_dumps(payload: Any) -> bytes:
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+def get_encoder(name: str = "auto") -> Tuple[int, Encoder]:
+    """Return ``(codec_id, encode)`` for ``msgpack``, ``orjson``, ``json`` or ``auto``.
+
+    ``auto`` uses orjson when it is installed and plain json otherwise; both
+    produce JSON, so the reader needs no extra decoder. msgpack is only used
+    when asked for explicitly.
+    """
+    if name == "msgpack":
+        import msgpack
+        return CODEC_MSGPACK, lambda payload: msgpack.packb(payload, use_bin_type=True)
+    if name in ("orjson", "auto"):
+        try:
+            import orjson
+            return CODEC_JSON, orjson.dumps
+        except ImportError:
+            if name == "orjson":
+                raise
+    if name in ("json", "auto"):
+        return CODEC_JSON, _json_dumps
+    raise ValueError(f"frame_codec inválido: {name}")
+
+def decode(codec: int, body: bytes) -> Any:
+    if codec == CODEC_MSGPACK:
+        import msgpack
+        return msgpack.unpackb(body, raw=False)
+    if codec == CODEC_JSON:
+        return json.loads(body)
+    raise ValueError(f"Codec de frame desconhecido: {codec}")
+
+class FrameWriter:
+    """Writes payloads to a binary stream as length-prefixed frames, one whole frame at a time."""
+
+    def __init__(self, stream: BinaryIO, codec: str = "auto"):
+        self.stream = stream
+        self.codec, self._encode = get_encoder(codec)
+        self._lock = threading.Lock()
+
+    def write(self, payload: Any):
+        body = self._encode(payload)
+        with self._lock:
+            self.stream.write(FRAME_HEADER.pack(len(body), self.codec) + body)
+            self.stream.flush()
+
+def read_frames(stream: BinaryIO) -> Iterator[Any]:
+    """Decode the frames of a stream written by ``FrameWriter`` until it ends."""
+    while True:
+        header = stream.read(FRAME_HEADER.size)
+        if len(header) < FRAME_HEADER.size:
+            return
+        length, codec = FRAME_HEADER.unpack(header)
+        yield decode(codec, stream.read(length))
@@ -0,0 +1,83 @@
+import json
+import logging
+import sys
+from typing import Any, Dict, Optional
+
+ROOT_LOGGER = "tinytroupe"
+# Inclui os nomes de nível do Winston, que o Node repassa em logging_level
+LEVELS = {
+    "silly": logging.DEBUG,
+    "verbose": logging.DEBUG,
+    "debug": logging.DEBUG,
+    "http": logging.INFO,
+    "info": logging.INFO,
+    "warn": logging.WARNING,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+}
+DEFAULT_LEVEL = "info"
+LOG_FORMATS = ("text", "json")
+
+_handler: Optional[logging.Handler] = None
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ``{"level", "logger", "message", ...fields}``."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {"level": record.levelname.lower(), "logger": record.name, "message": record.getMessage()}
+        payload.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+class TextFormatter(logging.Formatter):
+    """``[LEVEL] message key=value ...``, the bridge's historical stderr format."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = f"[{record.levelname}] {record.getMessage()}"
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+class StderrHandler(logging.StreamHandler):
+    """Writes to whatever ``sys.stderr`` is at emit time, so redirections still apply."""
+
+    @property
+    def stream(self):
+        return sys.stderr
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger for one bridge module, under the shared ``tinytroupe`` root."""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+def configure_logging(config: Dict[str, Any], stream=None):
+    """Set the level (``logging_level``) and format (``log_format``) of every bridge logger.
+
+    Logs always go to stderr; stdout carries only protocol output. Messages
+    below the level are dropped before being formatted, so debug calls in
+    hot loops cost one level check when disabled.
+    """
+    level_name = str(config.get("logging_level") or DEFAULT_LEVEL).lower()
+    if level_name not in LEVELS:
+        raise ValueError(f"logging_level inválido: {config.get('logging_level')}")
+    log_format = config.get("log_format", "text")
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"log_format inválido: {log_format}")
+
+    global _handler
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(LEVELS[level_name])
+    root.propagate = False
+    if stream is not None or not isinstance(_handler, StderrHandler):
+        if _handler is not None:
+            root.removeHandler(_handler)
+        _handler = StderrHandler() if stream is None else logging.StreamHandler(stream)
+        root.addHandler(_handler)
+    _handler.setFormatter(JsonFormatter() if log_format == "json" else TextFormatter())
@@ -1,9 +1,379 @@
+import contextvars
 import json
 import os
-from typing import Dict, List, Any
-import openai
+import threading
+import time
+from functools import cached_property
+from typing import TYPE_CHECKING, Callable, Dict, List, Any, Optional
 from datetime import datetime
 
+from analytics import SentimentAnalyzer, get_analyzer
+from backends import LLMBackend, RecordingBackend, ReplayBackend, SyntheticBackend
+from cache import ResponseCache, DEFAULT_MAX_BYTES
+from routing import DEFAULT_MAX_TOKENS, DEFAULT_MODEL, ModelRouter
+from scheduler import CHARS_PER_TOKEN, RequestScheduler
+from usage import record_usage
+from log import get_logger
+from profiling import stage
+
+if TYPE_CHECKING:
+    import openai
+
+
+# Clientes OpenAI compartilhados por (api_key, base_url, modelo, opções HTTP),
+# para reaproveitar o pool de conexões e as sessões TLS entre chamadas.
+_clients: Dict[tuple, "openai.OpenAI"] = {}
+_clients_lock = threading.Lock()
+logger = get_logger("mock")
+_client_options = {
+    "pool_size": 20,
+    "keepalive_expiry": 30.0,
+    "timeout": 120.0,
+    "connect_timeout": 10.0,
+}
+
+def configure_clients(config: Dict[str, Any]):
+    """Apply HTTP connection pool settings from the bridge config."""
+    for option, key in (("pool_size", "http_pool_size"),
+                        ("keepalive_expiry", "http_keepalive_expiry"),
+                        ("timeout", "http_timeout"),
+                        ("connect_timeout", "http_connect_timeout")):
+        if config.get(key) is not None:
+            _client_options[option] = type(_client_options[option])(config[key])
+
+class RunConfig:
+    """Settings of one run that must not leak into runs going on at the same time.
+
+    ``configure`` sets process-wide defaults (CLI runs, shard workers); each
+    ``--serve`` request instead installs its own ``RunConfig`` with
+    ``start_run``, and every thread started through ``contextvars`` sees it.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, cache: Optional[ResponseCache] = None,
+                 backend: Optional[LLMBackend] = None, router: Optional[ModelRouter] = None):
+        self.api_key = api_key
+        self.cache = cache
+        self.backend = backend
+        self.router = router
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "RunConfig":
+        return cls(api_key=config.get("api_key") or None, cache=open_cache(config), backend=make_backend(config),
+                   router=ModelRouter.from_config(config))
+
+_run_config = contextvars.ContextVar("run_config", default=None)
+
+def start_run(run_config: RunConfig) -> contextvars.Token:
+    return _run_config.set(run_config)
+
+def stop_run(token: contextvars.Token):
+    _run_config.reset(token)
+
+# Cache de respostas em disco (None quando desabilitado)
+_cache: Optional[ResponseCache] = None
+_caches: Dict[tuple, ResponseCache] = {}
+
+def open_cache(config: Dict[str, Any]) -> Optional[ResponseCache]:
+    """The response cache selected by cache_enabled/cache_dir, shared per directory."""
+    enabled = config.get("cache_enabled")
+    if enabled is None:
+        enabled = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+    if not enabled:
+        return None
+
+    cache_dir = config.get("cache_dir") or os.getenv("CACHE_DIR", "./cache")
+    max_bytes = int(config.get("cache_max_bytes", DEFAULT_MAX_BYTES))
+    key = (os.path.abspath(cache_dir), max_bytes)
+    with _clients_lock:
+        if key not in _caches:
+            _caches[key] = ResponseCache(cache_dir, max_bytes)
+        return _caches[key]
+
+def configure_cache(config: Dict[str, Any]):
+    """Enable the on-disk response cache according to cache_enabled/cache_dir."""
+    global _cache
+    _cache = open_cache(config)
+
+def active_cache() -> Optional[ResponseCache]:
+    run = _run_config.get()
+    return _cache if run is None else run.cache
+
+def cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters of the active response cache."""
+    cache = active_cache()
+    if cache is None:
+        return {"enabled": False, "hits": 0, "misses": 0}
+    return {"enabled": True, **cache.stats()}
+
+def cache_lookup(params: Dict[str, Any]) -> Optional[str]:
+    """Return the cached completion for these request parameters, if any."""
+    cache = active_cache()
+    if cache is None:
+        return None
+    cached = cache.get(_cache_key(params))
+    return cached["content"] if cached is not None else None
+
+def cache_store(params: Dict[str, Any], content: str):
+    cache = active_cache()
+    if cache is not None:
+        cache.set(_cache_key(params), {"content": content})
+
+def _cache_key(params: Dict[str, Any]) -> str:
+    extra = {"response_format": params["response_format"]} if "response_format" in params else {}
+    return ResponseCache.make_key(params["model"], params["messages"],
+                                  params.get("max_tokens"), params.get("temperature"), **extra)
+
+# Agendador central: orçamentos de tokens/requisições por modelo e retentativas
+_scheduler = RequestScheduler()
+
+def configure_scheduler(config: Dict[str, Any]):
+    """Seed rate-limit budgets and retry policy from the bridge config.
+
+    The scheduler is shared by the whole process; it is only rebuilt when
+    these settings change, so its buckets and any 429 backoff survive a
+    reconfiguration.
+    """
+    global _scheduler
+    scheduler = RequestScheduler.from_config(config)
+    if scheduler.settings() != _scheduler.settings():
+        _scheduler = scheduler
+
+# Modelo e orçamento de saída de cada chamada das TinyPerson
+_router = ModelRouter()
+
+def get_router() -> ModelRouter:
+    run = _run_config.get()
+    return _router if run is None or run.router is None else run.router
+
+def configure_router(config: Dict[str, Any]):
+    """Route models and output budgets from model/models/max_tokens/cascade_models."""
+    global _router
+    _router = ModelRouter.from_config(config)
+
+class OpenAIBackend(LLMBackend):
+    """Chat completions through the shared OpenAI client and the request scheduler."""
+
+    def complete(self, params: Dict[str, Any], on_delta: Optional[Callable[[str], None]] = None):
+        client = get_client()
+        if on_delta is None:
+            response, retries = _scheduler.execute(params, lambda p: client.chat.completions.with_raw_response.create(**p))
+            return response.choices[0].message.content, getattr(response, "usage", None), retries
+        stream, retries = _scheduler.execute(params, lambda p: client.chat.completions.with_raw_response.create(
+            **p, stream=True, stream_options={"include_usage": True}))
+        content, usage = read_stream(stream, on_delta)
+        return content, usage, retries
+
+# Backend usado pelas TinyPerson que não têm um próprio
+_backend: LLMBackend = OpenAIBackend()
+
+def get_backend() -> LLMBackend:
+    run = _run_config.get()
+    return _backend if run is None or run.backend is None else run.backend
+
+def set_backend(backend: LLMBackend):
+    global _backend
+    _backend = backend
+
+def make_backend(config: Dict[str, Any]) -> LLMBackend:
+    """Build the LLM backend: ``openai`` (default), ``synthetic``, ``replay`` or ``record``."""
+    name = config.get("llm_backend", "openai")
+    if name == "openai":
+        return OpenAIBackend()
+    if name == "synthetic":
+        return SyntheticBackend(
+            latency_ms=float(config.get("synthetic_latency_ms", 0.0)),
+            jitter_ms=float(config.get("synthetic_jitter_ms", 0.0)),
+            seed=config.get("synthetic_seed")
+        )
+    if name == "replay":
+        return ReplayBackend(config["llm_fixtures"])
+    if name == "record":
+        return RecordingBackend(OpenAIBackend(), config["llm_fixtures"])
+    raise ValueError(f"llm_backend inválido: {name}")
+
+def configure_backend(config: Dict[str, Any]):
+    """Set the process-wide backend from ``llm_backend``."""
+    set_backend(make_backend(config))
+
+def configure(config: Dict[str, Any]):
+    """Apply the bridge config to the shared clients, cache, scheduler, backend and router."""
+    configure_clients(config)
+    configure_cache(config)
+    configure_scheduler(config)
+    configure_backend(config)
+    configure_router(config)
+
+def get_client(api_key: Optional[str] = None, base_url: Optional[str] = None,
+               model: str = DEFAULT_MODEL) -> "openai.OpenAI":
+    """Return the shared OpenAI client for this api key, base URL and model.
+
+    ``openai`` and ``httpx`` are imported here, on the first call, so modes
+    that never reach the API don't pay for loading them.
+    """
+    import httpx
+    import openai
+
+    run = _run_config.get()
+    api_key = api_key or (run.api_key if run is not None else None) or os.environ.get("OPENAI_API_KEY")
+    base_url = base_url or os.environ.get("OPENAI_BASE_URL")
+    options = tuple(sorted(_client_options.items()))
+    key = (api_key, base_url, model, options)
+
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            pool_size = _client_options["pool_size"]
+            http_client = openai.DefaultHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=pool_size,
+                    max_keepalive_connections=pool_size,
+                    keepalive_expiry=_client_options["keepalive_expiry"]
+                )
+            )
+            client = openai.OpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                http_client=http_client,
+                # As retentativas ficam a cargo do RequestScheduler
+                max_retries=0,
+                timeout=httpx.Timeout(_client_options["timeout"],
+                                      connect=_client_options["connect_timeout"])
+            )
+            _clients[key] = client
+        return client
+
+# Instruções fixas de formato dos cenários. Ficam numa mensagem de sistema
+# logo após a persona para que o prefixo do prompt seja idêntico entre
+# cenários e aproveite o cache de prompt do provedor.
+SCENARIO_INSTRUCTIONS = (
+    "For each scenario, provide your response in the following format:\n"
+    "1. Your direct response to the scenario\n"
+    "2. A list of key points from your response\n"
+    "3. Any personas you are referencing in your response\n"
+    "4. Relevant tags or topics from your response\n"
+    "\n"
+    "Make sure to stay in character and consider your personality traits and background."
+)
+
+# Modo de saída estruturada: a resposta vem como JSON validado pelo schema,
+# sem o texto de formatação numerado (por isso o limite de tokens é menor).
+STRUCTURED_SCENARIO_INSTRUCTIONS = (
+    "For each scenario, answer in character. Fill in your direct response, the key points of "
+    "your response, any personas you are referencing, relevant tags or topics, and the "
+    "sentiment of your response from -1.0 (very negative) to 1.0 (very positive).\n"
+    "\n"
+    "Make sure to stay in character and consider your personality traits and background."
+)
+STRUCTURED_MAX_TOKENS = DEFAULT_MAX_TOKENS["structured_scenario"]
+SCENARIO_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "scenario_response",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "response": {"type": "string"},
+                "keyPoints": {"type": "array", "items": {"type": "string"}},
+                "referencedPersonas": {"type": "array", "items": {"type": "string"}},
+                "tags": {"type": "array", "items": {"type": "string"}},
+                "sentiment": {"type": "number"}
+            },
+            "required": ["response", "keyPoints", "referencedPersonas", "tags", "sentiment"],
+            "additionalProperties": False
+        }
+    }
+}
+
+class ResponseValidationError(ValueError):
+    """A structured response that doesn't match SCENARIO_RESPONSE_FORMAT."""
+
+def validate_structured_response(raw_response: str) -> Dict[str, Any]:
+    """Decode and validate a structured scenario response."""
+    try:
+        data = json.loads(raw_response)
+    except (TypeError, json.JSONDecodeError) as e:
+        raise ResponseValidationError(f"Resposta estruturada não é JSON válido: {str(e)}")
+
+    schema = SCENARIO_RESPONSE_FORMAT["json_schema"]["schema"]
+    if not isinstance(data, dict) or set(data) != set(schema["required"]):
+        raise ResponseValidationError("Resposta estruturada com campos inesperados")
+    if not isinstance(data["response"], str):
+        raise ResponseValidationError("Campo 'response' deve ser texto")
+    for field in ("keyPoints", "referencedPersonas", "tags"):
+        if not isinstance(data[field], list) or not all(isinstance(item, str) for item in data[field]):
+            raise ResponseValidationError(f"Campo '{field}' deve ser uma lista de textos")
+    if isinstance(data["sentiment"], bool) or not isinstance(data["sentiment"], (int, float)):
+        raise ResponseValidationError("Campo 'sentiment' deve ser numérico")
+    data["sentiment"] = max(-1.0, min(1.0, float(data["sentiment"])))
+    return data
+
+def read_stream(stream: Any, on_delta: Callable[[str], None]) -> tuple:
+    """Forward the text fragments of a streamed completion.
+
+    Returns the full text and the usage reported in the final chunk, if any.
+    """
+    pieces = []
+    usage = None
+    for chunk in stream:
+        if getattr(chunk, "usage", None) is not None:
+            usage = chunk.usage
+        if not chunk.choices:
+            continue
+        text = chunk.choices[0].delta.content
+        if text:
+            pieces.append(text)
+            on_delta(text)
+    return "".join(pieces), usage
+
+def complete(params: Dict[str, Any], on_delta: Optional[Callable[[str], None]] = None,
+             call_type: str = "chat", backend: Optional[LLMBackend] = None,
+             parse: Optional[Callable[[str], Any]] = None) -> Any:
+    """Run one chat completion, going through the response cache when enabled.
+
+    When ``on_delta`` is given the completion is streamed and each text
+    fragment is passed to it as it arrives. Usage, latency and retries are
+    recorded under ``call_type``. With ``parse`` the reply is only cached once
+    ``parse(content)`` succeeds, and its result is returned instead of the text.
+    """
+    parse = parse or _unparsed
+    cached = cache_lookup(params)
+    if cached is not None:
+        try:
+            parsed = parse(cached)
+        except ValueError as e:
+            # Entrada gravada antes da validação; refaz a chamada
+            logger.debug("Ignorando resposta em cache inválida: %s", e)
+        else:
+            if on_delta is not None:
+                on_delta(cached)
+            return parsed
+
+    backend = backend or get_backend()
+    started = time.perf_counter()
+    with stage("api_wait"):
+        content, usage, retries = backend.complete(params, on_delta)
+    latency_ms = (time.perf_counter() - started) * 1000
+
+    record_usage(params["model"], usage, latency_ms=latency_ms, retries=retries, call_type=call_type)
+    parsed = parse(content)
+    cache_store(params, content)
+    return parsed
+
+def _unparsed(content: str) -> str:
+    return content
+
+def embed(params: Dict[str, Any]) -> List[List[float]]:
+    """Embed ``params["input"]`` through the OpenAI embeddings endpoint, in input order."""
+    client = get_client()
+    started = time.perf_counter()
+    with stage("api_wait"):
+        response, retries = _scheduler.execute(params, lambda p: client.embeddings.with_raw_response.create(**p))
+    latency_ms = (time.perf_counter() - started) * 1000
+    record_usage(params["model"], getattr(response, "usage", None), latency_ms=latency_ms, retries=retries,
+                 call_type="embedding")
+    return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
 class TinyPerson:
     def __init__(self, name: str, age: int, occupation: str, interests: List[str] = None,
                  traits: List[str] = None, skills: List[str] = None,
@@ -16,32 +386,78 @@ class TinyPerson:
         self.skills = skills or []
         self.background = background
         self.goals = goals or []
+        # Histórico da sessão (usado apenas quando o TinyWorld está em modo sessão)
+        self.history: List[Dict[str, str]] = []
+        self.history_summary = ""
+        # Texto cru da última resposta a um cenário, como fica no histórico
+        self.last_response: Optional[str] = None
+        # Léxico de sentimento do idioma do teste (o TinyWorld troca ao adicionar a pessoa)
+        self.analyzer: SentimentAnalyzer = get_analyzer()
+        # Backend próprio desta pessoa; None usa o backend configurado no módulo
+        self.backend: Optional[LLMBackend] = None
 
-    def listen_and_act(self, message: str) -> str:
-        client = openai.OpenAI()
-        prompt = f"""
-        You are {self.name}, a {self.age}-year-old {self.occupation}.
-        Your interests are: {', '.join(self.interests)}
-        Your traits are: {', '.join(self.traits)}
-        Your skills are: {', '.join(self.skills)}
-        Your background: {self.background}
-        Your goals are: {', '.join(self.goals)}
-
-        Given this scenario: {message}
-        
-        How would you respond? Please provide your thoughts and reactions in character.
+    @cached_property
+    def persona_preamble(self) -> str:
+        """Persona description sent as the system message, rendered once per TinyPerson.
+
+        It must stay byte-identical between calls so the provider can reuse the
+        cached prompt prefix across scenarios.
         """
+        return "\n".join([
+            f"You are {self.name}, a {self.age}-year-old {self.occupation}.",
+            f"Your interests are: {', '.join(self.interests)}",
+            f"Your traits are: {', '.join(self.traits)}",
+            f"Your skills are: {', '.join(self.skills)}",
+            f"Your background: {self.background}",
+            f"Your goals are: {', '.join(self.goals)}",
+        ])
 
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=4000
+    def _request_params(self, prompt: str, call_type: str, temperature: Optional[float] = None,
+                        system: Optional[List[str]] = None,
+                        response_format: Optional[Dict[str, Any]] = None,
+                        model: Optional[str] = None, max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """Build the chat completion parameters for a rendered prompt.
+
+        ``system`` holds the stable system messages placed before the prompt;
+        the session summary and history follow them, so the shared prefix stays
+        cacheable. ``model`` and ``max_tokens`` default to the router's choice
+        for ``call_type``.
+        """
+        messages = [{"role": "system", "content": content} for content in system or []]
+        if self.history_summary:
+            messages.append({
+                "role": "system",
+                "content": f"Summary of your earlier answers in this session:\n{self.history_summary}"
+            })
+        messages.extend(self.history)
+        messages.append({"role": "user", "content": prompt})
+        router = get_router()
+        params = {
+            "model": model or router.model_for(call_type),
+            "messages": messages,
+            "max_tokens": max_tokens or router.max_tokens_for(call_type)
+        }
+        if temperature is not None:
+            params["temperature"] = temperature
+        if response_format is not None:
+            params["response_format"] = response_format
+        return params
+
+    def _complete(self, params: Dict[str, Any], on_delta: Optional[Callable[[str], None]] = None,
+                  call_type: str = "chat", parse: Optional[Callable[[str], Any]] = None) -> Any:
+        return complete(params, on_delta, call_type=call_type, backend=self.backend, parse=parse)
+
+    def listen_and_act(self, message: str) -> str:
+        prompt = (
+            f"Given this scenario: {message}\n"
+            "\n"
+            "How would you respond? Please provide your thoughts and reactions in character."
         )
-        
-        return response.choices[0].message.content
+
+        return self._complete(self._request_params(prompt, "listen", system=[self.persona_preamble]),
+                              call_type="listen")
 
     def generate_traits(self) -> List[str]:
-        client = openai.OpenAI()
         prompt = f"""
         Given a person with the following characteristics:
         - Name: {self.name}
@@ -53,83 +469,173 @@ class TinyPerson:
         to their existing characteristics. Return only the traits as a comma-separated list.
         """
 
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=100
-        )
-        
-        traits = response.choices[0].message.content.split(',')
+        traits = self._complete(self._request_params(prompt, "traits"), call_type="traits").split(',')
         return [trait.strip() for trait in traits]
 
-    def interact_with_scenario(self, scenario: Dict[str, Any]) -> Dict[str, Any]:
-        """Interact with a given scenario and return the response."""
+    def interact_with_scenario(self, scenario: Dict[str, Any],
+                               on_delta: Optional[Callable[[str], None]] = None,
+                               remember: bool = False, structured: bool = False) -> Dict[str, Any]:
+        """Interact with a given scenario and return the response.
+
+        Pass ``on_delta`` to receive the response text incrementally while it
+        streams, ``remember=True`` to keep the exchange in the history and
+        ``structured=True`` to request a schema-validated JSON response (the
+        streamed deltas are then JSON fragments).
+        """
+        params = self.scenario_request(scenario, structured=structured)
+        router = get_router()
+        models = router.scenario_models()
+        escalations = []
+        for attempt, model in enumerate(models):
+            params["model"] = model
+            escalated = attempt < len(models) - 1
+
+            def accept(raw_response: str):
+                result = self.parse_scenario_response(raw_response, structured=structured)
+                if escalated and len(result["content"].strip()) < router.cascade_min_chars:
+                    raise ResponseValidationError("Resposta curta demais")
+                return raw_response, result
+
+            try:
+                # Só a primeira tentativa é transmitida; a mensagem final substitui o texto parcial
+                raw_response, result = self._complete(params, on_delta if attempt == 0 else None,
+                                                      call_type="scenario", parse=accept)
+                break
+            except ResponseValidationError as e:
+                if not escalated:
+                    raise
+                logger.debug("%s: escalando de %s (%s)", self.name, model, e)
+                escalations.append({"model": model, "reason": str(e)})
+
+        result["metadata"]["model"] = model
+        result["metadata"]["escalations"] = escalations
+        self.last_response = raw_response
+        if remember:
+            self.remember(params["messages"][-1]["content"], raw_response)
+        return result
+
+    def remember(self, prompt: str, response: str):
+        """Append one exchange to the session history."""
+        self.history.append({"role": "user", "content": prompt})
+        self.history.append({"role": "assistant", "content": response})
+
+    def history_tokens(self) -> int:
+        """Rough token count of the history and its summary."""
+        chars = len(self.history_summary) + sum(len(message["content"]) for message in self.history)
+        return chars // CHARS_PER_TOKEN
+
+    def compact_history(self, max_tokens: int, summarize: bool = False):
+        """Keep the history within ``max_tokens`` by dropping the oldest exchanges.
+
+        With ``summarize`` the dropped exchanges are folded into
+        ``history_summary`` (one extra completion) instead of being forgotten.
+        """
+        dropped = []
+        while self.history and self.history_tokens() > max_tokens:
+            dropped.extend(self.history[:2])
+            del self.history[:2]
+
+        if summarize and dropped:
+            self.history_summary = self.summarize_history(dropped)
+
+    def summarize_history(self, messages: List[Dict[str, str]]) -> str:
+        transcript = "\n\n".join(f"{message['role']}: {message['content']}" for message in messages)
+        prompt = "\n".join([
+            "Summarize the earlier part of this session in at most 150 words, from your own point of view.",
+            "Keep the facts and opinions you expressed; later scenarios may depend on them.",
+            "",
+            f"Previous summary: {self.history_summary or '(none)'}",
+            "",
+            transcript,
+        ])
+        # Sem histórico no pedido de resumo: só a persona e a transcrição
+        history, summary = self.history, self.history_summary
+        self.history, self.history_summary = [], ""
+        try:
+            return self._complete(self._request_params(prompt, "summary", system=[self.persona_preamble]),
+                                  call_type="summary")
+        finally:
+            self.history, self.history_summary = history, summary
+
+    def scenario_request(self, scenario: Dict[str, Any], structured: bool = False) -> Dict[str, Any]:
+        """Render the completion parameters for a scenario without calling the API."""
+        with stage("prompt_render"):
+            return self._scenario_request(scenario, structured)
+
+    def _scenario_request(self, scenario: Dict[str, Any], structured: bool) -> Dict[str, Any]:
         # Extract scenario details
         description = scenario.get("description", "")
         steps = scenario.get("steps", [])
         
-        # Generate response using OpenAI
-        client = openai.OpenAI()
-        prompt = f"""
-        You are {self.name}, a {self.age}-year-old {self.occupation}.
-        Your interests are: {', '.join(self.interests)}
-        Your traits are: {', '.join(self.traits)}
-        Your skills are: {', '.join(self.skills)}
-        Your background: {self.background}
-        Your goals are: {', '.join(self.goals)}
-
-        Given this scenario:
-        {description}
-
-        Steps:
-        {chr(10).join(f'- {step}' for step in steps)}
-
-        Please provide your response in the following format:
-        1. Your direct response to the scenario
-        2. A list of key points from your response
-        3. Any personas you are referencing in your response
-        4. Relevant tags or topics from your response
-
-        Make sure to stay in character and consider your personality traits and background.
+        # Só o conteúdo do cenário vai na mensagem do usuário
+        prompt = "\n".join([
+            "Given this scenario:",
+            description,
+            "",
+            "Steps:",
+            *(f"- {step}" for step in steps),
+        ])
+
+        router = get_router()
+        model = router.scenario_models()[0]
+        if structured:
+            return self._request_params(prompt, "scenario", model=model,
+                                        max_tokens=router.max_tokens_for("structured_scenario", len(steps)),
+                                        system=[self.persona_preamble, STRUCTURED_SCENARIO_INSTRUCTIONS],
+                                        response_format=SCENARIO_RESPONSE_FORMAT)
+        return self._request_params(prompt, "scenario", model=model,
+                                    max_tokens=router.max_tokens_for("scenario", len(steps)),
+                                    system=[self.persona_preamble, SCENARIO_INSTRUCTIONS])
+
+    def parse_scenario_response(self, raw_response: str, structured: bool = False,
+                                score: bool = True) -> Dict[str, Any]:
+        """Turn a raw scenario completion into the message payload sent to Node.
+
+        Structured responses are decoded and validated in one step and raise
+        ``ResponseValidationError`` instead of silently losing the metadata.
+        With ``score=False`` a text response's sentiment is left as ``None``
+        for the caller to fill in with ``SentimentAnalyzer.score_batch``.
         """
+        if structured:
+            with stage("parse"):
+                data = validate_structured_response(raw_response)
+            return self._message(data["response"], data["sentiment"], data["keyPoints"],
+                                 data["referencedPersonas"], data["tags"])
 
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=2000
-        )
-        
-        raw_response = response.choices[0].message.content
-        
-        # Analisar a resposta para extrair metadados
-        try:
-            # Tentar extrair partes da resposta formatada
-            parts = raw_response.split("\n\n")
-            main_response = parts[0].strip()
-            key_points = []
-            referenced_personas = []
-            tags = []
+        with stage("parse"):
+            # Analisar a resposta para extrair metadados
+            try:
+                # Tentar extrair partes da resposta formatada
+                parts = raw_response.split("\n\n")
+                main_response = parts[0].strip()
+                key_points = []
+                referenced_personas = []
+                tags = []
             
-            for part in parts[1:]:
-                if "key points" in part.lower():
-                    key_points = [point.strip("- ").strip() for point in part.split("\n")[1:] if point.strip()]
-                elif "personas" in part.lower():
-                    referenced_personas = [persona.strip("- ").strip() for persona in part.split("\n")[1:] if persona.strip()]
-                elif "tags" in part.lower() or "topics" in part.lower():
-                    tags = [tag.strip("- ").strip() for tag in part.split("\n")[1:] if tag.strip()]
-        except Exception as e:
-            print(f"Error parsing response: {str(e)}")
-            main_response = raw_response
-            key_points = []
-            referenced_personas = []
-            tags = []
+                for part in parts[1:]:
+                    if "key points" in part.lower():
+                        key_points = [point.strip("- ").strip() for point in part.split("\n")[1:] if point.strip()]
+                    elif "personas" in part.lower():
+                        referenced_personas = [persona.strip("- ").strip() for persona in part.split("\n")[1:] if persona.strip()]
+                    elif "tags" in part.lower() or "topics" in part.lower():
+                        tags = [tag.strip("- ").strip() for tag in part.split("\n")[1:] if tag.strip()]
+            except Exception as e:
+                logger.warning("Erro ao analisar resposta: %s", e)
+                main_response = raw_response
+                key_points = []
+                referenced_personas = []
+                tags = []
         
         # Calcular sentimento
-        sentiment = self._analyze_sentiment(main_response)
+        sentiment = self._analyze_sentiment(main_response) if score else None
         
+        return self._message(main_response, sentiment, key_points, referenced_personas, tags)
+
+    def _message(self, content: str, sentiment: float, key_points: List[str],
+                 referenced_personas: List[str], tags: List[str]) -> Dict[str, Any]:
         return {
             "type": "message",
-            "content": main_response,
+            "content": content,
             "personaId": self.name,
             "personaName": self.name,
             "timestamp": datetime.now().isoformat(),
@@ -142,33 +648,76 @@ class TinyPerson:
         }
         
     def _analyze_sentiment(self, text: str) -> float:
-        """Simple sentiment analysis based on keyword matching."""
-        positive_words = ['great', 'excellent', 'good', 'like', 'love', 'useful', 
-                         'helpful', 'amazing', 'fantastic', 'positive']
-        negative_words = ['bad', 'poor', 'dislike', 'hate', 'useless', 
-                         'unhelpful', 'terrible', 'negative', 'awful', 'confusing']
-        
-        text = text.lower()
-        positive_count = sum(1 for word in positive_words if word in text)
-        negative_count = sum(1 for word in negative_words if word in text)
-        
-        if positive_count == 0 and negative_count == 0:
-            return 0.0  # neutral
-            
-        total = positive_count + negative_count
-        sentiment = (positive_count - negative_count) / total
-        return max(-1.0, min(1.0, sentiment))  # normalize to [-1.0, 1.0]
+        """Lexicon sentiment of a response, in [-1.0, 1.0]."""
+        with stage("sentiment"):
+            return self.analyzer.score(text)
 
 class TinyWorld:
-    def __init__(self):
+    """Holds the simulated people and, in session mode, their conversations.
+
+    In session mode each person answers scenarios with its own earlier
+    exchanges in the prompt. The history is kept within
+    ``history_max_tokens`` by truncating, or summarizing, the oldest turns.
+    """
+
+    HISTORY_STRATEGIES = ("truncate", "summarize")
+
+    def __init__(self, session: bool = False, history_max_tokens: int = 2000,
+                 history_strategy: str = "truncate", structured_output: bool = False,
+                 language: Optional[str] = None):
+        if history_strategy not in self.HISTORY_STRATEGIES:
+            raise ValueError(f"history_strategy inválida: {history_strategy}")
         self.people = []
+        self.session = session
+        self.history_max_tokens = history_max_tokens
+        self.history_strategy = history_strategy
+        self.structured_output = structured_output
+        self.language = language
+        self.analyzer = get_analyzer(language)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], language: Optional[str] = None) -> "TinyWorld":
+        """Build a world from the bridge config; ``language`` is the test's language."""
+        return cls(
+            session=config.get("conversation_mode", "stateless") == "session",
+            history_max_tokens=int(config.get("history_max_tokens", 2000)),
+            history_strategy=config.get("history_strategy", "truncate"),
+            structured_output=bool(config.get("structured_output", False)),
+            language=language or config.get("language")
+        )
 
     def add_person(self, person: TinyPerson):
+        person.analyzer = self.analyzer
         self.people.append(person)
 
+    def replay(self, person: TinyPerson, scenario: Dict[str, Any], result: Dict[str, Any],
+               raw_response: Optional[str] = None):
+        """Put a checkpointed interaction back into the person's session history.
+
+        ``raw_response`` is the reply as the live run remembered it; checkpoints
+        written without it fall back to the parsed content.
+        """
+        if self.session:
+            prompt = person.scenario_request(scenario, structured=self.structured_output)["messages"][-1]["content"]
+            person.remember(prompt, result["content"] if raw_response is None else raw_response)
+            # Só trunca: resumir aqui faria novas chamadas para interações já pagas
+            person.compact_history(self.history_max_tokens)
+
+    def interact(self, person: TinyPerson, scenario: Dict[str, Any],
+                 on_delta: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Run one scenario for a person, keeping its session history if enabled."""
+        if not self.session:
+            return person.interact_with_scenario(scenario, on_delta=on_delta, structured=self.structured_output)
+
+        result = person.interact_with_scenario(scenario, on_delta=on_delta, remember=True,
+                                               structured=self.structured_output)
+        person.compact_history(self.history_max_tokens, summarize=self.history_strategy == "summarize")
+        return result
+
 def setup_config(config_json: str) -> Dict[str, Any]:
     config = json.loads(config_json)
     os.environ["OPENAI_API_KEY"] = config["api_key"]
+    configure(config)
     return config
 
 def create_tiny_person(persona_json: str, config: Dict[str, Any]) -> Dict[str, Any]:
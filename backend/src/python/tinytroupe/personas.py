@@ -0,0 +1,178 @@
+import copy
+import os
+import threading
+from collections import OrderedDict
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from log import get_logger
+from mock import TinyPerson
+
+logger = get_logger("personas")
+PERSONA_COLUMNS = ("id", "name", "age", "occupation", "interests", "traits", "digital_skills",
+                   "background_story", "goals", "updated_at")
+PERSONA_QUERY = (f"SELECT {', '.join(PERSONA_COLUMNS)} FROM personas "
+                 "WHERE id = ANY(%s) AND deleted_at IS NULL")
+STAMP_QUERY = "SELECT id, updated_at FROM personas WHERE id = ANY(%s) AND deleted_at IS NULL"
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_CACHE_SIZE = 1024
+
+class PersonaNotFoundError(LookupError):
+    pass
+
+def person_from_row(row: Dict[str, Any]) -> TinyPerson:
+    """Build a TinyPerson from a ``personas`` table row."""
+    return TinyPerson(
+        name=row["name"],
+        age=row["age"],
+        occupation=row["occupation"],
+        interests=list(row.get("interests") or []),
+        traits=list(row.get("traits") or []),
+        skills=[row["digital_skills"]] if row.get("digital_skills") else [],
+        background=row.get("background_story") or "",
+        goals=list(row.get("goals") or [])
+    )
+
+def fresh_copy(person: TinyPerson) -> TinyPerson:
+    """Copy a cached person for one run: shares the rendered prompt, not the session history."""
+    clone = copy.copy(person)
+    clone.history = []
+    clone.history_summary = ""
+    return clone
+
+class PersonaRepository:
+    """Loads personas from PostgreSQL by id, with an LRU of built TinyPerson objects.
+
+    Cache entries are keyed by ``(id, updated_at)``, so an edited persona is
+    rebuilt while unchanged ones are only checked by timestamp. ``psycopg2`` is
+    imported on first use.
+    """
+
+    def __init__(self, dsn: str, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.dsn = dsn
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, Any], TinyPerson]" = OrderedDict()
+        self._latest: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._connection = None
+
+    def load(self, persona_ids: List[str]) -> List[TinyPerson]:
+        """Return fresh TinyPerson objects for ``persona_ids``, in the same order."""
+        ids = list(dict.fromkeys(persona_ids))
+        with self._lock:
+            cached_ids = [persona_id for persona_id in ids if persona_id in self._latest]
+
+        people: Dict[str, TinyPerson] = {}
+        missing = ids
+        if cached_ids:
+            # Só confere updated_at; as personas inalteradas vêm do cache
+            stamps = self._query(STAMP_QUERY, cached_ids)
+            with self._lock:
+                for persona_id in cached_ids:
+                    key = (persona_id, stamps.get(persona_id, {}).get("updated_at"))
+                    if key in self._cache:
+                        self._cache.move_to_end(key)
+                        people[persona_id] = self._cache[key]
+            missing = [persona_id for persona_id in ids if persona_id not in people]
+
+        if missing:
+            rows = self._query(PERSONA_QUERY, missing)
+            not_found = [persona_id for persona_id in missing if persona_id not in rows]
+            if not_found:
+                raise PersonaNotFoundError(f"Personas não encontradas: {', '.join(map(str, not_found))}")
+            with self._lock:
+                for persona_id in missing:
+                    row = rows[persona_id]
+                    people[persona_id] = self._remember(persona_id, row["updated_at"], person_from_row(row))
+
+        return [fresh_copy(people[persona_id]) for persona_id in persona_ids]
+
+    def _remember(self, persona_id: str, updated_at: Any, person: TinyPerson) -> TinyPerson:
+        previous = self._latest.pop(persona_id, None)
+        if previous is not None:
+            self._cache.pop((persona_id, previous), None)
+        self._cache[(persona_id, updated_at)] = person
+        self._latest[persona_id] = updated_at
+        while len(self._cache) > self.cache_size:
+            (evicted_id, _), _ = self._cache.popitem(last=False)
+            self._latest.pop(evicted_id, None)
+        return person
+
+    def _query(self, query: str, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            connection = self._connect()
+            with connection.cursor() as cursor:
+                cursor.execute(query, (ids,))
+                columns = [column[0] for column in cursor.description]
+                rows = [dict(zip(columns, values)) for values in cursor.fetchall()]
+            connection.rollback()
+        return {str(row["id"]): row for row in rows}
+
+    def _connect(self):
+        if self._connection is None or self._connection.closed:
+            import psycopg2
+            self._connection = psycopg2.connect(self.dsn)
+        return self._connection
+
+_repositories: Dict[str, PersonaRepository] = {}
+_repositories_lock = threading.Lock()
+
+def get_repository(config: Dict[str, Any]) -> Optional[PersonaRepository]:
+    """Per-process repository for the configured database, or ``None`` without one."""
+    dsn = config.get("database_url") or os.getenv("DATABASE_URL")
+    if not dsn:
+        return None
+    with _repositories_lock:
+        if dsn not in _repositories:
+            _repositories[dsn] = PersonaRepository(
+                dsn, cache_size=int(config.get("persona_cache_size", DEFAULT_CACHE_SIZE)))
+        return _repositories[dsn]
+
+def placeholder_person(persona_id: Any) -> TinyPerson:
+    return TinyPerson(name=f"Persona_{persona_id}", age=30, occupation="Unknown")
+
+def hydrate_personas(personas: Iterable[Any], config: Dict[str, Any]) -> Iterator[Tuple[Any, TinyPerson]]:
+    """Yield ``(persona_id, TinyPerson)`` for ids or full persona dicts, in input order.
+
+    Ids are loaded from the database in chunks of ``persona_batch_size``, one
+    query per chunk, so a lazily decoded input is hydrated as it streams in.
+    Without a configured database ids fall back to placeholder personas.
+    """
+    repository = get_repository(config)
+    if repository is None:
+        warned = False
+        for persona in personas:
+            if isinstance(persona, dict):
+                yield persona.get("id"), person_from_dict(persona)
+                continue
+            # Só avisa quando algum id de fato vira persona genérica
+            if not warned:
+                logger.warning("Sem DATABASE_URL; ids de persona viram personas genéricas")
+                warned = True
+            yield persona, placeholder_person(persona)
+        return
+
+    batch_size = max(1, int(config.get("persona_batch_size", DEFAULT_BATCH_SIZE)))
+    personas = iter(personas)
+    while True:
+        chunk = list(islice(personas, batch_size))
+        if not chunk:
+            return
+        loaded = iter(repository.load([str(persona) for persona in chunk if not isinstance(persona, dict)]))
+        for persona in chunk:
+            if isinstance(persona, dict):
+                yield persona.get("id"), person_from_dict(persona)
+            else:
+                yield persona, next(loaded)
+
+def person_from_dict(persona: Dict[str, Any]) -> TinyPerson:
+    return TinyPerson(
+        name=persona.get("name", "Anonymous"),
+        age=persona.get("age", 30),
+        occupation=persona.get("occupation", "Unknown"),
+        interests=persona.get("interests", []),
+        traits=persona.get("traits", []),
+        skills=persona.get("skills", []),
+        background=persona.get("background", ""),
+        goals=persona.get("goals", [])
+    )
@@ -0,0 +1,136 @@
+import random
+from array import array
+from itertools import compress
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from mock import TinyPerson
+from personas import person_from_dict
+
+LIST_FIELDS = ("interests", "traits", "skills", "goals")
+SELECTION_KEYS = ("age_min", "age_max", "occupations", "traits", "sample", "seed")
+
+class Vocabulary:
+    """Interns strings as small integer codes shared by every column."""
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+class PersonaPopulation:
+    """Column store for large synthetic persona populations.
+
+    Ages, occupations and backgrounds are ``array`` columns; list attributes
+    (interests, traits, skills, goals) are one flat code array plus offsets
+    per attribute, with every string interned in a shared ``Vocabulary``.
+    Filters run one column at a time over the whole population, and
+    ``TinyPerson`` objects are only built by ``people`` for the personas a
+    simulation actually runs.
+    """
+
+    def __init__(self):
+        self.vocabulary = Vocabulary()
+        self.ids: List[Any] = []
+        self.names: List[str] = []
+        self.ages = array("H")
+        self.occupations = array("I")
+        self.backgrounds = array("I")
+        self.lists = {field: (array("I"), array("I", [0])) for field in LIST_FIELDS}
+
+    @classmethod
+    def from_personas(cls, personas: Iterable[Any]) -> "PersonaPopulation":
+        population = cls()
+        population.extend(personas)
+        return population
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def extend(self, personas: Iterable[Any]):
+        for persona in personas:
+            self.append(persona)
+
+    def append(self, persona: Any) -> int:
+        """Add one persona dict and return its index."""
+        if not isinstance(persona, dict):
+            raise ValueError("População de personas requer objetos de persona, não ids")
+        code = self.vocabulary.code
+        self.ids.append(persona.get("id"))
+        self.names.append(persona.get("name", "Anonymous"))
+        self.ages.append(int(persona.get("age", 30)))
+        self.occupations.append(code(persona.get("occupation", "Unknown")))
+        self.backgrounds.append(code(persona.get("background", "")))
+        for field, (values, offsets) in self.lists.items():
+            values.extend(code(value) for value in persona.get(field) or [])
+            offsets.append(len(values))
+        return len(self.names) - 1
+
+    def _codes(self, field: str, index: int) -> array:
+        values, offsets = self.lists[field]
+        return values[offsets[index]:offsets[index + 1]]
+
+    def record(self, index: int) -> Dict[str, Any]:
+        """The persona at ``index`` as a plain dict."""
+        strings = self.vocabulary.values
+        record = {
+            "id": self.ids[index],
+            "name": self.names[index],
+            "age": self.ages[index],
+            "occupation": strings[self.occupations[index]],
+            "background": strings[self.backgrounds[index]],
+        }
+        for field in LIST_FIELDS:
+            record[field] = [strings[code] for code in self._codes(field, index)]
+        return record
+
+    def select(self, age_min: Optional[int] = None, age_max: Optional[int] = None,
+               occupations: Optional[Iterable[str]] = None, traits: Optional[Iterable[str]] = None) -> List[int]:
+        """Indexes of the personas matching every given filter, in population order.
+
+        ``occupations`` matches any of the values; ``traits`` requires all of them.
+        """
+        selected: Iterable[int] = range(len(self))
+        if age_min is not None or age_max is not None:
+            low = 0 if age_min is None else age_min
+            high = 0xFFFF if age_max is None else age_max
+            selected = compress(selected, [low <= age <= high for age in self.ages])
+        if occupations is not None:
+            # Filtra pelos códigos: uma tabela de busca evita comparar texto linha a linha
+            wanted = [False] * len(self.vocabulary)
+            for occupation in occupations:
+                if occupation in self.vocabulary.codes:
+                    wanted[self.vocabulary.codes[occupation]] = True
+            mask = [wanted[code] for code in self.occupations]
+            selected = (index for index in selected if mask[index])
+        if traits is not None:
+            required = {self.vocabulary.codes.get(trait, -1) for trait in traits}
+            selected = (index for index in selected if required.issubset(self._codes("traits", index)))
+        return list(selected)
+
+    def sample(self, count: Optional[int] = None, seed: Optional[int] = None, **filters: Any) -> List[int]:
+        """Up to ``count`` random matching indexes (all of them without ``count``), in population order."""
+        selected = self.select(**filters)
+        if count is None or count >= len(selected):
+            return selected
+        return sorted(random.Random(seed).sample(selected, count))
+
+    def apply(self, selection: Dict[str, Any]) -> List[int]:
+        """Indexes chosen by a test's ``population`` spec (filters plus ``sample``/``seed``)."""
+        unknown = set(selection) - set(SELECTION_KEYS)
+        if unknown:
+            raise ValueError(f"Filtros de população desconhecidos: {', '.join(sorted(unknown))}")
+        return self.sample(**selection)
+
+    def people(self, indexes: Optional[Iterable[int]] = None) -> Iterator[Tuple[Any, TinyPerson]]:
+        """Yield ``(persona_id, TinyPerson)`` for ``indexes``, building each person on demand."""
+        for index in range(len(self)) if indexes is None else indexes:
+            yield self.ids[index], person_from_dict(self.record(index))
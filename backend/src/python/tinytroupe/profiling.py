@@ -0,0 +1,186 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import tracemalloc
+
+STAGES = ("prompt_render", "api_wait", "parse", "sentiment", "serialize")
+DEFAULT_PROFILE_DIR = os.path.join(os.path.dirname(__file__), "temp_results", "profiles")
+DEFAULT_SAMPLE_INTERVAL_MS = 5.0
+TOP_ENTRIES = 20
+
+# Perfil em andamento; sem ele ``stage`` devolve um contexto vazio compartilhado
+_active: Optional["Profiler"] = None
+_active_lock = threading.Lock()
+_NO_STAGE = nullcontext()
+
+def stage(name: str):
+    """Time a block under ``name`` when a profile is running; a no-op otherwise."""
+    profiler = _active
+    return _NO_STAGE if profiler is None else _Stage(profiler.timings, name)
+
+class _Stage:
+    __slots__ = ("timings", "name", "started")
+
+    def __init__(self, timings: "StageTimings", name: str):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.timings.add(self.name, time.perf_counter() - self.started)
+
+class StageTimings:
+    """Count, total and max duration per stage, from any thread."""
+
+    def __init__(self):
+        self._stages: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float):
+        with self._lock:
+            entry = self._stages.setdefault(name, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: {"count": count, "total_ms": round(total * 1000, 3),
+                           "mean_ms": round(total * 1000 / count, 3), "max_ms": round(longest * 1000, 3)}
+                    for name, (count, total, longest) in self._stages.items()}
+
+class StackSampler(threading.Thread):
+    """Samples the stack of every other thread at a fixed interval.
+
+    cProfile only sees the thread that enabled it; sampling covers the worker
+    threads too and yields collapsed stacks (``root;...;leaf count``) that
+    flamegraph.pl, speedscope or inferno read directly.
+    """
+
+    def __init__(self, interval_ms: float = DEFAULT_SAMPLE_INTERVAL_MS):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.interval = interval_ms / 1000.0
+        self.samples: Counter = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == self.ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+class Profiler:
+    """Per-stage timings, cProfile, tracemalloc and stack samples of one bridge run.
+
+    ``stop`` writes ``profile.pstats``, ``stacks.folded``, ``memory.snapshot``
+    and a ``profile.json`` summary to ``output_dir`` and returns the summary.
+    Only one profile runs per process at a time.
+    """
+
+    def __init__(self, output_dir: str, sample_interval_ms: float = DEFAULT_SAMPLE_INTERVAL_MS):
+        # Só carregados quando há perfil, para não pesar na inicialização do bridge
+        import cProfile
+        self.output_dir = output_dir
+        self.timings = StageTimings()
+        self._profile = cProfile.Profile()
+        self._sampler = StackSampler(sample_interval_ms)
+        self._tracing_memory = False
+        self._started = 0.0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional["Profiler"]:
+        """A profiler for ``config["profile"]``, or ``None`` when profiling is off."""
+        if not config.get("profile"):
+            return None
+        run_dir = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        return cls(os.path.join(config.get("profile_dir") or DEFAULT_PROFILE_DIR, run_dir),
+                   float(config.get("profile_sample_interval_ms", DEFAULT_SAMPLE_INTERVAL_MS)))
+
+    def start(self):
+        import tracemalloc
+        global _active
+        with _active_lock:
+            if _active is not None:
+                raise ValueError("Já existe um perfil em andamento neste processo")
+            _active = self
+        # Se outra ferramenta já rastreia a memória, só lemos dela
+        self._tracing_memory = not tracemalloc.is_tracing()
+        if self._tracing_memory:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self._sampler.start()
+        self._started = time.perf_counter()
+        self._profile.enable()
+
+    def stop(self) -> Dict[str, Any]:
+        import tracemalloc
+        global _active
+        self._profile.disable()
+        wall_ms = (time.perf_counter() - self._started) * 1000
+        self._sampler.stop()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        if self._tracing_memory:
+            tracemalloc.stop()
+        with _active_lock:
+            _active = None
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        files = {name: os.path.join(self.output_dir, name)
+                 for name in ("profile.pstats", "stacks.folded", "memory.snapshot", "profile.json")}
+        self._profile.dump_stats(files["profile.pstats"])
+        with open(files["stacks.folded"], "w", encoding="utf-8") as f:
+            f.write(self._sampler.collapsed())
+        snapshot.dump(files["memory.snapshot"])
+
+        report = {
+            "wall_ms": round(wall_ms, 3),
+            "stages": self.timings.summary(),
+            "functions": self._top_functions(),
+            "memory": {"peak_kb": round(peak / 1024, 1), "top": _top_allocations(snapshot)},
+            "samples": sum(self._sampler.samples.values()),
+            "files": files,
+        }
+        with open(files["profile.json"], "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        return report
+
+    def _top_functions(self) -> List[Dict[str, Any]]:
+        import pstats
+        stats = pstats.Stats(self._profile).stats
+        ranked = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:TOP_ENTRIES]
+        return [{"function": f"{name} ({os.path.basename(filename)}:{line})", "calls": calls,
+                 "own_ms": round(own * 1000, 3), "cumulative_ms": round(cumulative * 1000, 3)}
+                for (filename, line, name), (_, calls, own, cumulative, _) in ranked]
+
+def _top_allocations(snapshot: "tracemalloc.Snapshot") -> List[Dict[str, Any]]:
+    import tracemalloc
+    ignored = (tracemalloc.Filter(False, tracemalloc.__file__),
+               tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"))
+    statistics = snapshot.filter_traces(ignored).statistics("lineno")[:TOP_ENTRIES]
+    return [{"location": f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+             "size_kb": round(stat.size / 1024, 1), "count": stat.count}
+            for stat in statistics]
@@ -0,0 +1,66 @@
+import os
+from typing import Any, Dict, List, Optional
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+# Orçamento de saída por tipo de chamada (os valores fixos usados antes do roteamento)
+DEFAULT_MAX_TOKENS = {
+    "listen": 4000,
+    "scenario": 2000,
+    "structured_scenario": 1200,
+    "summary": 300,
+    "traits": 100,
+}
+# Cenários com mais passos do que isso ganham mais tokens de saída, até o teto
+SCENARIO_BASE_STEPS = 5
+DEFAULT_TOKENS_PER_STEP = 150
+DEFAULT_MAX_SCENARIO_TOKENS = 4000
+DEFAULT_CASCADE_MIN_CHARS = 20
+
+class ModelRouter:
+    """Picks the model and output budget of each TinyPerson call.
+
+    The model of a call type comes from ``models[call_type]``, then
+    ``model`` (the Node config), then ``OPENAI_MODEL``. Scenario budgets grow
+    by ``tokens_per_step`` for each step past ``SCENARIO_BASE_STEPS``, up to
+    ``max_scenario_tokens``. With ``cascade`` set, scenario interactions try
+    those models in order, escalating when a response fails validation.
+    """
+
+    def __init__(self, model: Optional[str] = None, models: Optional[Dict[str, str]] = None,
+                 max_tokens: Optional[Dict[str, int]] = None, tokens_per_step: int = DEFAULT_TOKENS_PER_STEP,
+                 max_scenario_tokens: int = DEFAULT_MAX_SCENARIO_TOKENS, cascade: Optional[List[str]] = None,
+                 cascade_min_chars: int = DEFAULT_CASCADE_MIN_CHARS):
+        self.model = model or os.getenv("OPENAI_MODEL") or DEFAULT_MODEL
+        self.models = dict(models or {})
+        self.max_tokens = {**DEFAULT_MAX_TOKENS, **(max_tokens or {})}
+        self.tokens_per_step = tokens_per_step
+        self.max_scenario_tokens = max_scenario_tokens
+        self.cascade = list(cascade or [])
+        self.cascade_min_chars = cascade_min_chars
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "ModelRouter":
+        return cls(
+            model=config.get("model"),
+            models=config.get("models"),
+            max_tokens={call_type: int(value) for call_type, value in (config.get("max_tokens") or {}).items()},
+            tokens_per_step=int(config.get("scenario_tokens_per_step", DEFAULT_TOKENS_PER_STEP)),
+            max_scenario_tokens=int(config.get("max_scenario_tokens", DEFAULT_MAX_SCENARIO_TOKENS)),
+            cascade=config.get("cascade_models"),
+            cascade_min_chars=int(config.get("cascade_min_chars", DEFAULT_CASCADE_MIN_CHARS))
+        )
+
+    def model_for(self, call_type: str) -> str:
+        return self.models.get(call_type, self.model)
+
+    def max_tokens_for(self, call_type: str, steps: int = 0) -> int:
+        budget = self.max_tokens[call_type]
+        if call_type in ("scenario", "structured_scenario") and steps > SCENARIO_BASE_STEPS:
+            budget = max(budget, min(self.max_scenario_tokens,
+                                     budget + (steps - SCENARIO_BASE_STEPS) * self.tokens_per_step))
+        return budget
+
+    def scenario_models(self) -> List[str]:
+        """Models to try, in order, for a scenario interaction."""
+        return self.cascade or [self.model_for("scenario")]
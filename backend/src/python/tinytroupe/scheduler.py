@@ -0,0 +1,229 @@
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+# Caracteres por token usados na estimativa (aproximação da OpenAI para inglês)
+CHARS_PER_TOKEN = 4
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_SECONDS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """Parse x-ratelimit-reset-* values such as ``"6m0s"``, ``"1.5s"`` or ``"20ms"``."""
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(amount) * _DURATION_SECONDS[unit] for amount, unit in parts)
+
+def estimate_tokens(params: Dict[str, Any]) -> int:
+    """Estimate the tokens a request will consume: rendered prompt plus max output."""
+    chars = 0
+    for message in params.get("messages", []):
+        content = message.get("content") or ""
+        chars += len(content) if isinstance(content, str) else len(str(content))
+    # Requisições de embeddings trazem o texto em "input"
+    for text in params.get("input") or []:
+        chars += len(text)
+    return chars // CHARS_PER_TOKEN + len(params.get("messages", [])) * 4 + int(params.get("max_tokens") or 0)
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously over a one minute window."""
+
+    def __init__(self, per_minute: Optional[float] = None):
+        self.capacity = per_minute
+        self.level = per_minute
+        self.updated_at = time.monotonic()
+        self._condition = threading.Condition()
+
+    def acquire(self, amount: float):
+        """Block until ``amount`` is available, then take it. No-op while unlimited."""
+        with self._condition:
+            while True:
+                self._refill()
+                if self.capacity is None:
+                    return
+                amount = min(amount, self.capacity)
+                if self.level >= amount:
+                    self.level -= amount
+                    return
+                rate = self.capacity / 60.0
+                self._condition.wait((amount - self.level) / rate)
+
+    def give_back(self, amount: float):
+        with self._condition:
+            if self.capacity is None:
+                return
+            self._refill()
+            self.level = min(self.capacity, self.level + amount)
+            self._condition.notify_all()
+
+    def observe(self, limit: Optional[float], remaining: Optional[float]):
+        """Adapt to the limit and remaining budget reported by the API."""
+        with self._condition:
+            self._refill()
+            if limit:
+                self.capacity = limit
+                if self.level is None:
+                    self.level = limit
+            if remaining is not None and self.capacity is not None:
+                self.level = min(self.level, remaining)
+            self._condition.notify_all()
+
+    def drain(self, seconds: float):
+        """Empty the bucket so nothing is sent for roughly ``seconds``."""
+        with self._condition:
+            if self.capacity is None:
+                return
+            self._refill()
+            self.level = min(self.level, -self.capacity / 60.0 * seconds)
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.capacity is not None:
+            self.level = min(self.capacity, self.level + (now - self.updated_at) * self.capacity / 60.0)
+        self.updated_at = now
+
+class ModelLimits:
+    """Request and token budgets for one model.
+
+    ``share`` is the fraction of the account's limits this process may use;
+    it scales the budgets reported in the rate-limit headers, which always
+    describe the whole account.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float], tokens_per_minute: Optional[float],
+                 share: float = 1.0):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.share = share
+
+    def observe(self, headers: Mapping[str, str]):
+        self.requests.observe(self._scaled(headers, "x-ratelimit-limit-requests"),
+                              self._scaled(headers, "x-ratelimit-remaining-requests"))
+        self.tokens.observe(self._scaled(headers, "x-ratelimit-limit-tokens"),
+                            self._scaled(headers, "x-ratelimit-remaining-tokens"))
+
+    def _scaled(self, headers: Mapping[str, str], name: str) -> Optional[float]:
+        value = _header_float(headers, name)
+        return None if value is None else value * self.share
+
+    def back_off(self, seconds: float):
+        self.requests.drain(seconds)
+        self.tokens.drain(seconds)
+
+class RequestScheduler:
+    """Central gate for chat completion calls.
+
+    Holds per-model request/token budgets (seeded from the config and adapted
+    from ``x-ratelimit-*`` headers) and retries 429, 5xx and connection errors
+    with jittered exponential backoff, so interactions are delayed rather than
+    dropped.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 max_retries: int = 6, base_delay: float = 1.0, max_delay: float = 60.0, share: float = 1.0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.share = share
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._limits: Dict[str, ModelLimits] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "RequestScheduler":
+        """Budgets from rate_limit_rpm/rate_limit_tpm, scaled by ``rate_limit_share`` (set per shard)."""
+        share = float(config.get("rate_limit_share", 1.0))
+        rpm, tpm = config.get("rate_limit_rpm"), config.get("rate_limit_tpm")
+        return cls(
+            requests_per_minute=None if rpm is None else rpm * share,
+            tokens_per_minute=None if tpm is None else tpm * share,
+            max_retries=int(config.get("max_retries", 6)),
+            base_delay=float(config.get("retry_base_delay", 1.0)),
+            max_delay=float(config.get("retry_max_delay", 60.0)),
+            share=share
+        )
+
+    def settings(self) -> Tuple[Any, ...]:
+        """Budgets and retry policy; schedulers with equal settings are interchangeable."""
+        return (self.requests_per_minute, self.tokens_per_minute, self.max_retries, self.base_delay, self.max_delay,
+                self.share)
+
+    def limits_for(self, model: str) -> ModelLimits:
+        with self._lock:
+            if model not in self._limits:
+                self._limits[model] = ModelLimits(self.requests_per_minute, self.tokens_per_minute, self.share)
+            return self._limits[model]
+
+    def execute(self, params: Dict[str, Any], call: Callable[[Dict[str, Any]], Any]) -> Tuple[Any, int]:
+        """Run ``call(params)`` within the model's budget.
+
+        ``call`` must return a raw response (``with_raw_response``) so the
+        rate-limit headers can be read. Returns the parsed response and the
+        number of retries it took.
+        """
+        # Importado só aqui: quem chega até este ponto já carregou o cliente OpenAI
+        import openai
+
+        limits = self.limits_for(params["model"])
+        estimate = estimate_tokens(params)
+
+        # Os tokens são reservados uma vez; cada tentativa só consome uma requisição
+        limits.tokens.acquire(estimate)
+        try:
+            for attempt in range(self.max_retries + 1):
+                limits.requests.acquire(1)
+                try:
+                    raw = call(params)
+                except (openai.RateLimitError, openai.InternalServerError,
+                        openai.APIConnectionError) as e:
+                    headers = e.response.headers if getattr(e, "response", None) is not None else {}
+                    limits.observe(headers)
+                    if attempt == self.max_retries:
+                        raise
+                    delay = self._backoff(attempt, headers)
+                    if isinstance(e, openai.RateLimitError):
+                        limits.back_off(delay)
+                    time.sleep(delay)
+                    continue
+
+                limits.observe(raw.headers)
+                response = raw.parse()
+                break
+        except BaseException:
+            # Nenhuma tentativa foi atendida: a reserva volta inteira para o balde
+            limits.tokens.give_back(estimate)
+            raise
+
+        usage = getattr(response, "usage", None)
+        if usage is not None and getattr(usage, "total_tokens", None) is not None:
+            # Devolve ao balde a diferença entre a estimativa e o consumo real
+            limits.tokens.give_back(estimate - usage.total_tokens)
+        return response, attempt
+
+    def _backoff(self, attempt: int, headers: Mapping[str, str]) -> float:
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        retry_after = _header_float(headers, "retry-after-ms")
+        if retry_after is not None:
+            retry_after /= 1000.0
+        else:
+            retry_after = parse_reset_duration(headers.get("retry-after"))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+def _header_float(headers: Mapping[str, str], name: str) -> Optional[float]:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
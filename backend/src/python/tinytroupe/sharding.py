@@ -0,0 +1,138 @@
+import json
+import os
+import queue
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from log import get_logger
+
+logger = get_logger("sharding")
+DEFAULT_SHARD_QUEUE = "tinytroupe:shards"
+# Tempo de espera de cada leitura de eventos antes de verificar falhas e o timeout geral
+POLL_SECONDS = 0.5
+
+class ShardError(RuntimeError):
+    pass
+
+def split_shards(items: List[Any], count: int) -> List[List[Any]]:
+    """Split ``items`` into at most ``count`` contiguous, non-empty chunks of near-equal size."""
+    count = max(1, min(count, len(items)))
+    size, extra = divmod(len(items), count)
+    chunks, start = [], 0
+    for index in range(count):
+        end = start + size + (1 if index < extra else 0)
+        chunks.append(items[start:end])
+        start = end
+    return [chunk for chunk in chunks if chunk]
+
+def _run_shard(shard: Dict[str, Any], send: Callable[[Dict[str, Any]], None]):
+    """Run one shard and report its events, always ending with a ``done`` event."""
+    # bridge importa este módulo; a importação aqui só acontece no worker
+    from bridge import execute_shard
+    try:
+        execute_shard(shard, send)
+        send({"type": "done", "shard": shard["shard"]})
+    except Exception as e:
+        send({"type": "done", "shard": shard["shard"], "error": str(e)})
+
+_worker_queue = None
+
+def _init_local_worker(events: Any):
+    global _worker_queue
+    _worker_queue = events
+
+def _run_local_shard(shard: Dict[str, Any]):
+    _run_shard(shard, _worker_queue.put)
+
+class LocalShardRunner:
+    """Runs shards on a pool of local processes, one interpreter per core."""
+
+    def __init__(self, workers: Optional[int] = None, start_method: str = "spawn",
+                 timeout: Optional[float] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.start_method = start_method
+        self.timeout = timeout
+
+    def run(self, shards: List[Dict[str, Any]], on_event: Callable[[Dict[str, Any]], None]):
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        context = multiprocessing.get_context(self.start_method)
+        events = context.Queue()
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(shards)), mp_context=context,
+                                 initializer=_init_local_worker, initargs=(events,)) as executor:
+            futures = [executor.submit(_run_local_shard, shard) for shard in shards]
+
+            def next_event() -> Optional[Dict[str, Any]]:
+                try:
+                    return events.get(timeout=POLL_SECONDS)
+                except queue.Empty:
+                    for future in futures:
+                        if future.done() and future.exception() is not None:
+                            raise ShardError(f"Processo de shard falhou: {future.exception()}")
+                    return None
+
+            _collect(len(shards), next_event, on_event, self.timeout)
+
+class RedisShardRunner:
+    """Publishes shards to a Redis list consumed by ``serve_shards`` workers on any host.
+
+    Workers push their events to a per-run list, which is read back here.
+    ``redis`` is imported on first use.
+    """
+
+    def __init__(self, redis_url: str, queue_name: str = DEFAULT_SHARD_QUEUE, timeout: Optional[float] = None):
+        self.redis_url = redis_url
+        self.queue_name = queue_name
+        self.timeout = timeout
+
+    def run(self, shards: List[Dict[str, Any]], on_event: Callable[[Dict[str, Any]], None]):
+        client = _redis_client(self.redis_url)
+        run_id = uuid.uuid4().hex
+        events_key = f"{self.queue_name}:events:{run_id}"
+        client.rpush(self.queue_name, *[json.dumps({**shard, "events_key": events_key}) for shard in shards])
+
+        def next_event() -> Optional[Dict[str, Any]]:
+            item = client.blpop([events_key], timeout=1)
+            return json.loads(item[1]) if item else None
+
+        try:
+            _collect(len(shards), next_event, on_event, self.timeout)
+        finally:
+            client.delete(events_key)
+
+def serve_shards(redis_url: str, queue_name: str = DEFAULT_SHARD_QUEUE, max_shards: Optional[int] = None):
+    """Worker loop: take shards from Redis, run them and push their events back."""
+    client = _redis_client(redis_url)
+    served = 0
+    while max_shards is None or served < max_shards:
+        item = client.blpop([queue_name], timeout=5)
+        if item is None:
+            continue
+        shard = json.loads(item[1])
+        logger.info("Executando shard %s (%d personas)", shard["shard"], len(shard["people"]))
+        _run_shard(shard, lambda event: client.rpush(shard["events_key"], json.dumps(event)))
+        served += 1
+
+def _collect(shard_count: int, next_event: Callable[[], Optional[Dict[str, Any]]],
+             on_event: Callable[[Dict[str, Any]], None], timeout: Optional[float]):
+    """Feed events to ``on_event`` until every shard has reported ``done``."""
+    started = time.monotonic()
+    done = 0
+    while done < shard_count:
+        if timeout is not None and time.monotonic() - started > timeout:
+            raise ShardError(f"Shards não terminaram em {timeout}s")
+        event = next_event()
+        if event is None:
+            continue
+        if event["type"] == "done":
+            done += 1
+            if event.get("error"):
+                raise ShardError(f"Shard {event['shard']} falhou: {event['error']}")
+            continue
+        on_event(event)
+
+def _redis_client(redis_url: str):
+    import redis
+    return redis.Redis.from_url(redis_url)
@@ -0,0 +1,25 @@
+"""Benchmarks are opt-in: they run with ``--benchmark-only`` or ``RUN_BENCHMARKS=1``.
+
+A plain ``pytest`` run collects them but skips them, so the regular suite
+stays fast.
+"""
+import os
+
+import pytest
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.getenv("RUN_BENCHMARKS") == "1" or config.getoption("benchmark_only", default=False):
+        return
+    skip = pytest.mark.skip(reason="benchmark: rode com --benchmark-only ou RUN_BENCHMARKS=1")
+    for item in items:
+        if str(item.fspath).startswith(BENCHMARKS_DIR):
+            item.add_marker(skip)
+
+
+def mean_seconds(benchmark, fallback: float) -> float:
+    """Mean round time, or ``fallback`` when pytest-benchmark isn't collecting stats (``--benchmark-disable``)."""
+    stats = getattr(benchmark, "stats", None)
+    return stats.stats.mean if stats is not None else fallback
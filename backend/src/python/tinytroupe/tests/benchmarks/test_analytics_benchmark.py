@@ -0,0 +1,86 @@
+"""Sentiment scoring of 10k ~1 KB responses.
+
+Run with ``pytest tests/benchmarks --benchmark-only``. ``SENTIMENT_RESPONSES``
+changes the batch size. ``extra_info`` compares the batch scorer with the
+20-word substring loop it replaced and with ``score`` called per response.
+"""
+import os
+import random
+import time
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("numpy")
+
+import analytics
+from conftest import mean_seconds
+
+RESPONSES = int(os.getenv("SENTIMENT_RESPONSES", "10000"))
+FILLER = ("the checkout flow is quite and i think that it would be for my team when we use this product "
+          "every day with some issues around layout").split()
+
+
+def synthetic_responses(count, lexicon):
+    rng = random.Random(0)
+    words = list(lexicon["positive"] + lexicon["negative"] + lexicon["negators"])
+    responses = []
+    for _ in range(count):
+        parts, size = [], 0
+        while size < 1000:
+            word = rng.choice(words) if rng.random() < 0.04 else rng.choice(FILLER)
+            if rng.random() < 0.08:
+                word += rng.choice(".,!")
+            parts.append(word)
+            size += len(word) + 1
+        responses.append(" ".join(parts))
+    return responses
+
+
+# Palavras do antigo _analyze_sentiment do mock, antes dos léxicos
+KEYWORDS_POSITIVE = ("great", "excellent", "good", "like", "love", "useful", "helpful", "amazing",
+                     "fantastic", "positive")
+KEYWORDS_NEGATIVE = ("bad", "poor", "dislike", "hate", "useless", "unhelpful", "terrible", "negative",
+                     "awful", "confusing")
+
+
+def keyword_scores(texts):
+    """Pre-lexicon scorer: 20 substring counts, no word boundaries or negation."""
+    scores = []
+    for text in texts:
+        text = text.lower()
+        positive = sum(1 for word in KEYWORDS_POSITIVE if word in text)
+        negative = sum(1 for word in KEYWORDS_NEGATIVE if word in text)
+        scores.append(analytics._ratio(positive, negative))
+    return scores
+
+
+def per_text_scores(texts, analyzer):
+    return [analyzer.score(text) for text in texts]
+
+
+def per_response_us(scorer, texts, *args):
+    started = time.perf_counter()
+    scorer(texts, *args)
+    return (time.perf_counter() - started) / len(texts) * 1e6
+
+
+def test_score_batch_throughput(benchmark):
+    lexicon = analytics.LEXICONS["en"]
+    analyzer = analytics.get_analyzer("en")
+    texts = synthetic_responses(RESPONSES, lexicon)
+
+    started = time.perf_counter()
+    scores = benchmark.pedantic(analyzer.score_batch, args=(texts,), rounds=3, iterations=1,
+                                warmup_rounds=1)
+    elapsed = time.perf_counter() - started
+
+    assert len(scores) == RESPONSES
+    analyzer_us = mean_seconds(benchmark, elapsed / 3) / RESPONSES * 1e6
+    keyword_us = per_response_us(keyword_scores, texts)
+    benchmark.extra_info.update({
+        "us_per_response": round(analyzer_us, 2),
+        "keyword_us_per_response": round(keyword_us, 2),
+        "per_text_us_per_response": round(per_response_us(per_text_scores, texts, analyzer), 2),
+    })
+    assert analyzer_us * 10 <= keyword_us
@@ -0,0 +1,60 @@
+"""Memory and build time of a 100k-persona population, columnar vs ``TinyPerson`` objects.
+
+Run with ``pytest tests/benchmarks --benchmark-only``. ``POPULATION_SIZE``
+changes the number of personas.
+"""
+import os
+import random
+import tracemalloc
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from personas import person_from_dict
+from population import PersonaPopulation
+
+POPULATION_SIZE = int(os.getenv("POPULATION_SIZE", "100000"))
+OCCUPATIONS = ["Designer", "Engineer", "Teacher", "Nurse", "Lawyer", "Farmer", "Student", "Retired"]
+VOCABULARY = [f"word {i}" for i in range(300)]
+
+
+def synthetic_personas(count):
+    rng = random.Random(0)
+    for index in range(count):
+        yield {"id": str(index), "name": f"Persona {index}", "age": rng.randint(18, 90),
+               "occupation": rng.choice(OCCUPATIONS), "background": "Synthetic background",
+               "interests": rng.sample(VOCABULARY, 3), "traits": rng.sample(VOCABULARY, 4),
+               "skills": rng.sample(VOCABULARY, 2), "goals": rng.sample(VOCABULARY, 1)}
+
+
+def peak_memory(build):
+    tracemalloc.start()
+    kept = build()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return peak
+
+
+@pytest.mark.parametrize("store", ["columnar", "tiny_person"])
+def test_population_build(benchmark, store):
+    if store == "columnar":
+        build = lambda: PersonaPopulation.from_personas(synthetic_personas(POPULATION_SIZE))
+    else:
+        build = lambda: [person_from_dict(persona) for persona in synthetic_personas(POPULATION_SIZE)]
+
+    benchmark.pedantic(build, rounds=1, iterations=1)
+
+    benchmark.extra_info.update({"personas": POPULATION_SIZE,
+                                 "peak_memory_mb": round(peak_memory(build) / 2 ** 20, 1)})
+
+
+def test_population_filter_and_sample(benchmark):
+    population = PersonaPopulation.from_personas(synthetic_personas(POPULATION_SIZE))
+
+    filters = {"age_min": 25, "age_max": 40, "occupations": ["Designer", "Engineer"]}
+    selected = benchmark(population.sample, 1000, seed=0, **filters)
+
+    # Populações pequenas (POPULATION_SIZE) podem ter menos de 1000 personas no filtro
+    assert len(selected) == min(1000, len(population.select(**filters)))
@@ -0,0 +1,94 @@
+"""Throughput and per-interaction latency of the bridge, with the LLM replaced by ``SyntheticBackend``.
+
+Run with ``pytest tests/benchmarks --benchmark-only``. Set
+``BENCH_LATENCY_MS`` to add a synthetic per-call latency; at the default of
+0 the numbers are the bridge's own overhead. Latency percentiles are timed
+per interaction, from the start of ``TinyWorld.interact`` until the result
+has been recorded and sent.
+"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import bridge
+import mock
+from backends import SyntheticBackend
+from conftest import mean_seconds
+from mock import TinyWorld
+from usage import percentile
+
+LATENCY_MS = float(os.getenv("BENCH_LATENCY_MS", "0"))
+MAX_CONCURRENCY = int(os.getenv("BENCH_MAX_CONCURRENCY", "8"))
+
+
+@pytest.fixture
+def synthetic_backend(monkeypatch):
+    monkeypatch.setattr(mock, "_cache", None)
+    monkeypatch.setattr(mock, "_backend", SyntheticBackend(latency_ms=LATENCY_MS, seed=0))
+
+
+@pytest.fixture
+def interaction_latencies(monkeypatch):
+    """Time every interaction end to end: interact, parse, record and emit."""
+    latencies_ms = []
+    started = threading.local()
+    interact, emit = TinyWorld.interact, bridge.emit
+
+    def timed_interact(self, *args, **kwargs):
+        started.at = time.perf_counter()
+        return interact(self, *args, **kwargs)
+
+    def timed_emit(payload, framed=False):
+        emit(payload, framed)
+        # O progresso é o último envio de cada interação, na thread que a executou
+        at = getattr(started, "at", None)
+        if framed and at is not None and payload.get("type") == "test_update":
+            latencies_ms.append((time.perf_counter() - at) * 1000)
+            started.at = None
+
+    monkeypatch.setattr(TinyWorld, "interact", timed_interact)
+    monkeypatch.setattr(bridge, "emit", timed_emit)
+    return latencies_ms
+
+
+@pytest.mark.parametrize("scenario_count", [1, 10, 50])
+@pytest.mark.parametrize("persona_count", [1, 10, 100])
+def test_run_simulation_throughput(benchmark, synthetic_backend, interaction_latencies, capsys,
+                                   persona_count, scenario_count):
+    test = json.dumps({"scenarios": [{"description": f"Scenario {i}", "steps": ["open", "decide"]}
+                                     for i in range(scenario_count)]})
+    personas = json.dumps([str(i) for i in range(persona_count)])
+    config = {"max_concurrency": MAX_CONCURRENCY}
+
+    def run():
+        result = bridge.run_simulation(test, personas, config)
+        capsys.readouterr()
+        return result
+
+    result = benchmark.pedantic(run, rounds=3, iterations=1, warmup_rounds=1)
+
+    interaction_latencies.clear()
+    tracemalloc.start()
+    started = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - started
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    interactions = persona_count * scenario_count
+    assert result["progress"]["completed_interactions"] == interactions
+    assert len(interaction_latencies) == interactions
+    latencies = sorted(interaction_latencies)
+    benchmark.extra_info.update({
+        "interactions": interactions,
+        "interactions_per_sec": round(interactions / mean_seconds(benchmark, elapsed), 1),
+        "peak_memory_kb": round(peak_bytes / 1024, 1),
+        "interaction_latency_ms": {name: round(percentile(latencies, q), 3)
+                                   for name, q in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99))},
+    })
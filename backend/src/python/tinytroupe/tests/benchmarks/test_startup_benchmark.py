@@ -0,0 +1,61 @@
+"""Start-up cost of ``bridge.py`` per mode, measured in a fresh interpreter.
+
+Run with ``pytest tests/benchmarks --benchmark-only``. Each mode runs
+``python -X importtime bridge.py ...``; the wall time is benchmarked and the
+total import time and whether ``openai`` was loaded go in ``extra_info``.
+"""
+import json
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+BRIDGE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "bridge.py")
+SYNTHETIC_CONFIG = json.dumps({"api_key": "sk-bench", "llm_backend": "synthetic", "cache_enabled": False,
+                               "checkpoint_enabled": False})
+TEST = json.dumps({"scenarios": [{"description": "Checkout", "steps": ["open", "pay"]}]})
+# "import time: self | cumulative | módulo"; os imports de topo têm um único espaço antes do nome
+IMPORT_LINE = re.compile(r"^import time:\s+\d+ \|\s+(\d+) \|( +)(\S+)$")
+
+MODES = {
+    "create_person": ["--create-person", "--persona", json.dumps({"name": "Ana", "age": 41})],
+    "validate": ["--validate", "--test", TEST, "--personas", json.dumps(["1", "2"])],
+    "generate_traits": ["--generate-traits", "--base-persona", json.dumps({"name": "Ana"}),
+                        "--config", SYNTHETIC_CONFIG],
+    "run_simulation": ["--test", TEST, "--personas", json.dumps(["1", "2"]), "--config", SYNTHETIC_CONFIG],
+}
+# Modos que não falam com a API não devem carregar o SDK da OpenAI
+LIGHT_MODES = ("create_person", "validate")
+
+
+def run_bridge(args):
+    """Run the bridge once; returns the cumulative import time (µs) of top-level imports and every module loaded."""
+    completed = subprocess.run([sys.executable, "-X", "importtime", BRIDGE, *args],
+                               capture_output=True, text=True, timeout=60)
+    assert completed.returncode == 0, completed.stderr[-2000:]
+    top_level, modules = 0, set()
+    for line in completed.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            modules.add(match.group(3))
+            if len(match.group(2)) == 1:
+                top_level += int(match.group(1))
+    return top_level, modules
+
+
+@pytest.mark.parametrize("mode", list(MODES))
+def test_bridge_startup(benchmark, mode):
+    import_us, modules = benchmark.pedantic(run_bridge, args=(MODES[mode],), rounds=3, iterations=1)
+
+    loaded_openai = "openai" in modules
+    if mode in LIGHT_MODES:
+        assert not loaded_openai
+    benchmark.extra_info.update({
+        "import_ms": round(import_us / 1000, 1),
+        "modules": len(modules),
+        "loaded_openai": loaded_openai,
+    })
@@ -0,0 +1,26 @@
+import os
+import sys
+
+# bridge.py e mock.py são executados como scripts, então os testes importam
+# os módulos diretamente a partir do diretório pai.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _checkpoint_dir(tmp_path, monkeypatch):
+    """Keep checkpoint logs written by simulations out of the source tree."""
+    import checkpoint
+    monkeypatch.setattr(checkpoint, "DEFAULT_CHECKPOINT_DIR", str(tmp_path / "checkpoints"))
+
+
+@pytest.fixture(autouse=True)
+def _restore_api_key():
+    """setup_config exports the configured api_key; don't let it leak into later tests."""
+    original = os.environ.get("OPENAI_API_KEY")
+    yield
+    if original is None:
+        os.environ.pop("OPENAI_API_KEY", None)
+    else:
+        os.environ["OPENAI_API_KEY"] = original
@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Optional
+
+
+def make_completion(content: str, usage: Optional[Dict[str, int]] = None) -> Any:
+    message = SimpleNamespace(content=content)
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=message, finish_reason="stop")],
+        usage=SimpleNamespace(**usage) if usage else None
+    )
+
+
+def make_stream(content: str, chunk_size: int = 8) -> Any:
+    chunks = [
+        SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content[i:i + chunk_size]))])
+        for i in range(0, len(content), chunk_size)
+    ]
+    return iter(chunks + [SimpleNamespace(choices=[], usage=None)])
+
+
+class FakeRawResponse:
+    def __init__(self, parsed: Any, headers: Optional[Dict[str, str]] = None):
+        self.headers = headers or {}
+        self._parsed = parsed
+
+    def parse(self) -> Any:
+        return self._parsed
+
+
+class FakeChatClient:
+    """Minimal stand-in for ``openai.OpenAI`` answering with ``responder(params) -> str``."""
+
+    def __init__(self, responder: Callable[[Dict[str, Any]], str], headers: Optional[Dict[str, str]] = None,
+                 usage: Optional[Dict[str, Any]] = None):
+        self.responder = responder
+        self.headers = headers or {}
+        self.usage = usage
+        self.calls = []
+        raw = SimpleNamespace(create=self._create_raw)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create, with_raw_response=raw))
+
+    def _create(self, **params):
+        self.calls.append(params)
+        content = self.responder(params)
+        if params.get("stream"):
+            return make_stream(content)
+        return make_completion(content, self.usage)
+
+    def _create_raw(self, **params):
+        return FakeRawResponse(self._create(**params), self.headers)
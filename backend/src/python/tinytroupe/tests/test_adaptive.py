@@ -0,0 +1,77 @@
+import json
+
+import bridge
+from adaptive import AdaptiveSampler
+from mock import TinyPerson
+
+
+def _result(sentiment, key_points=("price",)):
+    return {"type": "message", "content": "", "metadata": {"sentiment": sentiment, "keyPoints": list(key_points)}}
+
+
+def _drain(sampler, responder, runs=None):
+    runs = [] if runs is None else runs
+    while True:
+        pairs = sampler.next_round()
+        if not pairs:
+            return runs
+        for scenario_index, position in pairs:
+            runs.append((scenario_index, position))
+            sampler.observe(scenario_index, responder(scenario_index, position))
+
+
+def test_stable_scenario_stops_early_and_reports_skipped_pairs():
+    sampler = AdaptiveSampler(1, 50, round_size=4, margin=0.1, min_samples=5)
+    runs = _drain(sampler, lambda s, p: _result(0.5))
+
+    assert 5 <= len(runs) < 50
+    [entry] = sampler.skipped()
+    assert entry["reason"] == "converged"
+    assert len(entry["personaIndexes"]) == 50 - len(runs)
+    assert not {p for _, p in runs} & set(entry["personaIndexes"])
+    assert entry["stats"]["sentimentMean"] == 0.5
+
+
+def test_budget_goes_to_high_variance_scenario():
+    sampler = AdaptiveSampler(2, 40, round_size=4, margin=0.05, min_samples=4, budget=40)
+    runs = _drain(sampler, lambda s, p: _result(0.2 if s == 0 else (1.0 if p % 2 else -1.0)))
+
+    per_scenario = [sum(1 for s, _ in runs if s == index) for index in range(2)]
+    assert sum(per_scenario) == 40
+    assert per_scenario[1] > per_scenario[0]
+    reasons = {entry["scenarioIndex"]: entry["reason"] for entry in sampler.skipped()}
+    assert reasons == {0: "converged", 1: "budget_exhausted"}
+
+
+def test_changing_key_points_delay_convergence():
+    # Cada resposta traz um tema novo que passa a dominar a distribuição
+    sampler = AdaptiveSampler(1, 30, round_size=3, margin=0.5, min_samples=3)
+    runs = []
+    _drain(sampler, lambda s, p: _result(0.0, [f"topic {len(runs)}"] * len(runs)), runs)
+
+    assert len(runs) == 30
+    assert sampler.skipped() == []
+
+
+def test_run_simulation_adaptive(monkeypatch):
+    calls = []
+
+    def fake_interact(self, scenario, on_delta=None, structured=False):
+        calls.append((scenario["id"], self.name))
+        return {"type": "message", "content": "ok", "personaId": self.name,
+                "metadata": {"sentiment": 0.3, "keyPoints": ["ok"]}}
+
+    monkeypatch.setattr(TinyPerson, "interact_with_scenario", fake_interact)
+
+    test = {"id": "adaptive", "scenarios": [{"id": "s0"}, {"id": "s1"}]}
+    config = {"adaptive": True, "adaptive_min_samples": 4, "max_concurrency": 2}
+    result = bridge.run_simulation(json.dumps(test), json.dumps([str(i) for i in range(30)]), config)
+
+    assert len(calls) < 60
+    assert len(result["skipped"]) == 2
+    for entry, scenario_result in zip(result["skipped"], result["results"]):
+        answered = {r["personaId"] for r in scenario_result["responses"]}
+        assert entry["reason"] == "converged"
+        assert entry["personaIds"] == [str(i) for i in entry["personaIndexes"]]
+        assert not answered & {f"Persona_{i}" for i in entry["personaIndexes"]}
+    assert result["progress"]["completed_interactions"] + result["progress"]["skipped_interactions"] == 60
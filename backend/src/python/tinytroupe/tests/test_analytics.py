@@ -0,0 +1,59 @@
+import analytics
+import mock
+
+
+def test_matches_whole_words_only():
+    analyzer = analytics.get_analyzer("en")
+
+    assert analyzer.score("I like it") == 1.0
+    assert analyzer.score("This is unlikely to be badly received") == 0.0
+
+
+def test_negation_flips_polarity_within_the_clause():
+    analyzer = analytics.get_analyzer("en")
+
+    assert analyzer.score("It is not good") == -1.0
+    assert analyzer.score("I don't think it's bad") == 1.0
+    assert analyzer.score("Not now. The layout is good") == 1.0
+    assert analyzer.score("Not bad, but confusing") == 0.0
+
+
+def test_language_selects_the_lexicon():
+    assert analytics.normalize_language("pt-BR") == "pt"
+    assert analytics.normalize_language("fr") == analytics.DEFAULT_LANGUAGE
+
+    assert analytics.score_batch(["Não gostei, achei confuso", "Ótimo, muito fácil"], language="pt") == [-1.0, 1.0]
+    assert analytics.score_batch(["No es malo"], language="es") == [1.0]
+
+
+def test_score_batch_matches_single_scores():
+    analyzer = analytics.get_analyzer("en")
+    texts = ["good", "", "not good\nbad", "awful. never useful", "great and useful but slow"]
+
+    assert analyzer.score_batch(texts) == [analyzer.score(text) for text in texts]
+    assert analyzer.score_batch([]) == []
+
+
+def test_score_batch_matches_single_scores_on_mixed_text():
+    # Com NumPy instalado, score_batch usa outro caminho; ele precisa dar exatamente o mesmo resultado
+    import random
+
+    rng = random.Random(0)
+    words = ["Good", "NOT", "bad", "don't", "don’t", "unlikely", "goodgoodgoodgoodgood", "it's", "Ótimo",
+             "não", "café", "a", "x", "never", "hardly", "useful", "…", "12", "_"]
+    separators = [" ", "", ". ", ", ", "-", "\n", " " * 40, " — "]
+    texts = ["".join(rng.choice(words) + rng.choice(separators) for _ in range(rng.randint(0, 30)))
+             for _ in range(500)]
+    custom = analytics.SentimentAnalyzer(["a", "ok", "útil"], ["x"], ["nn"], negation_window=2)
+
+    for analyzer in (analytics.get_analyzer("en"), analytics.get_analyzer("pt"), custom):
+        assert analyzer.score_batch(iter(texts)) == [analyzer.score(text) for text in texts]
+
+
+def test_world_applies_test_language_to_people():
+    world = mock.TinyWorld.from_config({}, language="pt")
+    person = mock.TinyPerson(name="Ana", age=30, occupation="Designer")
+    world.add_person(person)
+
+    result = person.parse_scenario_response("Achei o checkout ótimo.")
+    assert result["metadata"]["sentiment"] == 1.0
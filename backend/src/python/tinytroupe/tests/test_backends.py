@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+import mock
+from backends import FixtureMissingError, RecordingBackend, ReplayBackend, SyntheticBackend, request_key
+
+
+def _person():
+    return mock.TinyPerson(name="Ana", age=30, occupation="Designer")
+
+
+def test_record_then_replay_gives_identical_results(tmp_path, monkeypatch):
+    monkeypatch.setattr(mock, "_cache", None)
+    fixture = str(tmp_path / "fixtures.jsonl")
+    person = _person()
+    person.backend = RecordingBackend(SyntheticBackend(seed=1), fixture)
+    recorded = person.interact_with_scenario({"description": "Checkout"})
+
+    person.backend = ReplayBackend(fixture)
+    deltas = []
+    replayed = person.interact_with_scenario({"description": "Checkout"}, on_delta=deltas.append)
+
+    assert replayed["content"] == recorded["content"]
+    assert replayed["metadata"] == recorded["metadata"]
+    assert "".join(deltas).startswith(recorded["content"])
+    with pytest.raises(FixtureMissingError):
+        person.interact_with_scenario({"description": "Outro"})
+
+
+def test_synthetic_backend_sleeps_and_reports_usage(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("backends.time.sleep", sleeps.append)
+    backend = SyntheticBackend(latency_ms=50, jitter_ms=10, seed=3)
+
+    params = _person().scenario_request({"description": "Checkout"}, structured=True)
+    content, usage, retries = backend.complete(params)
+
+    assert 0.05 <= sleeps[0] <= 0.06
+    assert mock.validate_structured_response(content)["tags"] == ["synthetic"]
+    assert usage["total_tokens"] > 0 and retries == 0
+
+
+def test_configure_backend_selects_backend(tmp_path, monkeypatch):
+    monkeypatch.setattr(mock, "_backend", mock.get_backend())
+    fixture = tmp_path / "fixtures.jsonl"
+    fixture.write_text(json.dumps({"key": request_key({"model": "m", "messages": []}), "content": "x"}) + "\n")
+
+    mock.configure_backend({"llm_backend": "synthetic", "synthetic_latency_ms": 5})
+    assert isinstance(mock.get_backend(), SyntheticBackend) and mock.get_backend().latency_ms == 5.0
+    mock.configure_backend({"llm_backend": "replay", "llm_fixtures": str(fixture)})
+    assert mock.get_backend().complete({"model": "m", "messages": []})[0] == "x"
+    with pytest.raises(ValueError):
+        mock.configure_backend({"llm_backend": "nope"})
@@ -0,0 +1,54 @@
+import json
+
+import bridge
+import mock
+from batch import BatchRunner, LocalBatchClient
+from fakes import FakeChatClient
+
+RAW_RESPONSE = "I love how useful this is.\n\nKey points:\n- useful\n- fast\n\nTags:\n- ux"
+
+
+def _responder(body):
+    return RAW_RESPONSE + "\n" + body["messages"][0]["content"].split("You are ")[1].split(",")[0]
+
+
+def _strip_timestamps(results):
+    for scenario in results:
+        for response in scenario["responses"]:
+            response.pop("timestamp")
+    return results
+
+
+def test_batch_runner_roundtrip(tmp_path):
+    client = LocalBatchClient(str(tmp_path / "endpoint"), lambda body: body["messages"][0]["content"].upper(),
+                              polls_until_complete=2)
+    runner = BatchRunner(client, str(tmp_path / "work"), poll_interval=0)
+
+    outcomes = runner.run({
+        "a": {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "oi"}]},
+        "b": {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "tchau"}]},
+    })
+
+    assert outcomes == {"a": {"content": "OI", "usage": None}, "b": {"content": "TCHAU", "usage": None}}
+
+
+def test_batch_mode_matches_interactive_mode(tmp_path, monkeypatch):
+    monkeypatch.setattr(mock, "_cache", None)
+    test = json.dumps({"id": "t", "scenarios": [{"description": "Checkout"}, {"description": "Onboarding"}]})
+    personas = json.dumps(["1", "2", "3"])
+
+    chat_client = FakeChatClient(_responder)
+    monkeypatch.setattr(mock, "get_client", lambda *args, **kwargs: chat_client)
+    interactive = bridge.run_simulation(test, personas, {"max_concurrency": 3})
+
+    batch_client = LocalBatchClient(str(tmp_path / "endpoint"), _responder)
+    monkeypatch.setattr(bridge, "get_client", lambda *args, **kwargs: batch_client)
+    batched = bridge.run_simulation(test, personas, {
+        "batch": True,
+        "batch_dir": str(tmp_path / "work"),
+        "batch_poll_interval": 0
+    })
+
+    assert _strip_timestamps(batched["results"]) == _strip_timestamps(interactive["results"])
+    assert batched["progress"]["completed_interactions"] == 6
+    assert batched["results"][0]["responses"][0]["metadata"]["keyPoints"] == ["useful", "fast"]
@@ -0,0 +1,307 @@
+import json
+import threading
+import time
+
+import bridge
+from mock import TinyPerson
+
+
+def _frames(output: str):
+    """Decode the __RESULT_START__/__RESULT_END__ frames printed by the bridge."""
+    frames = []
+    for line in output.splitlines():
+        if line.startswith("__RESULT_START__") and line.endswith("__RESULT_END__"):
+            frames.append(json.loads(line[len("__RESULT_START__"):-len("__RESULT_END__")]))
+    return frames
+
+
+def test_run_simulation_concurrent_keeps_persona_order(monkeypatch, capsys):
+    calls = []
+    in_flight = {"current": 0, "max": 0}
+    lock = threading.Lock()
+
+    def fake_interact(self, scenario, on_delta=None, structured=False):
+        with lock:
+            in_flight["current"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["current"])
+        time.sleep(0.01)
+        with lock:
+            in_flight["current"] -= 1
+            calls.append((self.name, scenario["id"]))
+        return {"type": "message", "content": scenario["id"], "personaId": self.name}
+
+    monkeypatch.setattr(TinyPerson, "interact_with_scenario", fake_interact)
+
+    test = {"id": "t1", "scenarios": [{"id": f"s{i}"} for i in range(3)]}
+    personas = [f"p{i}" for i in range(4)]
+    result = bridge.run_simulation(json.dumps(test), json.dumps(personas), {"max_concurrency": 2})
+
+    assert in_flight["max"] <= 2
+    for persona in personas:
+        name = f"Persona_{persona}"
+        assert [s for n, s in calls if n == name] == ["s0", "s1", "s2"]
+
+    for scenario_result, scenario in zip(result["results"], test["scenarios"]):
+        assert scenario_result["scenario"] == scenario
+        assert [r["personaId"] for r in scenario_result["responses"]] == [f"Persona_{p}" for p in personas]
+
+    updates = [f["data"] for f in _frames(capsys.readouterr().out) if f.get("type") == "test_update"]
+    assert [u["completed_interactions"] for u in updates] == list(range(0, 13))
+    assert result["progress"]["status"] == "completed"
+    assert result["progress"]["completed_interactions"] == 12
+
+
+def test_current_iteration_is_the_first_unfinished_scenario(monkeypatch, capsys):
+    monkeypatch.setattr(
+        TinyPerson, "interact_with_scenario",
+        lambda self, scenario, on_delta=None, structured=False: {"type": "message", "content": scenario["id"],
+                                                                 "personaId": self.name},
+    )
+
+    test = {"id": "t3", "scenarios": [{"id": f"s{i}"} for i in range(3)]}
+    result = bridge.run_simulation(json.dumps(test), json.dumps(["a", "b", "c"]), {"max_concurrency": 1}, 3)
+
+    updates = [f["data"] for f in _frames(capsys.readouterr().out) if f.get("type") == "test_update"]
+    # Cada persona roda os três cenários antes da próxima; o primeiro cenário só termina com a última
+    assert [u["current_iteration"] for u in updates] == [0, 1, 1, 1, 1, 1, 1, 2, 3, 3]
+    assert result["progress"]["current_iteration"] == 3
+
+
+def test_run_simulation_reports_errors_without_stopping(monkeypatch, capsys):
+    def fake_interact(self, scenario, on_delta=None, structured=False):
+        if scenario["id"] == "boom":
+            raise RuntimeError("falhou")
+        return {"type": "message", "content": scenario["id"], "personaId": self.name}
+
+    monkeypatch.setattr(TinyPerson, "interact_with_scenario", fake_interact)
+
+    test = {"id": "t2", "scenarios": [{"id": "boom"}, {"id": "ok"}]}
+    result = bridge.run_simulation(json.dumps(test), json.dumps(["a", "b"]), {"max_concurrency": 4})
+
+    assert result["results"][0]["responses"] == []
+    assert len(result["results"][1]["responses"]) == 2
+    errors = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith('{"type": "error"')]
+    assert len(errors) == 2
+
+
+def test_serve_multiplexes_requests(monkeypatch, capsys):
+    import io
+
+    from traits import TraitGenerator
+
+    monkeypatch.setattr(TraitGenerator, "generate",
+                        lambda self, personas: [[f"trait-{p['name']}"] for p in personas])
+    monkeypatch.setattr(
+        TinyPerson, "interact_with_scenario",
+        lambda self, scenario, on_delta=None, structured=False: {"type": "message", "content": "ok",
+                                                                 "personaId": self.name},
+    )
+
+    requests = [
+        {"id": "1", "mode": "generate_traits", "base_persona": {"name": "Ana"}},
+        {"id": "2", "mode": "create_person", "persona": {"name": "Bia", "age": 41}},
+        {"id": "3", "mode": "run_simulation", "test": {"scenarios": [{"id": "s"}]}, "personas": ["x"]},
+        {"id": "4", "mode": "unknown"},
+    ]
+    stream = io.StringIO("\n".join(json.dumps(r) for r in requests) + "\n")
+    bridge.serve({"api_key": "sk-test", "cache_enabled": False}, stream)
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    final = {line["id"]: line for line in lines if line["type"] != "frame"}
+
+    assert final["1"] == {"id": "1", "type": "result", "data": ["trait-Ana"]}
+    assert final["2"]["data"]["name"] == "Bia" and final["2"]["data"]["age"] == 41
+    assert final["3"]["data"]["progress"]["completed_interactions"] == 1
+    assert final["4"]["type"] == "error"
+    assert all(line["id"] == "3" for line in lines if line["type"] == "frame")
+
+
+def test_serve_requests_keep_their_own_api_key(monkeypatch, capsys):
+    import io
+    import os
+
+    import mock
+
+    # As duas requisições só respondem quando ambas estão em andamento
+    both_running = threading.Barrier(2, timeout=5)
+
+    def client_key(request, config):
+        both_running.wait()
+        return mock.get_client().api_key
+
+    monkeypatch.setitem(bridge.SERVE_MODES, "client_key", client_key)
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    requests = [{"id": str(i), "mode": "client_key", "config": {"api_key": f"sk-{i}"}} for i in (1, 2)]
+    stream = io.StringIO("\n".join(json.dumps(r) for r in requests) + "\n")
+    bridge.serve({"cache_enabled": False, "serve_workers": 2}, stream)
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert {line["id"]: line["data"] for line in lines} == {"1": "sk-1", "2": "sk-2"}
+    assert "OPENAI_API_KEY" not in os.environ
+
+
+def test_serve_requests_keep_their_own_backend(monkeypatch, capsys):
+    import io
+
+    import mock
+
+    both_running = threading.Barrier(2, timeout=5)
+
+    def backend_name(request, config):
+        both_running.wait()
+        return type(mock.get_backend()).__name__
+
+    monkeypatch.setattr(mock, "_backend", mock.get_backend())
+    monkeypatch.setitem(bridge.SERVE_MODES, "backend_name", backend_name)
+    requests = [{"id": "1", "mode": "backend_name", "config": {"llm_backend": "synthetic"}},
+                {"id": "2", "mode": "backend_name", "config": {"model": "gpt-4o"}}]
+    stream = io.StringIO("\n".join(json.dumps(r) for r in requests) + "\n")
+    bridge.serve({"api_key": "sk-test", "cache_enabled": False, "serve_workers": 2}, stream)
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert {line["id"]: line["data"] for line in lines} == {"1": "SyntheticBackend", "2": "OpenAIBackend"}
+
+
+def test_serve_requests_keep_their_own_router(monkeypatch, capsys):
+    import io
+
+    import mock
+
+    both_running = threading.Barrier(2, timeout=5)
+
+    def scenario_model(request, config):
+        both_running.wait()
+        return mock.get_router().scenario_models()[0]
+
+    monkeypatch.setattr(mock, "_router", mock.get_router())
+    monkeypatch.setitem(bridge.SERVE_MODES, "scenario_model", scenario_model)
+    requests = [{"id": str(i), "mode": "scenario_model", "config": {"model": model}}
+                for i, model in ((1, "gpt-4o"), (2, "gpt-4o-mini"))]
+    stream = io.StringIO("\n".join(json.dumps(r) for r in requests) + "\n")
+    bridge.serve({"api_key": "sk-test", "cache_enabled": False, "serve_workers": 2}, stream)
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert {line["id"]: line["data"] for line in lines} == {"1": "gpt-4o", "2": "gpt-4o-mini"}
+
+
+def test_run_simulation_streams_message_deltas(monkeypatch, capsys):
+    import mock
+    from fakes import FakeChatClient
+
+    monkeypatch.setattr(mock, "_cache", None)
+    client = FakeChatClient(lambda params: "I love this product, it is great.")
+    monkeypatch.setattr(mock, "get_client", lambda *args, **kwargs: client)
+
+    test = {"id": "t", "scenarios": [{"description": "Checkout"}]}
+    result = bridge.run_simulation(json.dumps(test), json.dumps(["1"]), {"stream": True})
+
+    frames = _frames(capsys.readouterr().out)
+    deltas = [f["data"] for f in frames if f.get("type") == "message_delta"]
+    assert len(deltas) > 1
+    assert "".join(d["delta"] for d in deltas) == "I love this product, it is great."
+    assert {d["scenarioIndex"] for d in deltas} == {0}
+    assert client.calls[0]["stream"] is True
+    assert result["results"][0]["responses"][0]["content"] == "I love this product, it is great."
+
+
+def test_envelope_personas_are_decoded_lazily(monkeypatch, capsys):
+    events = []
+
+    def fake_interact(self, scenario, on_delta=None, structured=False):
+        events.append(("interact", self.name))
+        return {"type": "message", "content": "ok", "personaId": self.name}
+
+    monkeypatch.setattr(TinyPerson, "interact_with_scenario", fake_interact)
+
+    def lines():
+        yield json.dumps({"test": {"scenarios": [{"id": "s"}]}, "persona_count": 20}).encode()
+        for index in range(20):
+            events.append(("read", index))
+            yield json.dumps(index).encode()
+
+    header, personas = bridge.read_envelope(lines())
+    result = bridge.run_simulation(header["test"], personas, {"max_concurrency": 1}, header["persona_count"])
+
+    assert events.index(("interact", "Persona_0")) < events.index(("read", 19))
+    assert result["progress"]["total_interactions"] == 20
+    assert [r["personaId"] for r in result["results"][0]["responses"]] == [f"Persona_{i}" for i in range(20)]
+
+
+def test_main_reads_envelope_from_file(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(
+        TinyPerson, "interact_with_scenario",
+        lambda self, scenario, on_delta=None, structured=False: {"type": "message", "content": "ok", "personaId": self.name},
+    )
+    envelope = tmp_path / "input.ndjson"
+    envelope.write_text("\n".join([
+        json.dumps({"config": {"api_key": "sk-file", "cache_enabled": False},
+                    "test": {"scenarios": [{"id": "s1"}, {"id": "s2"}]}}),
+        json.dumps("a"),
+        json.dumps("b"),
+    ]) + "\n")
+    monkeypatch.setattr("sys.argv", ["bridge.py", "--input", str(envelope)])
+
+    try:
+        bridge.main()
+    except SystemExit as e:
+        assert e.code == 0
+
+    result = json.loads(capsys.readouterr().out.splitlines()[-1])
+    assert result["progress"]["completed_interactions"] == 4
+    assert result["progress"]["total_interactions"] == 4
+
+
+def test_create_person_fast_path_prints_json_without_loading_openai():
+    import os
+    import re
+    import subprocess
+    import sys
+
+    script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bridge.py")
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", script, "--create-person", "--persona",
+         json.dumps({"name": "Ana", "age": 41})],
+        capture_output=True, text=True, timeout=60)
+
+    assert json.loads(completed.stdout)["name"] == "Ana"
+    assert not re.search(r"\|\s+openai$", completed.stderr, re.MULTILINE)
+
+
+def test_serve_does_not_open_a_process_wide_cache(tmp_path, monkeypatch, capsys):
+    import io
+
+    import mock
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("CACHE_ENABLED", "true")
+    monkeypatch.setattr(mock, "_cache", None)
+    request = {"id": "1", "mode": "create_person", "persona": {"name": "Bia"},
+               "config": {"api_key": "sk-test", "cache_enabled": False}}
+    bridge.serve({"logging_level": "error"}, io.StringIO(json.dumps(request) + "\n"))
+
+    assert json.loads(capsys.readouterr().out)["type"] == "result"
+    assert mock._cache is None
+    assert not (tmp_path / "cache").exists()
+
+
+def test_serve_profile_covers_the_worker_without_failing_requests(tmp_path, monkeypatch, capsys):
+    import io
+
+    both_running = threading.Barrier(3, timeout=5)
+
+    def fake_interact(self, scenario, on_delta=None, structured=False):
+        both_running.wait()
+        return {"type": "message", "content": "ok", "personaId": self.name}
+
+    monkeypatch.setattr(TinyPerson, "interact_with_scenario", fake_interact)
+    requests = [{"id": str(i), "mode": "run_simulation", "test": {"scenarios": [{"id": "s"}]}, "personas": ["x"]}
+                for i in range(3)]
+    stream = io.StringIO("\n".join(json.dumps(r) for r in requests) + "\n")
+    bridge.serve({"api_key": "sk-test", "cache_enabled": False, "serve_workers": 4, "profile": True,
+                  "profile_dir": str(tmp_path)}, stream)
+
+    final = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    final = [line for line in final if line["type"] != "frame"]
+    assert sorted(line["id"] for line in final) == ["0", "1", "2"]
+    assert all(line["type"] == "result" for line in final)
+    assert len(list(tmp_path.glob("*/profile.json"))) == 1
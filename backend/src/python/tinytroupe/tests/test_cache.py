@@ -0,0 +1,78 @@
+import mock
+from cache import ResponseCache
+from fakes import FakeChatClient
+from mock import TinyPerson
+
+
+def test_cache_roundtrip_and_counters(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    key = cache.make_key("gpt-4o-mini", [{"role": "user", "content": "oi"}], 100, None)
+
+    assert cache.get(key) is None
+    cache.set(key, {"content": "olá"})
+    assert cache.get(key) == {"content": "olá"}
+    assert cache.stats() == {"hits": 1, "misses": 1}
+
+    # Another instance on the same directory (e.g. another bridge process) sees the entry
+    assert ResponseCache(str(tmp_path)).get(key) == {"content": "olá"}
+
+
+def test_cache_key_depends_on_request_parameters():
+    messages = [{"role": "user", "content": "oi"}]
+    base = ResponseCache.make_key("gpt-4o-mini", messages, 100, None)
+
+    assert base == ResponseCache.make_key("gpt-4o-mini", list(messages), 100, None)
+    assert base != ResponseCache.make_key("gpt-4o", messages, 100, None)
+    assert base != ResponseCache.make_key("gpt-4o-mini", messages, 200, None)
+    assert base != ResponseCache.make_key("gpt-4o-mini", messages, 100, 0.7)
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=60)
+    cache.set("a", "x" * 20)
+    cache.set("b", "y" * 20)
+    cache.get("a")
+    cache.set("c", "z" * 20)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "x" * 20
+    assert cache.get("c") == "z" * 20
+
+
+def test_tiny_person_completions_go_through_cache(tmp_path, monkeypatch):
+    client = FakeChatClient(lambda params: "curious, calm")
+    monkeypatch.setattr(mock, "get_client", lambda *args, **kwargs: client)
+    monkeypatch.setattr(mock, "_cache", None)
+    mock.configure_cache({"cache_enabled": True, "cache_dir": str(tmp_path)})
+
+    person = TinyPerson(name="Ana", age=30, occupation="Designer")
+    assert person.generate_traits() == ["curious", "calm"]
+    assert person.generate_traits() == ["curious", "calm"]
+    assert len(client.calls) == 1
+    assert mock.cache_stats() == {"enabled": True, "hits": 1, "misses": 1}
+
+    mock.configure_cache({"cache_enabled": False})
+    assert mock.cache_stats()["enabled"] is False
+
+
+def test_invalid_structured_replies_are_not_cached(tmp_path, monkeypatch):
+    import json
+
+    import pytest
+
+    valid = json.dumps({"response": "ok", "keyPoints": [], "referencedPersonas": [], "tags": [], "sentiment": 0.5})
+    replies = ["not json", valid]
+    client = FakeChatClient(lambda params: replies.pop(0))
+    monkeypatch.setattr(mock, "get_client", lambda *args, **kwargs: client)
+    monkeypatch.setattr(mock, "_cache", None)
+    mock.configure_cache({"cache_enabled": True, "cache_dir": str(tmp_path)})
+
+    person = TinyPerson(name="Ana", age=30, occupation="Designer")
+    scenario = {"description": "Checkout"}
+    with pytest.raises(mock.ResponseValidationError):
+        person.interact_with_scenario(scenario, structured=True)
+
+    assert person.interact_with_scenario(scenario, structured=True)["content"] == "ok"
+    assert person.interact_with_scenario(scenario, structured=True)["content"] == "ok"
+    assert len(client.calls) == 2
+    mock.configure_cache({"cache_enabled": False})
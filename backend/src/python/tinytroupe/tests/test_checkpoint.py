@@ -0,0 +1,107 @@
+import json
+
+import bridge
+import checkpoint
+from mock import TinyPerson
+
+
+def test_log_survives_truncated_last_line(tmp_path):
+    path = str(tmp_path / "run.checkpoint.jsonl")
+    with checkpoint.CheckpointLog(path, fsync_every=2) as log:
+        log.append(0, 0, "a", {"content": "one"})
+        log.append(1, 0, "a", {"content": "two"})
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"scenario": 0, "persona": 1, "resu')
+
+    completed = checkpoint.load_checkpoint(path)
+    assert sorted(completed) == [(0, 0), (1, 0)]
+    assert completed[(1, 0)]["result"] == {"content": "two"}
+
+
+def test_resume_skips_completed_pairs(tmp_path, monkeypatch):
+    calls = []
+    crash = {"on": "s1"}
+
+    def fake_interact(self, scenario, on_delta=None, structured=False):
+        if scenario["id"] == crash["on"] and self.name == "Persona_b":
+            raise RuntimeError("caiu")
+        calls.append((self.name, scenario["id"]))
+        return {"type": "message", "content": scenario["id"], "personaId": self.name}
+
+    monkeypatch.setattr(TinyPerson, "interact_with_scenario", fake_interact)
+
+    test = json.dumps({"id": "r1", "scenarios": [{"id": "s0"}, {"id": "s1"}]})
+    personas = json.dumps(["a", "b"])
+    config = {"checkpoint_dir": str(tmp_path)}
+    bridge.run_simulation(test, personas, config)
+    assert len(calls) == 3
+
+    calls.clear()
+    crash["on"] = None
+    result = bridge.run_simulation(test, personas, {**config, "resume": True})
+
+    assert calls == [("Persona_b", "s1")]
+    assert result["progress"]["completed_interactions"] == 4
+    assert [len(r["responses"]) for r in result["results"]] == [2, 2]
+    assert len(checkpoint.load_checkpoint(str(tmp_path / "test_r1.checkpoint.jsonl"))) == 4
+
+
+def test_resume_ignores_pairs_of_a_different_persona(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_interact(self, scenario, on_delta=None, structured=False):
+        calls.append(self.name)
+        return {"type": "message", "content": scenario["id"], "personaId": self.name}
+
+    monkeypatch.setattr(TinyPerson, "interact_with_scenario", fake_interact)
+
+    test = json.dumps({"id": "r2", "scenarios": [{"id": "s0"}]})
+    config = {"checkpoint_dir": str(tmp_path)}
+    bridge.run_simulation(test, json.dumps(["a"]), config)
+    bridge.run_simulation(test, json.dumps(["z"]), {**config, "resume": True})
+
+    assert calls == ["Persona_a", "Persona_z"]
+
+
+def test_session_resume_replays_the_raw_response(tmp_path, monkeypatch):
+    import mock
+    from fakes import FakeChatClient
+
+    raw = "I would pay.\n\nKey points:\n- price"
+    client = FakeChatClient(lambda params: raw)
+    monkeypatch.setattr(mock, "get_client", lambda *args, **kwargs: client)
+    monkeypatch.setattr(mock, "_cache", None)
+
+    config = {"checkpoint_dir": str(tmp_path), "conversation_mode": "session"}
+    scenarios = [{"id": "s0", "description": "Checkout"}, {"id": "s1", "description": "Refund"}]
+    bridge.run_simulation(json.dumps({"id": "r3", "scenarios": scenarios[:1]}), json.dumps(["a"]), config)
+    live_history = client.calls[0]["messages"] + [{"role": "assistant", "content": raw}]
+
+    bridge.run_simulation(json.dumps({"id": "r3", "scenarios": scenarios}), json.dumps(["a"]),
+                          {**config, "resume": True})
+
+    assert len(client.calls) == 2
+    # O histórico refeito é o mesmo que a execução ao vivo teria mantido
+    assert client.calls[1]["messages"][:len(live_history)] == live_history
+
+
+def test_resume_reruns_edited_scenarios(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_interact(self, scenario, on_delta=None, structured=False):
+        calls.append((self.name, scenario["description"]))
+        return {"type": "message", "content": scenario["description"], "personaId": self.name}
+
+    monkeypatch.setattr(TinyPerson, "interact_with_scenario", fake_interact)
+
+    config = {"checkpoint_dir": str(tmp_path)}
+    scenarios = [{"id": "s0", "description": "Checkout"}, {"id": "s1", "description": "Refund"}]
+    bridge.run_simulation(json.dumps({"id": "r4", "scenarios": scenarios}), json.dumps(["a"]), config)
+
+    calls.clear()
+    scenarios[1]["description"] = "Refund after 30 days"
+    result = bridge.run_simulation(json.dumps({"id": "r4", "scenarios": scenarios}), json.dumps(["a"]),
+                                   {**config, "resume": True})
+
+    assert calls == [("Persona_a", "Refund after 30 days")]
+    assert result["results"][1]["responses"][0]["content"] == "Refund after 30 days"
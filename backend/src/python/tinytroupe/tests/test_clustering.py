@@ -0,0 +1,77 @@
+import json
+from types import SimpleNamespace
+
+import bridge
+import mock
+from clustering import ResponseClusterer, cluster_minhash, cluster_vectors
+from fakes import FakeRawResponse
+from mock import TinyPerson
+
+PRICE = "The price is too high for what the product offers, I would wait for a discount"
+DELIVERY = "Delivery took two weeks and nobody answered my messages about the order"
+
+
+class FakeEmbeddingClient:
+    """Embeds a text as a bag of two topics, so clusters are predictable."""
+
+    def __init__(self):
+        self.calls = []
+        self.embeddings = SimpleNamespace(with_raw_response=SimpleNamespace(create=self._create))
+
+    def _create(self, **params):
+        self.calls.append(params)
+        data = [SimpleNamespace(index=i, embedding=[text.count("price") + 0.01, text.count("Delivery") + 0.01])
+                for i, text in enumerate(params["input"])]
+        return FakeRawResponse(SimpleNamespace(data=list(reversed(data)),
+                                               usage={"prompt_tokens": 10, "total_tokens": 10}))
+
+
+def test_minhash_groups_near_duplicates():
+    texts = [PRICE, DELIVERY, PRICE + " soon", PRICE.upper(), DELIVERY + "!", "Completely unrelated answer here"]
+    clusters = cluster_minhash(texts, threshold=0.6)
+
+    assert sorted(map(sorted, clusters)) == [[0, 2, 3], [1, 4], [5]]
+    assert clusters[0][0] in (0, 3)
+
+
+def test_vectors_cluster_around_representative():
+    clusters = cluster_vectors([[1, 0], [0, 1], [0.95, 0.05], [0.9, 0.1]], threshold=0.9)
+
+    assert clusters == [[2, 0, 3], [1]]
+
+
+def test_embeddings_are_batched_and_fall_back_to_minhash(monkeypatch):
+    client = FakeEmbeddingClient()
+    monkeypatch.setattr(mock, "get_client", lambda *args, **kwargs: client)
+    groups = [[PRICE, DELIVERY, PRICE], [DELIVERY, DELIVERY]]
+
+    clusterer = ResponseClusterer("embeddings", batch_size=2)
+    assert clusterer.cluster(groups) == [[[0, 2], [1]], [[0, 1]]]
+    assert [len(call["input"]) for call in client.calls] == [2, 2, 1]
+
+    monkeypatch.setattr(mock, "_backend", mock.SyntheticBackend())
+    assert clusterer.cluster(groups) == [[[0, 2], [1]], [[0, 1]]]
+    assert len(client.calls) == 3
+
+
+def test_run_simulation_returns_clusters_and_fetches_members(monkeypatch):
+    def fake_interact(self, scenario, on_delta=None, structured=False):
+        content = DELIVERY if self.name == "Persona_3" else PRICE
+        return {"type": "message", "content": content, "personaId": self.name, "metadata": {"sentiment": -0.5}}
+
+    monkeypatch.setattr(TinyPerson, "interact_with_scenario", fake_interact)
+
+    test = {"id": "clusters", "scenarios": [{"id": "s0"}]}
+    config = {"cluster_responses": "minhash"}
+    result = bridge.run_simulation(json.dumps(test), json.dumps([str(i) for i in range(5)]), config)
+
+    [scenario_result] = result["results"]
+    assert scenario_result["responseCount"] == 5
+    assert [cluster["count"] for cluster in scenario_result["clusters"]] == [4, 1]
+    assert scenario_result["clusters"][1]["representative"]["content"] == DELIVERY
+    members = scenario_result["clusters"][0]["members"]
+    assert [member["personaId"] for member in members] == ["0", "1", "2", "4"]
+
+    fetched = bridge.fetch_responses("clusters", [[0, m["personaIndex"]] for m in members] + [[1, 0]], config)
+    assert [r["personaId"] for r in fetched[:-1]] == ["Persona_0", "Persona_1", "Persona_2", "Persona_4"]
+    assert fetched[-1] is None
@@ -0,0 +1,69 @@
+import io
+import json
+
+import pytest
+
+import bridge
+from framing import CODEC_JSON, FRAME_HEADER, FrameWriter, read_frames
+from mock import TinyPerson
+
+
+@pytest.fixture
+def frames_output(monkeypatch):
+    monkeypatch.setattr(bridge, "_frames", None)
+    monkeypatch.setattr(
+        TinyPerson, "interact_with_scenario",
+        lambda self, scenario, on_delta=None, structured=False: {"type": "message", "content": scenario["id"],
+                                                                 "personaId": self.name},
+    )
+    return io.BytesIO()
+
+
+def test_frames_round_trip_in_order():
+    stream = io.BytesIO()
+    writer = FrameWriter(stream, codec="json")
+    payloads = [{"type": "a", "text": "olá"}, [1, 2, 3], {"nested": {"x": None}}]
+    for payload in payloads:
+        writer.write(payload)
+
+    raw = stream.getvalue()
+    length, codec = FRAME_HEADER.unpack(raw[:FRAME_HEADER.size])
+    assert codec == CODEC_JSON and length == len(json.dumps(payloads[0], separators=(",", ":")).encode())
+    stream.seek(0)
+    assert list(read_frames(stream)) == payloads
+
+
+def test_run_simulation_sends_each_interaction_once(frames_output):
+    bridge.configure_output({"output_protocol": "frames"}, frames_output)
+    test = {"id": "frames", "scenarios": [{"id": "s0"}, {"id": "s1"}]}
+    result = bridge.run_simulation(json.dumps(test), json.dumps(["a", "b", "c"]), {"max_concurrency": 2})
+
+    frames_output.seek(0)
+    frames = list(read_frames(frames_output))
+    interactions = [f for f in frames if f["type"] == "interaction"]
+    assert sorted((f["scenarioIndex"], f["personaIndex"]) for f in interactions) == [
+        (s, p) for s in range(2) for p in range(3)]
+    assert all(f["data"]["content"] == f"s{f['scenarioIndex']}" for f in interactions)
+    assert {f["type"] for f in frames} == {"interaction", "test_update"}
+    assert b"s0" not in json.dumps(result).encode()
+    assert result["results"] == [{"scenarioIndex": 0, "personaIndexes": [0, 1, 2]},
+                                 {"scenarioIndex": 1, "personaIndexes": [0, 1, 2]}]
+
+
+def test_serve_writes_frames(frames_output):
+    requests = io.StringIO(json.dumps({"id": "7", "mode": "run_simulation", "test": {"scenarios": [{"id": "s"}]},
+                                       "personas": ["x"]}) + "\n")
+    bridge.serve({"api_key": "sk-test", "cache_enabled": False, "output_protocol": "frames"}, requests,
+                 output=frames_output)
+
+    frames_output.seek(0)
+    frames = list(read_frames(frames_output))
+    assert all(f["id"] == "7" for f in frames)
+    assert [f["data"]["type"] for f in frames[:-1]] == ["test_update", "interaction", "test_update"]
+    assert frames[-1]["type"] == "result"
+    assert frames[-1]["data"]["results"] == [{"scenarioIndex": 0, "personaIndexes": [0]}]
+
+
+def test_invalid_protocol_is_rejected(frames_output):
+    with pytest.raises(ValueError):
+        bridge.configure_output({"output_protocol": "xml"})
@@ -0,0 +1,45 @@
+import io
+import json
+
+import pytest
+
+from log import configure_logging, get_logger
+
+
+@pytest.fixture
+def log_stream():
+    stream = io.StringIO()
+    yield stream
+    configure_logging({})
+
+
+def test_level_and_json_format_come_from_config(log_stream):
+    configure_logging({"logging_level": "info", "log_format": "json"}, log_stream)
+    logger = get_logger("bridge")
+
+    logger.debug("escondida")
+    logger.info("Iniciando simulação", extra={"fields": {"testId": "t1"}})
+
+    lines = log_stream.getvalue().splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {"level": "info", "logger": "tinytroupe.bridge", "message": "Iniciando simulação", "testId": "t1"}]
+
+
+def test_disabled_debug_does_not_format_its_arguments(log_stream):
+    class Expensive:
+        def __str__(self):
+            raise AssertionError("formatado com debug desativado")
+
+    configure_logging({"logging_level": "warning"}, log_stream)
+    get_logger("mock").debug("resposta %s", Expensive())
+    configure_logging({"logging_level": "debug"}, log_stream)
+    get_logger("mock").debug("cenário %d", 3)
+
+    assert log_stream.getvalue() == "[DEBUG] cenário 3\n"
+
+
+def test_invalid_settings_are_rejected(log_stream):
+    with pytest.raises(ValueError):
+        configure_logging({"logging_level": "loud"}, log_stream)
+    with pytest.raises(ValueError):
+        configure_logging({"log_format": "xml"}, log_stream)
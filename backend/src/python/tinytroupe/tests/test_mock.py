@@ -0,0 +1,152 @@
+import mock
+
+
+def test_get_client_reuses_pooled_client(monkeypatch):
+    monkeypatch.setattr(mock, "_clients", {})
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-one")
+
+    first = mock.get_client()
+    assert mock.get_client() is first
+    assert mock.get_client(api_key="sk-two") is not first
+    assert mock.get_client(model="gpt-4o") is not first
+
+
+def test_configure_clients_applies_pool_settings(monkeypatch):
+    monkeypatch.setattr(mock, "_clients", {})
+    monkeypatch.setattr(mock, "_client_options", dict(mock._client_options))
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-one")
+
+    before = mock.get_client()
+    mock.configure_clients({"http_pool_size": "5", "http_timeout": 30})
+    after = mock.get_client()
+
+    assert mock._client_options["pool_size"] == 5
+    assert mock._client_options["timeout"] == 30.0
+    assert after is not before
+    assert after.timeout.read == 30.0
+
+
+def test_scenario_prompts_share_a_stable_persona_prefix():
+    person = mock.TinyPerson(name="Ana", age=30, occupation="Designer", interests=["ux"], traits=["calm"])
+    first = person.scenario_request({"description": "Checkout", "steps": ["pay"]})
+    second = person.scenario_request({"description": "Onboarding"})
+
+    assert first["messages"][:2] == second["messages"][:2]
+    assert first["messages"][0] == {"role": "system", "content": person.persona_preamble}
+    assert first["messages"][0]["content"].startswith("You are Ana, a 30-year-old Designer.")
+    assert first["messages"][2]["role"] == "user"
+    assert "Checkout" in first["messages"][2]["content"] and "- pay" in first["messages"][2]["content"]
+    assert "Ana" not in first["messages"][2]["content"]
+
+
+def test_run_usage_reports_cached_tokens(monkeypatch):
+    import json
+
+    import bridge
+    from fakes import FakeChatClient
+
+    usage = {"prompt_tokens": 120, "completion_tokens": 30, "total_tokens": 150,
+             "prompt_tokens_details": {"cached_tokens": 100}}
+    client = FakeChatClient(lambda params: "Fine.", usage=usage)
+    monkeypatch.setattr(mock, "_cache", None)
+    monkeypatch.setattr(mock, "get_client", lambda *args, **kwargs: client)
+
+    test = {"scenarios": [{"description": "a"}, {"description": "b"}]}
+    result = bridge.run_simulation(json.dumps(test), json.dumps(["1"]), {})
+
+    assert result["usage"]["requests"] == 2
+    assert result["usage"]["prompt_tokens"] == 240
+    assert result["usage"]["cached_tokens"] == 200
+    assert result["usage"]["by_model"][mock.DEFAULT_MODEL]["total_tokens"] == 300
+
+
+def test_session_world_keeps_bounded_history(monkeypatch):
+    from fakes import FakeChatClient
+
+    client = FakeChatClient(lambda params: "Answer " + "x" * 400)
+    monkeypatch.setattr(mock, "_cache", None)
+    monkeypatch.setattr(mock, "get_client", lambda *args, **kwargs: client)
+
+    world = mock.TinyWorld.from_config({"conversation_mode": "session", "history_max_tokens": 150})
+    person = mock.TinyPerson(name="Ana", age=30, occupation="Designer")
+    world.add_person(person)
+
+    for index in range(4):
+        world.interact(person, {"description": f"Scenario {index}"})
+
+    # A segunda chamada já enxerga a primeira troca
+    assert [m["role"] for m in client.calls[1]["messages"]] == ["system", "system", "user", "assistant", "user"]
+    assert person.history_tokens() <= 150
+    assert len(person.history) == 2
+    assert "Scenario 3" in person.history[0]["content"]
+
+
+def test_session_world_summarizes_dropped_turns(monkeypatch):
+    from fakes import FakeChatClient
+
+    def responder(params):
+        if params["max_tokens"] == 300:
+            return "I liked the checkout."
+        return "Answer " + "x" * 400
+
+    client = FakeChatClient(responder)
+    monkeypatch.setattr(mock, "_cache", None)
+    monkeypatch.setattr(mock, "get_client", lambda *args, **kwargs: client)
+
+    world = mock.TinyWorld(session=True, history_max_tokens=150, history_strategy="summarize")
+    person = mock.TinyPerson(name="Ana", age=30, occupation="Designer")
+    world.interact(person, {"description": "Checkout"})
+    world.interact(person, {"description": "Onboarding"})
+
+    assert person.history_summary == "I liked the checkout."
+    summary_call = client.calls[2]
+    assert [m["role"] for m in summary_call["messages"]] == ["system", "user"]
+    assert "Checkout" in summary_call["messages"][1]["content"]
+
+    world.interact(person, {"description": "Pricing"})
+    assert "I liked the checkout." in client.calls[3]["messages"][2]["content"]
+
+
+def test_stateless_world_does_not_keep_history(monkeypatch):
+    from fakes import FakeChatClient
+
+    client = FakeChatClient(lambda params: "ok")
+    monkeypatch.setattr(mock, "_cache", None)
+    monkeypatch.setattr(mock, "get_client", lambda *args, **kwargs: client)
+
+    world = mock.TinyWorld()
+    person = mock.TinyPerson(name="Ana", age=30, occupation="Designer")
+    world.interact(person, {"description": "a"})
+    world.interact(person, {"description": "b"})
+
+    assert person.history == []
+    assert len(client.calls[1]["messages"]) == 3
+
+
+def test_structured_world_requests_schema_and_parses_json(monkeypatch):
+    import json
+
+    import pytest
+    from fakes import FakeChatClient
+
+    payload = {"response": "I would pay.", "keyPoints": ["fast"], "referencedPersonas": ["Bia"],
+               "tags": ["checkout"], "sentiment": 1.7}
+    client = FakeChatClient(lambda params: json.dumps(payload))
+    monkeypatch.setattr(mock, "_cache", None)
+    monkeypatch.setattr(mock, "get_client", lambda *args, **kwargs: client)
+
+    world = mock.TinyWorld.from_config({"structured_output": True})
+    person = mock.TinyPerson(name="Ana", age=30, occupation="Designer")
+    result = world.interact(person, {"description": "Checkout"})
+
+    assert client.calls[0]["response_format"] == mock.SCENARIO_RESPONSE_FORMAT
+    assert client.calls[0]["max_tokens"] == mock.STRUCTURED_MAX_TOKENS
+    assert result["content"] == "I would pay."
+    assert result["metadata"]["keyPoints"] == ["fast"]
+    assert result["metadata"]["referencedPersonas"] == ["Bia"]
+    assert result["metadata"]["sentiment"] == 1.0
+
+    with pytest.raises(mock.ResponseValidationError):
+        person.parse_scenario_response('{"response": "missing fields"}', structured=True)
+    with pytest.raises(mock.ResponseValidationError):
+        person.parse_scenario_response("1. not json", structured=True)
@@ -2,7 +2,7 @@
 
 import os
 import json
-from tinytroupe_mock import TinyPerson, setup_config
+from mock import TinyPerson, setup_config
 
 def test_openai_integration():
     # Test configuration
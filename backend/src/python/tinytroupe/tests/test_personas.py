@@ -0,0 +1,108 @@
+from datetime import datetime
+
+import pytest
+
+import personas
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.description = None
+        self._rows = []
+
+    def execute(self, query, params):
+        (ids,) = params
+        self.connection.queries.append((query, list(ids)))
+        columns = ("id", "updated_at") if query == personas.STAMP_QUERY else personas.PERSONA_COLUMNS
+        self.description = [(column,) for column in columns]
+        self._rows = [tuple(row[column] for column in columns)
+                      for row in self.connection.rows.values() if row["id"] in ids]
+
+    def fetchall(self):
+        return self._rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+class FakeConnection:
+    closed = 0
+
+    def __init__(self, rows):
+        self.rows = {row["id"]: row for row in rows}
+        self.queries = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        pass
+
+
+def _row(persona_id, name, updated_at):
+    return {"id": persona_id, "name": name, "age": 41, "occupation": "Nurse", "interests": ["running"],
+            "traits": ["patient"], "digital_skills": "basic", "background_story": "Lives in Recife.",
+            "goals": ["save time"], "updated_at": updated_at}
+
+
+def _repository(rows, cache_size=10):
+    repository = personas.PersonaRepository("postgresql://test", cache_size=cache_size)
+    repository._connection = FakeConnection(rows)
+    return repository
+
+
+def test_load_hydrates_in_one_query_and_keeps_order():
+    repository = _repository([_row("a", "Ana", datetime(2024, 1, 1)), _row("b", "Bia", datetime(2024, 1, 1))])
+
+    people = repository.load(["b", "a", "b"])
+
+    assert [person.name for person in people] == ["Bia", "Ana", "Bia"]
+    assert people[0] is not people[2]
+    assert people[1].interests == ["running"] and people[1].background == "Lives in Recife."
+    assert [query for query, _ in repository._connection.queries] == [personas.PERSONA_QUERY]
+
+
+def test_cached_personas_are_only_rebuilt_when_updated():
+    connection_rows = [_row("a", "Ana", datetime(2024, 1, 1)), _row("b", "Bia", datetime(2024, 1, 1))]
+    repository = _repository(connection_rows)
+    first = repository.load(["a", "b"])
+    first[0].history.append({"role": "user", "content": "oi"})
+
+    repository._connection.rows["b"] = _row("b", "Beatriz", datetime(2024, 2, 1))
+    second = repository.load(["a", "b"])
+
+    assert [person.name for person in second] == ["Ana", "Beatriz"]
+    assert second[0].history == []
+    assert repository._connection.queries[1:] == [(personas.STAMP_QUERY, ["a", "b"]),
+                                                  (personas.PERSONA_QUERY, ["b"])]
+
+
+def test_missing_personas_raise():
+    repository = _repository([_row("a", "Ana", datetime(2024, 1, 1))])
+
+    with pytest.raises(personas.PersonaNotFoundError):
+        repository.load(["a", "zzz"])
+
+
+def test_hydrate_without_database_uses_placeholders(monkeypatch):
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+
+    hydrated = list(personas.hydrate_personas(["7", {"id": "8", "name": "Caio"}], {}))
+
+    assert [(persona_id, person.name) for persona_id, person in hydrated] == [("7", "Persona_7"), ("8", "Caio")]
+
+
+def test_missing_database_warning_only_when_an_id_falls_back(monkeypatch):
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    warnings = []
+    monkeypatch.setattr(personas.logger, "warning", lambda message, *args: warnings.append(message))
+
+    list(personas.hydrate_personas([{"id": "8", "name": "Caio"}, {"id": "9", "name": "Duda"}], {}))
+    assert warnings == []
+
+    list(personas.hydrate_personas([{"id": "8", "name": "Caio"}, "7", "6"], {}))
+    assert len(warnings) == 1
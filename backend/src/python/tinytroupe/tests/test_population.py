@@ -0,0 +1,102 @@
+import json
+
+import pytest
+
+import bridge
+from mock import TinyPerson
+from population import PersonaPopulation
+
+PERSONAS = [
+    {"id": "a", "name": "Ana", "age": 25, "occupation": "Designer", "traits": ["calm", "curious"]},
+    {"id": "b", "name": "Bruno", "age": 41, "occupation": "Engineer", "traits": ["curious"], "skills": ["go"]},
+    {"id": "c", "name": "Carla", "age": 58, "occupation": "Designer", "interests": ["art"]},
+    {"id": "d", "name": "Davi", "age": 33, "occupation": "Teacher", "traits": ["curious", "calm"]},
+]
+
+
+def test_records_round_trip_through_interned_columns():
+    population = PersonaPopulation.from_personas(PERSONAS)
+
+    assert len(population) == 4
+    assert population.record(1) == {"id": "b", "name": "Bruno", "age": 41, "occupation": "Engineer",
+                                     "background": "", "interests": [], "traits": ["curious"],
+                                     "skills": ["go"], "goals": []}
+    # "Designer", "curious" e "calm" aparecem mais de uma vez, mas são guardados uma vez só
+    assert population.vocabulary.values.count("curious") == 1
+    persona_id, person = next(population.people([2]))
+    assert persona_id == "c" and isinstance(person, TinyPerson) and person.interests == ["art"]
+
+
+def test_select_and_sample_filter_by_columns():
+    population = PersonaPopulation.from_personas(PERSONAS)
+
+    assert population.select(age_min=30, age_max=45) == [1, 3]
+    assert population.select(occupations=["Designer", "Pilot"]) == [0, 2]
+    assert population.select(traits=["calm", "curious"]) == [0, 3]
+    assert population.select(age_min=30, traits=["curious"]) == [1, 3]
+    assert population.select(occupations=["Pilot"]) == []
+
+    sample = population.sample(2, seed=7)
+    assert sample == population.sample(2, seed=7) and len(sample) == 2 and sample == sorted(sample)
+    assert population.sample(10, occupations=["Designer"]) == [0, 2]
+
+
+def test_small_population_is_smaller_than_people_and_filters_consistently():
+    # Versão pequena de tests/benchmarks/test_population_benchmark.py, que só roda sob demanda
+    import random
+    import tracemalloc
+
+    from personas import person_from_dict
+
+    rng = random.Random(0)
+    occupations = ["Designer", "Engineer", "Teacher", "Nurse"]
+    personas = [{"id": str(i), "name": f"Persona {i}", "age": rng.randint(18, 90),
+                 "occupation": rng.choice(occupations), "traits": rng.sample(["calm", "curious", "bold", "shy"], 2)}
+                for i in range(2000)]
+
+    def peak(build):
+        tracemalloc.start()
+        kept = build()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return kept, peak_bytes
+
+    population, columnar = peak(lambda: PersonaPopulation.from_personas(personas))
+    _, objects = peak(lambda: [person_from_dict(persona) for persona in personas])
+    assert columnar < objects
+
+    expected = [i for i, p in enumerate(personas)
+                if 25 <= p["age"] <= 40 and p["occupation"] in ("Designer", "Nurse") and "calm" in p["traits"]]
+    assert population.select(age_min=25, age_max=40, occupations=["Designer", "Nurse"], traits=["calm"]) == expected
+    assert set(population.sample(50, seed=1, age_min=25, age_max=40)) <= set(population.select(age_min=25, age_max=40))
+
+
+def test_ids_and_unknown_filters_are_rejected():
+    with pytest.raises(ValueError):
+        PersonaPopulation.from_personas(["1", "2"])
+    with pytest.raises(ValueError):
+        PersonaPopulation.from_personas(PERSONAS).apply({"height": 2})
+
+
+def test_run_simulation_only_creates_selected_people(monkeypatch, capsys):
+    created = []
+    original = TinyPerson.__init__
+
+    def tracking_init(self, name, *args, **kwargs):
+        created.append(name)
+        original(self, name, *args, **kwargs)
+
+    monkeypatch.setattr(TinyPerson, "__init__", tracking_init)
+    monkeypatch.setattr(
+        TinyPerson, "interact_with_scenario",
+        lambda self, scenario, on_delta=None, structured=False: {"type": "message", "content": "ok",
+                                                                 "personaId": self.name},
+    )
+    test = {"id": "population", "scenarios": [{"id": "s0"}],
+            "population": {"occupations": ["Designer", "Teacher"], "age_max": 40}}
+
+    result = bridge.run_simulation(json.dumps(test), json.dumps(PERSONAS), {"max_concurrency": 2})
+
+    assert created == ["Ana", "Davi"]
+    assert result["progress"]["total_interactions"] == 2
+    assert [r["personaId"] for r in result["results"][0]["responses"]] == ["Ana", "Davi"]
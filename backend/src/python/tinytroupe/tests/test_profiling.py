@@ -0,0 +1,51 @@
+import json
+import re
+
+import pytest
+
+import bridge
+import mock
+import profiling
+from backends import SyntheticBackend
+from profiling import STAGES, Profiler, stage
+
+
+@pytest.fixture
+def synthetic_backend(monkeypatch):
+    monkeypatch.setattr(mock, "_cache", None)
+    monkeypatch.setattr(mock, "_backend", SyntheticBackend(latency_ms=10, seed=0))
+
+
+def test_stage_is_a_shared_no_op_without_a_profile():
+    assert profiling._active is None
+    assert stage("parse") is stage("serialize")
+
+
+def test_profiled_simulation_reports_every_stage(synthetic_backend, tmp_path, capsys):
+    test = json.dumps({"id": "profile", "scenarios": [{"description": "Checkout", "steps": ["open", "pay"]}]})
+    personas = json.dumps([{"name": "Ana"}, {"name": "Bia"}])
+    config = {"profile": True, "profile_dir": str(tmp_path), "max_concurrency": 2,
+              "profile_sample_interval_ms": 1}
+
+    result = bridge.run_profiled(config, lambda: bridge.run_simulation(test, personas, config))
+
+    report = result["profile"]
+    assert set(report["stages"]) == set(STAGES)
+    assert report["stages"]["api_wait"]["count"] == 2
+    assert report["functions"] and report["memory"]["peak_kb"] > 0
+    with open(report["files"]["profile.json"], encoding="utf-8") as f:
+        assert json.load(f)["stages"] == report["stages"]
+    with open(report["files"]["stacks.folded"], encoding="utf-8") as f:
+        folded = f.read().splitlines()
+    assert folded and all(re.fullmatch(r"\S.*;?.* \d+", line) for line in folded)
+    assert profiling._active is None
+
+
+def test_only_one_profile_runs_at_a_time(tmp_path):
+    first = Profiler(str(tmp_path / "a"))
+    first.start()
+    try:
+        with pytest.raises(ValueError):
+            Profiler(str(tmp_path / "b")).start()
+    finally:
+        first.stop()
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+import mock
+from fakes import FakeChatClient
+from routing import DEFAULT_MAX_TOKENS, ModelRouter
+
+VALID = {"response": "I would pay for it today.", "keyPoints": ["price"], "referencedPersonas": [],
+         "tags": [], "sentiment": 0.4}
+
+
+def test_model_resolution_order(monkeypatch):
+    monkeypatch.setenv("OPENAI_MODEL", "gpt-env")
+    assert ModelRouter().model_for("scenario") == "gpt-env"
+
+    router = ModelRouter.from_config({"model": "gpt-node", "models": {"traits": "gpt-tiny"}})
+    assert router.model_for("scenario") == "gpt-node"
+    assert router.model_for("traits") == "gpt-tiny"
+    assert router.scenario_models() == ["gpt-node"]
+
+
+def test_scenario_budget_grows_with_steps():
+    router = ModelRouter.from_config({"max_tokens": {"scenario": 800}, "max_scenario_tokens": 1000})
+
+    assert router.max_tokens_for("scenario", steps=2) == 800
+    assert router.max_tokens_for("scenario", steps=6) == 950
+    assert router.max_tokens_for("scenario", steps=30) == 1000
+    assert router.max_tokens_for("summary", steps=30) == DEFAULT_MAX_TOKENS["summary"]
+
+
+@pytest.fixture
+def routed_client(monkeypatch):
+    def configure(config, responder):
+        client = FakeChatClient(responder)
+        monkeypatch.setattr(mock, "_cache", None)
+        monkeypatch.setattr(mock, "get_client", lambda *args, **kwargs: client)
+        monkeypatch.setattr(mock, "_router", ModelRouter.from_config(config))
+        return client
+    return configure
+
+
+def test_cascade_escalates_invalid_structured_response(routed_client):
+    client = routed_client({"cascade_models": ["small", "large"]},
+                           lambda params: "{" if params["model"] == "small" else json.dumps(VALID))
+
+    person = mock.TinyPerson(name="Ana", age=30, occupation="Designer")
+    result = person.interact_with_scenario({"description": "Checkout"}, structured=True)
+
+    assert [call["model"] for call in client.calls] == ["small", "large"]
+    assert result["content"] == VALID["response"]
+    assert result["metadata"]["model"] == "large"
+    assert [e["model"] for e in result["metadata"]["escalations"]] == ["small"]
+
+
+def test_cascade_keeps_small_model_answer_and_accepts_last_short_answer(routed_client):
+    client = routed_client({"cascade_models": ["small", "large"]},
+                           lambda params: "Fine." if params["model"] == "large" else "A long and useful answer.")
+    person = mock.TinyPerson(name="Ana", age=30, occupation="Designer")
+
+    result = person.interact_with_scenario({"description": "Checkout"})
+    assert result["metadata"] == {**result["metadata"], "model": "small", "escalations": []}
+
+    client.responder = lambda params: "Ok."
+    result = person.interact_with_scenario({"description": "Checkout"})
+    assert [call["model"] for call in client.calls[1:]] == ["small", "large"]
+    assert result["content"] == "Ok."
+    assert result["metadata"]["escalations"][0]["reason"] == "Resposta curta demais"
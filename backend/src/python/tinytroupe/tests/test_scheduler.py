@@ -0,0 +1,148 @@
+import time
+
+import httpx
+import openai
+import pytest
+
+from fakes import FakeRawResponse, make_completion
+from scheduler import RequestScheduler, TokenBucket, estimate_tokens, parse_reset_duration
+
+PARAMS = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "x" * 400}], "max_tokens": 100}
+
+
+def _error(cls, status, headers=None):
+    response = httpx.Response(status, headers=headers or {}, request=httpx.Request("POST", "https://api.test"))
+    return cls("erro", response=response, body=None)
+
+
+def test_parse_reset_duration():
+    assert parse_reset_duration("6m0s") == 360.0
+    assert parse_reset_duration("1.5s") == 1.5
+    assert parse_reset_duration("20ms") == pytest.approx(0.02)
+    assert parse_reset_duration(None) is None
+
+
+def test_estimate_tokens_counts_prompt_and_max_tokens():
+    assert estimate_tokens(PARAMS) == 100 + 4 + 100
+
+
+def test_token_bucket_waits_for_refill():
+    bucket = TokenBucket(per_minute=600)  # 10 por segundo
+    bucket.acquire(600)
+    started = time.monotonic()
+    bucket.acquire(2)
+    assert time.monotonic() - started >= 0.15
+
+
+def test_scheduler_retries_rate_limits_and_server_errors():
+    scheduler = RequestScheduler(base_delay=0.001, max_delay=0.01)
+    failures = [
+        _error(openai.RateLimitError, 429, {"retry-after-ms": "1"}),
+        _error(openai.InternalServerError, 503),
+    ]
+
+    def call(params):
+        if failures:
+            raise failures.pop(0)
+        return FakeRawResponse(make_completion("ok"))
+
+    response, retries = scheduler.execute(PARAMS, call)
+    assert response.choices[0].message.content == "ok"
+    assert retries == 2
+
+
+def test_scheduler_gives_up_after_max_retries():
+    scheduler = RequestScheduler(max_retries=1, base_delay=0.001, max_delay=0.01)
+
+    def call(params):
+        raise _error(openai.RateLimitError, 429)
+
+    with pytest.raises(openai.RateLimitError):
+        scheduler.execute(PARAMS, call)
+
+
+def test_scheduler_does_not_retry_client_errors():
+    scheduler = RequestScheduler(base_delay=0.001)
+    calls = []
+
+    def call(params):
+        calls.append(params)
+        raise _error(openai.BadRequestError, 400)
+
+    with pytest.raises(openai.BadRequestError):
+        scheduler.execute(PARAMS, call)
+    assert len(calls) == 1
+
+
+def test_scheduler_adapts_to_rate_limit_headers():
+    scheduler = RequestScheduler()
+    headers = {
+        "x-ratelimit-limit-requests": "500",
+        "x-ratelimit-remaining-requests": "499",
+        "x-ratelimit-limit-tokens": "200000",
+        "x-ratelimit-remaining-tokens": "150000",
+    }
+    scheduler.execute(PARAMS, lambda params: FakeRawResponse(
+        make_completion("ok", {"prompt_tokens": 100, "completion_tokens": 10, "total_tokens": 110}), headers))
+
+    limits = scheduler.limits_for("gpt-4o-mini")
+    assert limits.requests.capacity == 500
+    assert limits.tokens.capacity == 200000
+    # Nível limitado pelo "remaining" informado, mais a devolução da estimativa não usada
+    assert 150000 <= limits.tokens.level <= 150000 + 204
+
+
+def test_scheduler_reserves_tokens_once_across_retries():
+    scheduler = RequestScheduler(tokens_per_minute=6000, base_delay=0.001, max_delay=0.01)
+    failures = [_error(openai.InternalServerError, 503), _error(openai.InternalServerError, 503)]
+
+    def call(params):
+        if failures:
+            raise failures.pop(0)
+        return FakeRawResponse(make_completion("ok", {"prompt_tokens": 100, "completion_tokens": 10,
+                                                      "total_tokens": 110}))
+
+    scheduler.execute(PARAMS, call)
+    # Só o consumo real sai do balde, não uma estimativa por tentativa
+    assert 6000 - 110 <= scheduler.limits_for("gpt-4o-mini").tokens.level <= 6000
+
+
+def test_scheduler_returns_tokens_when_every_attempt_fails():
+    scheduler = RequestScheduler(tokens_per_minute=6000, max_retries=2, base_delay=0.001, max_delay=0.01)
+
+    def call(params):
+        raise _error(openai.InternalServerError, 503)
+
+    with pytest.raises(openai.InternalServerError):
+        scheduler.execute(PARAMS, call)
+    assert scheduler.limits_for("gpt-4o-mini").tokens.level == pytest.approx(6000)
+
+
+def test_configure_scheduler_keeps_budgets_until_settings_change(monkeypatch):
+    import mock
+
+    monkeypatch.setattr(mock, "_scheduler", RequestScheduler())
+    config = {"rate_limit_rpm": 60, "rate_limit_tpm": 6000}
+    mock.configure_scheduler(config)
+    scheduler = mock._scheduler
+    scheduler.limits_for("gpt-4o-mini").back_off(30)
+
+    mock.configure_scheduler(dict(config))
+    assert mock._scheduler is scheduler
+    assert scheduler.limits_for("gpt-4o-mini").requests.level < 0
+
+    mock.configure_scheduler({**config, "rate_limit_rpm": 120})
+    assert mock._scheduler is not scheduler
+    assert mock._scheduler.requests_per_minute == 120
+
+
+def test_scheduler_share_scales_header_limits():
+    scheduler = RequestScheduler.from_config({"rate_limit_share": 0.25})
+    headers = {"x-ratelimit-limit-requests": "400", "x-ratelimit-remaining-requests": "400",
+               "x-ratelimit-limit-tokens": "40000", "x-ratelimit-remaining-tokens": "20000"}
+    scheduler.execute(PARAMS, lambda params: FakeRawResponse(make_completion("ok"), headers))
+
+    limits = scheduler.limits_for("gpt-4o-mini")
+    assert limits.requests.capacity == 100
+    assert limits.tokens.capacity == 10000
+    assert limits.tokens.level <= 5000 + 204
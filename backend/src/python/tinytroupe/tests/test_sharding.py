@@ -0,0 +1,114 @@
+import json
+import threading
+from collections import defaultdict
+
+import bridge
+import mock
+import sharding
+
+CONFIG = {"llm_backend": "synthetic", "cache_enabled": False}
+
+
+def _simulate(config, persona_count=5, scenario_count=3):
+    test = json.dumps({"scenarios": [{"description": f"Scenario {i}"} for i in range(scenario_count)]})
+    personas = json.dumps([str(i) for i in range(persona_count)])
+    return bridge.run_simulation(test, personas, {**CONFIG, **config})
+
+
+def _contents(result):
+    return [[(r["personaId"], r["content"]) for r in scenario["responses"]] for scenario in result["results"]]
+
+
+def test_split_shards_is_contiguous_and_balanced():
+    assert sharding.split_shards(list(range(5)), 2) == [[0, 1, 2], [3, 4]]
+    assert sharding.split_shards([1], 4) == [[1]]
+
+
+def test_local_shards_merge_into_the_single_process_result(monkeypatch, capsys):
+    monkeypatch.setattr(mock, "_backend", mock.get_backend())
+    monkeypatch.setattr(mock, "_cache", None)
+    mock.configure_backend(CONFIG)
+
+    expected = _simulate({})
+    sharded = _simulate({"shards": 2, "shard_workers": 2, "shard_timeout": 60})
+
+    assert _contents(sharded) == _contents(expected)
+    assert sharded["progress"]["completed_interactions"] == 15
+    assert sharded["usage"]["requests"] == 15
+
+
+class FakeRedis:
+    def __init__(self):
+        self.lists = defaultdict(list)
+        self.pushed = []
+        self.condition = threading.Condition()
+
+    def rpush(self, key, *values):
+        with self.condition:
+            self.lists[key].extend(values)
+            self.pushed.extend(values)
+            self.condition.notify_all()
+
+    def blpop(self, keys, timeout=0):
+        with self.condition:
+            self.condition.wait_for(lambda: any(self.lists[key] for key in keys), timeout=timeout)
+            for key in keys:
+                if self.lists[key]:
+                    return key, self.lists[key].pop(0)
+            return None
+
+    def delete(self, key):
+        with self.condition:
+            self.lists.pop(key, None)
+
+
+def test_redis_shards_are_served_by_workers(monkeypatch, capsys):
+    redis = FakeRedis()
+    monkeypatch.setattr(sharding, "_redis_client", lambda url: redis)
+    monkeypatch.setattr(mock, "_backend", mock.get_backend())
+    monkeypatch.setattr(mock, "_cache", None)
+    workers = [threading.Thread(target=sharding.serve_shards, args=("redis://fake",), kwargs={"max_shards": 1})
+               for _ in range(3)]
+    for worker in workers:
+        worker.start()
+
+    result = _simulate({"shards": 3, "shard_backend": "redis", "redis_url": "redis://fake",
+                        "api_key": "sk-secret", "shard_timeout": 30})
+    for worker in workers:
+        worker.join(timeout=5)
+
+    assert [[r["personaId"] for r in s["responses"]] for s in result["results"]] == \
+        [[f"Persona_{i}" for i in range(5)]] * 3
+    assert result["progress"]["completed_interactions"] == 15
+    assert not redis.lists.get(sharding.DEFAULT_SHARD_QUEUE)
+    assert not any("sk-secret" in value for value in redis.pushed)
+
+
+def test_shard_cache_counters_reach_the_final_result(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(mock, "_backend", mock.get_backend())
+    monkeypatch.setattr(mock, "_cache", None)
+    config = {"shards": 2, "shard_workers": 2, "shard_timeout": 60,
+              "cache_enabled": True, "cache_dir": str(tmp_path)}
+    mock.configure_cache(config)
+
+    first = _simulate(config)
+    second = _simulate(config)
+
+    assert first["cache"] == {"enabled": True, "hits": 0, "misses": 15}
+    assert second["cache"] == {"enabled": True, "hits": 15, "misses": 0}
+    mock.configure_cache({"cache_enabled": False})
+
+
+def test_shards_split_the_rate_limits(monkeypatch):
+    from scheduler import RequestScheduler
+
+    shards = []
+    runner = type("Runner", (), {"run": lambda self, batch, on_event: shards.extend(batch)})()
+    monkeypatch.setattr(bridge, "get_shard_runner", lambda config: runner)
+    people = [(index, mock.TinyPerson(name=f"P{index}", age=30, occupation="x")) for index in range(4)]
+    bridge.run_sharded(mock.TinyWorld(), people, [{"description": "s"}],
+                       {"shards": 4, "rate_limit_rpm": 400, "rate_limit_tpm": 40000}, record=None)
+
+    scheduler = RequestScheduler.from_config(shards[0]["config"])
+    assert len(shards) == 4
+    assert (scheduler.requests_per_minute, scheduler.tokens_per_minute) == (100, 10000)
@@ -2,7 +2,7 @@
 
 import json
 import os
-from tinytroupe_mock import TinyPerson, setup_config
+from mock import TinyPerson, setup_config
 from dotenv import load_dotenv
 
 def load_environment():
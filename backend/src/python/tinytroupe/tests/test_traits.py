@@ -0,0 +1,55 @@
+import json
+
+import mock
+import traits
+from fakes import FakeChatClient
+
+
+def _answer(params):
+    if "response_format" not in params:
+        return "steady, kind, focused, curious, calm"
+    people = [json.loads(line) for line in params["messages"][-1]["content"].splitlines()]
+    return json.dumps({"results": [{"index": p["index"], "traits": [f"{p['occupation']}-{p['age']}"]}
+                                   for p in people if p["occupation"] != "Skipped"]})
+
+
+def _client(monkeypatch):
+    client = FakeChatClient(_answer)
+    monkeypatch.setattr(mock, "_cache", None)
+    monkeypatch.setattr(mock, "get_client", lambda *args, **kwargs: client)
+    return client
+
+
+def test_batch_dedups_archetypes_and_keeps_input_order(monkeypatch):
+    client = _client(monkeypatch)
+    generator = traits.TraitGenerator(batch_size=2)
+    personas = [
+        {"name": "Ana", "age": 30, "occupation": "Nurse", "traits": ["calm", "kind"]},
+        {"name": "Bia", "age": 45, "occupation": "Teacher"},
+        {"name": "Caio", "age": 30, "occupation": " nurse", "traits": ["Kind", "calm"]},
+        {"name": "Duda", "age": 22, "occupation": "Student"},
+    ]
+
+    result = generator.generate(personas)
+
+    assert result == [["Nurse-30"], ["Teacher-45"], ["Nurse-30"], ["Student-22"]]
+    assert len(client.calls) == 2
+    assert all(call["response_format"] == traits.TRAITS_RESPONSE_FORMAT for call in client.calls)
+
+
+def test_cached_archetypes_do_not_query_again(monkeypatch):
+    client = _client(monkeypatch)
+    generator = traits.TraitGenerator()
+
+    generator.generate([{"age": 30, "occupation": "Nurse"}])
+    assert generator.generate([{"name": "Eva", "age": 30, "occupation": "Nurse"}]) == [["Nurse-30"]]
+    assert len(client.calls) == 1
+
+
+def test_personas_missing_from_the_batch_fall_back_to_single_requests(monkeypatch):
+    client = _client(monkeypatch)
+
+    result = traits.TraitGenerator().generate([{"age": 50, "occupation": "Skipped"}, {"age": 20, "occupation": "Dev"}])
+
+    assert result == [["steady", "kind", "focused", "curious", "calm"], ["Dev-20"]]
+    assert len(client.calls) == 2
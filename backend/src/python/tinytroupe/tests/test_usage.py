@@ -0,0 +1,47 @@
+import json
+
+import bridge
+import mock
+from fakes import FakeChatClient
+from usage import UsageTracker, percentile
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 0.50) == 50
+    assert percentile(values, 0.95) == 95
+    assert percentile(values, 0.99) == 99
+    assert percentile([], 0.5) is None
+
+
+def test_tracker_rolls_up_calls_per_model():
+    calls = []
+    tracker = UsageTracker(on_record=calls.append)
+    tracker.record("gpt-4o-mini", {"prompt_tokens": 1000, "completion_tokens": 1000, "total_tokens": 2000},
+                   latency_ms=100, retries=1, call_type="scenario")
+    tracker.record("gpt-4o", {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}, latency_ms=300)
+
+    summary = tracker.summary()
+    assert summary["requests"] == 2
+    assert summary["retries"] == 1
+    assert summary["by_model"]["gpt-4o-mini"]["cost"] == 0.00015 + 0.0006
+    assert summary["latency_ms"]["p50"] == 100 and summary["latency_ms"]["max"] == 300
+    assert calls[0]["call_type"] == "scenario" and calls[0]["retries"] == 1
+
+
+def test_run_simulation_emits_usage_frames(monkeypatch, capsys):
+    usage = {"prompt_tokens": 200, "completion_tokens": 50, "total_tokens": 250}
+    client = FakeChatClient(lambda params: "ok", usage=usage)
+    monkeypatch.setattr(mock, "_cache", None)
+    monkeypatch.setattr(mock, "get_client", lambda *args, **kwargs: client)
+
+    test = {"scenarios": [{"description": "a"}, {"description": "b"}]}
+    result = bridge.run_simulation(json.dumps(test), json.dumps(["1", "2"]), {"max_concurrency": 2})
+
+    frames = [json.loads(line[len("__RESULT_START__"):-len("__RESULT_END__")])
+              for line in capsys.readouterr().out.splitlines() if line.startswith("__RESULT_START__")]
+    usage_frames = [frame["data"] for frame in frames if frame.get("type") == "usage"]
+    assert len(usage_frames) == 4
+    assert all(frame["call_type"] == "scenario" and frame["latency_ms"] is not None for frame in usage_frames)
+    assert result["usage"]["total_tokens"] == 1000
+    assert result["usage"]["latency_ms"]["p99"] is not None
@@ -0,0 +1,58 @@
+import json
+
+import bridge
+from validation import validate_simulation
+
+
+def test_valid_simulation_reports_its_size():
+    test = {"scenarios": [{"description": "Checkout"}, {"steps": ["open", "pay"]}]}
+    personas = ["1", 2, {"name": "Ana", "age": 41, "traits": ["calm"]}]
+
+    assert validate_simulation(test, personas, {"max_concurrency": 4}) == {
+        "valid": True, "errors": [], "scenarios": 2, "personas": 3, "interactions": 6}
+
+
+def test_invalid_simulation_lists_every_problem():
+    test = {"scenarios": [{"description": 3}, {}, "x"]}
+    personas = [True, {"age": "41", "skills": "python"}]
+    config = {"llm_backend": "gpt", "max_concurrency": "many", "cluster_responses": "kmeans"}
+
+    result = validate_simulation(test, personas, config)
+
+    assert not result["valid"]
+    assert result["errors"] == [
+        "test.scenarios[0].description deve ser texto",
+        "test.scenarios[1] precisa de description ou steps",
+        "test.scenarios[2] deve ser um objeto",
+        "personas[0] deve ser um id ou um objeto de persona",
+        "personas[1].age deve ser um inteiro",
+        "personas[1].skills deve ser uma lista de textos",
+        "config.llm_backend inválido: gpt",
+        "config.cluster_responses inválido: kmeans",
+        "config.max_concurrency deve ser um inteiro positivo",
+    ]
+
+
+def test_validate_mode_does_not_run_the_simulation(monkeypatch, capsys):
+    monkeypatch.setattr(bridge, "run_simulation", lambda *args, **kwargs: 1 / 0)
+    monkeypatch.setattr("sys.argv", ["bridge.py", "--validate", "--test", json.dumps({"scenarios": []}),
+                                     "--personas", "[]"])
+
+    try:
+        bridge.main()
+    except SystemExit as e:
+        assert e.code == 0
+
+    result = json.loads(capsys.readouterr().out)
+    assert result["errors"] == ["test.scenarios deve ser uma lista não vazia"]
+
+
+def test_population_spec_is_checked():
+    test = {"scenarios": [{"description": "Checkout"}],
+            "population": {"age_min": "18", "occupations": ["Designer"], "traits": "calm", "region": "sul"}}
+
+    assert validate_simulation(test, [])["errors"] == [
+        "test.population.age_min deve ser um inteiro",
+        "test.population.traits deve ser uma lista de textos",
+        "test.population.region desconhecido",
+    ]
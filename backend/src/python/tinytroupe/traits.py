@@ -0,0 +1,147 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from mock import ResponseValidationError, TinyPerson, complete, get_router
+
+TRAITS_PER_PERSONA = 5
+DEFAULT_BATCH_SIZE = 20
+DEFAULT_CACHE_SIZE = 4096
+# Orçamento de saída por persona do lote (5 traços curtos mais a estrutura JSON)
+TOKENS_PER_PERSONA = 60
+
+TRAITS_INSTRUCTIONS = (
+    f"For each person listed, generate {TRAITS_PER_PERSONA} additional personality traits that would be "
+    "realistic and complementary to their existing characteristics, without repeating the traits they "
+    "already have. Answer with one entry per person, using the person's index."
+)
+TRAITS_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "persona_traits",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "results": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "index": {"type": "integer"},
+                            "traits": {"type": "array", "items": {"type": "string"}}
+                        },
+                        "required": ["index", "traits"],
+                        "additionalProperties": False
+                    }
+                }
+            },
+            "required": ["results"],
+            "additionalProperties": False
+        }
+    }
+}
+
+TraitKey = Tuple[Any, str, Tuple[str, ...]]
+
+def trait_key(persona: Dict[str, Any]) -> TraitKey:
+    """Cache key of a base persona: age, occupation and existing traits, normalized."""
+    occupation = str(persona.get("occupation", "Unknown")).strip().lower()
+    traits = tuple(sorted({str(trait).strip().lower() for trait in persona.get("traits", []) if str(trait).strip()}))
+    return persona.get("age", 30), occupation, traits
+
+class TraitGenerator:
+    """Generates traits for many base personas in a few structured-output requests.
+
+    Personas sharing a ``trait_key`` are generated once, and results are kept
+    in a per-process LRU so repeated archetypes don't query the model again.
+    """
+
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.batch_size = max(1, batch_size)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[TraitKey, List[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def generate(self, base_personas: List[Dict[str, Any]]) -> List[List[str]]:
+        """Return the generated traits of each base persona, in input order."""
+        keys = [trait_key(persona) for persona in base_personas]
+        traits: Dict[TraitKey, List[str]] = {}
+        with self._lock:
+            for key in keys:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    traits[key] = self._cache[key]
+
+        # A primeira persona de cada chave ainda não gerada representa as demais
+        representatives: Dict[TraitKey, Dict[str, Any]] = {}
+        for key, persona in zip(keys, base_personas):
+            if key not in traits:
+                representatives.setdefault(key, persona)
+        pending = list(representatives.items())
+        for start in range(0, len(pending), self.batch_size):
+            chunk = pending[start:start + self.batch_size]
+            generated = self._generate_chunk([persona for _, persona in chunk])
+            with self._lock:
+                for (key, _), chunk_traits in zip(chunk, generated):
+                    traits[key] = chunk_traits
+                    self._cache[key] = chunk_traits
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+
+        return [list(traits[key]) for key in keys]
+
+    def _generate_chunk(self, personas: List[Dict[str, Any]]) -> List[List[str]]:
+        lines = [json.dumps({"index": index, "age": persona.get("age", 30),
+                             "occupation": persona.get("occupation", "Unknown"),
+                             "traits": persona.get("traits", [])})
+                 for index, persona in enumerate(personas)]
+        params = {
+            "model": get_router().model_for("traits"),
+            "messages": [
+                {"role": "system", "content": TRAITS_INSTRUCTIONS},
+                {"role": "user", "content": "\n".join(lines)}
+            ],
+            "max_tokens": TOKENS_PER_PERSONA * len(personas) + 100,
+            "response_format": TRAITS_RESPONSE_FORMAT
+        }
+        by_index = complete(params, call_type="traits", parse=parse_traits_response)
+
+        results = []
+        for index, persona in enumerate(personas):
+            if index in by_index:
+                results.append(by_index[index])
+            else:
+                # O modelo pulou esta persona; gera individualmente
+                results.append(single_person(persona).generate_traits())
+        return results
+
+def parse_traits_response(raw_response: str) -> Dict[int, List[str]]:
+    try:
+        data = json.loads(raw_response)
+        return {int(entry["index"]): [str(trait).strip() for trait in entry["traits"] if str(trait).strip()]
+                for entry in data["results"]}
+    except (TypeError, KeyError, ValueError) as e:
+        raise ResponseValidationError(f"Resposta de traços inválida: {str(e)}")
+
+def single_person(persona: Dict[str, Any]) -> TinyPerson:
+    return TinyPerson(
+        name=persona.get("name", "Anonymous"),
+        age=persona.get("age", 30),
+        occupation=persona.get("occupation", "Unknown"),
+        traits=list(persona.get("traits", []))
+    )
+
+_generator: Optional[TraitGenerator] = None
+_generator_lock = threading.Lock()
+
+def get_generator(config: Dict[str, Any]) -> TraitGenerator:
+    """Per-process generator, so its cache is shared by every request of a warm worker."""
+    global _generator
+    with _generator_lock:
+        batch_size = int(config.get("traits_batch_size", DEFAULT_BATCH_SIZE))
+        if _generator is None:
+            _generator = TraitGenerator(batch_size, int(config.get("traits_cache_size", DEFAULT_CACHE_SIZE)))
+        _generator.batch_size = max(1, batch_size)
+        return _generator
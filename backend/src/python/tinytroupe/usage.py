@@ -0,0 +1,128 @@
+import contextvars
+import math
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+# Preço por 1K tokens (mesma tabela de tinytroupe_service.ts)
+MODEL_COSTS = {
+    "gpt-4o-mini": {"input": 0.00015, "output": 0.0006},
+    "gpt-3.5-turbo": {"input": 0.0015, "output": 0.002},
+    "text-embedding-3-small": {"input": 0.00002, "output": 0.0},
+    "default": {"input": 0.0015, "output": 0.002},
+}
+
+# Rastreador da execução atual; copiado para as threads de trabalho junto com o contexto
+_current_tracker = contextvars.ContextVar("usage_tracker", default=None)
+
+def usage_value(usage: Any, name: str, default: int = 0) -> int:
+    """Read a usage field from an SDK object or a plain dict (batch output)."""
+    if usage is None:
+        return default
+    value = usage.get(name) if isinstance(usage, dict) else getattr(usage, name, None)
+    return value if value is not None else default
+
+def cached_tokens(usage: Any) -> int:
+    """Prompt tokens served from the provider-side prompt cache."""
+    if usage is None:
+        return 0
+    details = usage.get("prompt_tokens_details") if isinstance(usage, dict) else getattr(usage, "prompt_tokens_details", None)
+    return usage_value(details, "cached_tokens")
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    costs = MODEL_COSTS.get(model, MODEL_COSTS["default"])
+    return prompt_tokens / 1000 * costs["input"] + completion_tokens / 1000 * costs["output"]
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+class UsageTracker:
+    """Per-call usage, cost and latency accumulated over one run.
+
+    Every recorded call is also handed to ``on_record`` (the bridge turns it
+    into a ``usage`` frame on stdout).
+    """
+
+    FIELDS = ("requests", "prompt_tokens", "completion_tokens", "total_tokens", "cached_tokens", "retries")
+
+    def __init__(self, on_record: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.on_record = on_record
+        self._lock = threading.Lock()
+        self.totals = dict.fromkeys(self.FIELDS, 0)
+        self.cost = 0.0
+        self.by_model: Dict[str, Dict[str, Any]] = {}
+        self.latencies_ms: List[float] = []
+
+    def record(self, model: str, usage: Any, latency_ms: Optional[float] = None, retries: int = 0,
+               call_type: Optional[str] = None) -> Dict[str, Any]:
+        prompt_tokens = usage_value(usage, "prompt_tokens")
+        completion_tokens = usage_value(usage, "completion_tokens")
+        call = {
+            "timestamp": datetime.now().isoformat(),
+            "model": model,
+            "call_type": call_type,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": usage_value(usage, "total_tokens", prompt_tokens + completion_tokens),
+            "cached_tokens": cached_tokens(usage),
+            "cost": estimate_cost(model, prompt_tokens, completion_tokens),
+            "latency_ms": round(latency_ms, 1) if latency_ms is not None else None,
+            "retries": retries,
+        }
+        return self.add(call)
+
+    def add(self, call: Dict[str, Any]) -> Dict[str, Any]:
+        """Accumulate a call already recorded elsewhere (e.g. by a shard worker)."""
+        latency_ms = call.get("latency_ms")
+        with self._lock:
+            model_totals = self.by_model.setdefault(call["model"], {**dict.fromkeys(self.FIELDS, 0), "cost": 0.0})
+            for field in self.FIELDS:
+                value = 1 if field == "requests" else call[field]
+                self.totals[field] += value
+                model_totals[field] += value
+            model_totals["cost"] += call["cost"]
+            self.cost += call["cost"]
+            if latency_ms is not None:
+                self.latencies_ms.append(latency_ms)
+
+        if self.on_record is not None:
+            self.on_record(call)
+        return call
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self.latencies_ms)
+            return {
+                **self.totals,
+                "cost": self.cost,
+                "latency_ms": {
+                    "p50": percentile(latencies, 0.50),
+                    "p95": percentile(latencies, 0.95),
+                    "p99": percentile(latencies, 0.99),
+                    "max": latencies[-1] if latencies else None,
+                },
+                "by_model": {model: dict(totals) for model, totals in self.by_model.items()},
+            }
+
+def start_tracking(tracker: UsageTracker) -> contextvars.Token:
+    return _current_tracker.set(tracker)
+
+def stop_tracking(token: contextvars.Token):
+    _current_tracker.reset(token)
+
+def add_call(call: Dict[str, Any]):
+    """Add a call recorded by another process to the tracker of the current run, if any."""
+    tracker: Optional[UsageTracker] = _current_tracker.get()
+    if tracker is not None:
+        tracker.add(call)
+
+def record_usage(model: str, usage: Any, latency_ms: Optional[float] = None, retries: int = 0,
+                 call_type: Optional[str] = None):
+    """Add a completion's usage to the tracker of the current run, if any."""
+    tracker: Optional[UsageTracker] = _current_tracker.get()
+    if tracker is not None:
+        tracker.record(model, usage, latency_ms=latency_ms, retries=retries, call_type=call_type)
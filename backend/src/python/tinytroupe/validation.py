@@ -0,0 +1,109 @@
+from typing import Any, Dict, List
+
+from log import LEVELS, LOG_FORMATS
+
+PERSONA_LIST_FIELDS = ("interests", "traits", "skills", "goals")
+CONFIG_CHOICES = {
+    "llm_backend": ("openai", "synthetic", "replay", "record"),
+    "conversation_mode": ("stateless", "session"),
+    "history_strategy": ("truncate", "summarize"),
+    "output_protocol": ("lines", "frames"),
+    "frame_codec": ("auto", "json", "orjson", "msgpack"),
+    "shard_backend": ("local", "redis"),
+    "cluster_responses": (False, True, "embeddings", "minhash"),
+    "logging_level": tuple(LEVELS),
+    "log_format": LOG_FORMATS,
+}
+POPULATION_INT_KEYS = ("age_min", "age_max", "sample", "seed")
+POPULATION_LIST_KEYS = ("occupations", "traits")
+POSITIVE_INT_CONFIG = ("max_concurrency", "shards", "persona_batch_size", "traits_batch_size", "embedding_batch_size")
+
+def validate_simulation(test: Any, personas: Any, config: Dict[str, Any] = None) -> Dict[str, Any]:
+    """Check a simulation's test, personas and config without running it or calling the API.
+
+    Returns the list of problems found and the size of the run.
+    """
+    errors = []
+    scenarios = _validate_test(test, errors)
+    persona_count = _validate_personas(personas, errors)
+    _validate_config(config or {}, errors)
+    return {
+        "valid": not errors,
+        "errors": errors,
+        "scenarios": scenarios,
+        "personas": persona_count,
+        "interactions": scenarios * persona_count
+    }
+
+def _validate_test(test: Any, errors: List[str]) -> int:
+    if not isinstance(test, dict):
+        errors.append("test deve ser um objeto")
+        return 0
+    scenarios = test.get("scenarios")
+    if not isinstance(scenarios, list) or not scenarios:
+        errors.append("test.scenarios deve ser uma lista não vazia")
+        return 0
+    for index, scenario in enumerate(scenarios):
+        where = f"test.scenarios[{index}]"
+        if not isinstance(scenario, dict):
+            errors.append(f"{where} deve ser um objeto")
+            continue
+        description, steps = scenario.get("description"), scenario.get("steps")
+        if description is not None and not isinstance(description, str):
+            errors.append(f"{where}.description deve ser texto")
+        if steps is not None and not _is_text_list(steps):
+            errors.append(f"{where}.steps deve ser uma lista de textos")
+        if not description and not steps:
+            errors.append(f"{where} precisa de description ou steps")
+    if "population" in test:
+        _validate_population(test["population"], errors)
+    return len(scenarios)
+
+def _validate_population(selection: Any, errors: List[str]):
+    if not isinstance(selection, dict):
+        errors.append("test.population deve ser um objeto")
+        return
+    for key, value in selection.items():
+        if key in POPULATION_INT_KEYS:
+            if isinstance(value, bool) or not isinstance(value, int):
+                errors.append(f"test.population.{key} deve ser um inteiro")
+        elif key in POPULATION_LIST_KEYS:
+            if not _is_text_list(value):
+                errors.append(f"test.population.{key} deve ser uma lista de textos")
+        else:
+            errors.append(f"test.population.{key} desconhecido")
+
+def _validate_personas(personas: Any, errors: List[str]) -> int:
+    if not isinstance(personas, list):
+        errors.append("personas deve ser uma lista")
+        return 0
+    for index, persona in enumerate(personas):
+        where = f"personas[{index}]"
+        if isinstance(persona, bool) or not isinstance(persona, (str, int, dict)):
+            errors.append(f"{where} deve ser um id ou um objeto de persona")
+        elif isinstance(persona, dict):
+            if "name" in persona and not isinstance(persona["name"], str):
+                errors.append(f"{where}.name deve ser texto")
+            if "age" in persona and (isinstance(persona["age"], bool) or not isinstance(persona["age"], int)):
+                errors.append(f"{where}.age deve ser um inteiro")
+            for field in PERSONA_LIST_FIELDS:
+                if field in persona and not _is_text_list(persona[field]):
+                    errors.append(f"{where}.{field} deve ser uma lista de textos")
+    return len(personas)
+
+def _validate_config(config: Dict[str, Any], errors: List[str]):
+    for key, choices in CONFIG_CHOICES.items():
+        if key in config and config[key] not in choices:
+            errors.append(f"config.{key} inválido: {config[key]}")
+    for key in POSITIVE_INT_CONFIG:
+        if key not in config:
+            continue
+        try:
+            valid = int(config[key]) >= 1
+        except (TypeError, ValueError):
+            valid = False
+        if not valid:
+            errors.append(f"config.{key} deve ser um inteiro positivo")
+
+def _is_text_list(value: Any) -> bool:
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
@@ -0,0 +1,173 @@
+import { spawn, ChildProcessWithoutNullStreams } from 'child_process';
+import readline from 'readline';
+import { createLogger } from '../utils/logger';
+
+// Cabeçalho dos frames do bridge (output_protocol=frames): tamanho uint32 big-endian + codec
+const FRAME_HEADER_SIZE = 5;
+const CODEC_JSON = 'j'.charCodeAt(0);
+const CODEC_MSGPACK = 'm'.charCodeAt(0);
+
+function decodeFrame(codec: number, body: Buffer): any {
+  if (codec === CODEC_JSON) {
+    return JSON.parse(body.toString('utf8'));
+  }
+  if (codec === CODEC_MSGPACK) {
+    // Opcional: só é necessário com frame_codec=msgpack
+    // eslint-disable-next-line @typescript-eslint/no-var-requires
+    return require('@msgpack/msgpack').decode(body);
+  }
+  throw new Error(`Unknown frame codec: ${codec}`);
+}
+
+// Níveis do logging do Python (log_format=json) para os do logger do Node
+const BRIDGE_LOG_LEVELS: Record<string, 'debug' | 'info' | 'warn' | 'error'> = {
+  debug: 'debug',
+  info: 'info',
+  warning: 'warn',
+  error: 'error',
+  critical: 'error'
+};
+
+// Configurações do processo inteiro, passadas no --config do --serve (sem a api_key)
+const PROCESS_CONFIG_KEYS = ['output_protocol', 'frame_codec', 'logging_level', 'log_format'];
+
+interface PendingRequest {
+  resolve: (data: any) => void;
+  reject: (error: Error) => void;
+  onFrame?: (frame: any) => void;
+}
+
+/**
+ * Mantém um único processo `bridge.py --serve` vivo e multiplexa as
+ * requisições sobre ele (JSON delimitado por linha no stdin/stdout), evitando
+ * pagar a inicialização do Python e do cliente OpenAI a cada chamada.
+ */
+export class BridgeWorker {
+  private process?: ChildProcessWithoutNullStreams;
+  private pending = new Map<string, PendingRequest>();
+  private nextId = 0;
+  private frameBuffer = Buffer.alloc(0);
+  private logger = createLogger('BridgeWorker');
+
+  constructor(
+    private pythonPath: string,
+    private scriptPath: string,
+    private config: Record<string, any>
+  ) {}
+
+  request(mode: string, payload: Record<string, any>, onFrame?: (frame: any) => void): Promise<any> {
+    const worker = this.ensureStarted();
+    const id = String(++this.nextId);
+
+    return new Promise((resolve, reject) => {
+      this.pending.set(id, { resolve, reject, onFrame });
+      worker.stdin.write(JSON.stringify({ id, mode, config: this.config, ...payload }) + '\n');
+    });
+  }
+
+  stop() {
+    this.process?.stdin.end();
+    this.process = undefined;
+  }
+
+  private ensureStarted(): ChildProcessWithoutNullStreams {
+    if (this.process) {
+      return this.process;
+    }
+
+    const processConfig = Object.fromEntries(
+      PROCESS_CONFIG_KEYS.filter((key) => this.config[key] !== undefined).map((key) => [key, this.config[key]])
+    );
+    const worker = spawn(this.pythonPath, [this.scriptPath, '--serve', '--config', JSON.stringify(processConfig)]);
+    this.process = worker;
+
+    if (this.config.output_protocol === 'frames') {
+      this.frameBuffer = Buffer.alloc(0);
+      worker.stdout.on('data', (chunk: Buffer) => this.handleChunk(chunk));
+    } else {
+      readline.createInterface({ input: worker.stdout }).on('line', (line) => this.handleLine(line));
+    }
+
+    readline.createInterface({ input: worker.stderr }).on('line', (line) => this.handleLogLine(line));
+
+    worker.on('close', (code) => {
+      this.logger.warn(`Bridge worker exited with code ${code}`);
+      if (this.process === worker) {
+        this.process = undefined;
+      }
+      const error = new Error(`Bridge worker exited with code ${code}`);
+      this.pending.forEach(({ reject }) => reject(error));
+      this.pending.clear();
+    });
+
+    return worker;
+  }
+
+  private handleLine(line: string) {
+    let message: any;
+    try {
+      message = JSON.parse(line);
+    } catch (error) {
+      this.logger.error('Invalid line from bridge worker:', line);
+      return;
+    }
+    this.handleMessage(message);
+  }
+
+  private handleLogLine(line: string) {
+    if (!line.trim()) {
+      return;
+    }
+    let entry: any;
+    try {
+      entry = JSON.parse(line);
+    } catch (error) {
+      entry = undefined;
+    }
+    if (!entry || typeof entry.level !== 'string') {
+      // Tracebacks e saídas que não passaram pelo logging do bridge
+      this.logger.debug(`[bridge] ${line}`);
+      return;
+    }
+    const { level, logger, message, ...fields } = entry;
+    const details = Object.keys(fields).length ? ` ${JSON.stringify(fields)}` : '';
+    this.logger[BRIDGE_LOG_LEVELS[level] || 'info'](`[bridge] ${logger}: ${message}${details}`);
+  }
+
+  private handleChunk(chunk: Buffer) {
+    this.frameBuffer = this.frameBuffer.length ? Buffer.concat([this.frameBuffer, chunk]) : chunk;
+    while (this.frameBuffer.length >= FRAME_HEADER_SIZE) {
+      const length = this.frameBuffer.readUInt32BE(0);
+      if (this.frameBuffer.length < FRAME_HEADER_SIZE + length) {
+        return;
+      }
+      const codec = this.frameBuffer[4];
+      const body = this.frameBuffer.subarray(FRAME_HEADER_SIZE, FRAME_HEADER_SIZE + length);
+      this.frameBuffer = this.frameBuffer.subarray(FRAME_HEADER_SIZE + length);
+      try {
+        this.handleMessage(decodeFrame(codec, body));
+      } catch (error) {
+        this.logger.error('Invalid frame from bridge worker:', error);
+      }
+    }
+  }
+
+  private handleMessage(message: any) {
+    const pending = this.pending.get(message.id);
+    if (!pending) {
+      return;
+    }
+
+    if (message.type === 'frame') {
+      pending.onFrame?.(message.data);
+      return;
+    }
+
+    this.pending.delete(message.id);
+    if (message.type === 'error') {
+      pending.reject(new Error(message.error));
+    } else {
+      pending.resolve(message.data);
+    }
+  }
+}
@@ -4,8 +4,8 @@ import { createLogger } from '../utils/logger';
 import { formatSystemPrompt, formatUserPrompt } from './prompt_template';
 import { z } from 'zod';
 import { pool } from '../config/database';
-import { spawn } from 'child_process';
 import path from 'path';
+import { BridgeWorker } from './bridge_worker';
 
 const pool = new Pool({
   user: 'crowdelic',
@@ -88,6 +88,7 @@ interface TinyTroupeConfig {
   cacheEnabled: boolean;
   cacheDir: string;
   loggingLevel: string;
+  outputProtocol?: 'lines' | 'frames';
 }
 
 // Define schemas for validation
@@ -125,6 +126,7 @@ export class TinyTroupeService {
   private eventCallback?: (event: string, data: any) => void;
   private logger: any;
   private config: TinyTroupeConfig;
+  private worker?: BridgeWorker;
 
   constructor(openai: OpenAI, costsService: CostsService, config: TinyTroupeConfig) {
     this.openai = openai;
@@ -556,105 +558,64 @@ export class TinyTroupeService {
     }
   }
 
-  async generatePersonaTraits(basePersona: Partial<Persona>): Promise<string[]> {
-    return new Promise((resolve, reject) => {
-      const pythonProcess = spawn(this.config.pythonPath, [
-        this.config.scriptPath,
-        '--generate-traits',
-        '--base-persona', JSON.stringify(basePersona),
-        '--config', JSON.stringify({
-          api_key: this.config.apiKey,
-          model: this.config.model,
-          cache_enabled: this.config.cacheEnabled,
-          cache_dir: this.config.cacheDir,
-          logging_level: this.config.loggingLevel
-        })
-      ]);
-
-      let output = '';
-      let errorOutput = '';
-
-      pythonProcess.stdout.on('data', (data) => {
-        console.log('[TinyTroupe] Raw stdout data:', data.toString());
-        output += data.toString();
+  private getWorker(): BridgeWorker {
+    if (!this.worker) {
+      this.worker = new BridgeWorker(this.config.pythonPath, this.config.scriptPath, {
+        api_key: this.config.apiKey,
+        model: this.config.model,
+        cache_enabled: this.config.cacheEnabled,
+        cache_dir: this.config.cacheDir,
+        logging_level: this.config.loggingLevel,
+        log_format: 'json',
+        output_protocol: this.config.outputProtocol || 'lines'
       });
+    }
+    return this.worker;
+  }
 
-      pythonProcess.stderr.on('data', (data) => {
-        console.error('[TinyTroupe] stderr:', data.toString());
-        errorOutput += data.toString();
-      });
+  async generatePersonaTraits(basePersona: Partial<Persona>): Promise<string[]> {
+    try {
+      const traits = await this.getWorker().request('generate_traits', { base_persona: basePersona });
+      console.log('[TinyTroupe] Successfully generated traits:', traits);
+      return traits;
+    } catch (error) {
+      console.error('[TinyTroupe] Trait generation failed:', error);
+      throw new Error(`Trait generation failed: ${error.message}`);
+    }
+  }
 
-      pythonProcess.on('close', (code) => {
-        console.log('[TinyTroupe] Process closed with code:', code);
-        console.log('[TinyTroupe] Final output:', output);
-        console.log('[TinyTroupe] Error output:', errorOutput);
-        
-        if (code !== 0) {
-          reject(new Error(`Trait generation failed: ${errorOutput}`));
-          return;
-        }
-        try {
-          console.log('[TinyTroupe] Attempting to parse output');
-          const traits = JSON.parse(output);
-          console.log('[TinyTroupe] Successfully parsed traits:', traits);
-          resolve(traits);
-        } catch (error) {
-          console.error('[TinyTroupe] Parse error:', error);
-          console.error('[TinyTroupe] Failed to parse output:', output);
-          reject(new Error('Failed to parse traits output'));
-        }
-      });
-    });
+  async generatePersonaTraitsBatch(basePersonas: Partial<Persona>[]): Promise<string[][]> {
+    try {
+      const traits = await this.getWorker().request('generate_traits_batch', { base_personas: basePersonas });
+      console.log(`[TinyTroupe] Successfully generated traits for ${traits.length} personas`);
+      return traits;
+    } catch (error) {
+      console.error('[TinyTroupe] Batch trait generation failed:', error);
+      throw new Error(`Batch trait generation failed: ${error.message}`);
+    }
   }
 
-  async createTinyPerson(persona: Persona): Promise<any> {
-    return new Promise((resolve, reject) => {
-      const pythonProcess = spawn(this.config.pythonPath, [
-        this.config.scriptPath,
-        '--create-person',
-        '--persona', JSON.stringify(persona),
-        '--config', JSON.stringify({
-          api_key: this.config.apiKey,
-          model: this.config.model,
-          cache_enabled: this.config.cacheEnabled,
-          cache_dir: this.config.cacheDir,
-          logging_level: this.config.loggingLevel
-        })
-      ]);
-
-      let output = '';
-      let errorOutput = '';
-
-      pythonProcess.stdout.on('data', (data) => {
-        console.log('[TinyTroupe] Raw stdout data:', data.toString());
-        output += data.toString();
-      });
+  async validateSimulation(test: Test, personas: (string | Persona)[]): Promise<{ valid: boolean; errors: string[] }> {
+    return this.getWorker().request('validate', { test, personas });
+  }
 
-      pythonProcess.stderr.on('data', (data) => {
-        console.error('[TinyTroupe] stderr:', data.toString());
-        errorOutput += data.toString();
-      });
+  async fetchSimulationResponses(testId: string, pairs: [number, number][]): Promise<any[]> {
+    try {
+      return await this.getWorker().request('fetch_responses', { test_id: testId, pairs });
+    } catch (error) {
+      console.error('[TinyTroupe] Fetching responses failed:', error);
+      throw new Error(`Fetching responses failed: ${error.message}`);
+    }
+  }
 
-      pythonProcess.on('close', (code) => {
-        console.log('[TinyTroupe] Process closed with code:', code);
-        console.log('[TinyTroupe] Final output:', output);
-        console.log('[TinyTroupe] Error output:', errorOutput);
-        
-        if (code !== 0) {
-          reject(new Error(`Person creation failed: ${errorOutput}`));
-          return;
-        }
-        try {
-          console.log('[TinyTroupe] Attempting to parse output');
-          const person = JSON.parse(output);
-          console.log('[TinyTroupe] Successfully parsed person:', person);
-          resolve(person);
-        } catch (error) {
-          console.error('[TinyTroupe] Parse error:', error);
-          console.error('[TinyTroupe] Failed to parse output:', output);
-          reject(new Error('Failed to parse person output'));
-        }
-      });
-    });
+  async createTinyPerson(persona: Persona): Promise<any> {
+    try {
+      const person = await this.getWorker().request('create_person', { persona });
+      console.log('[TinyTroupe] Successfully created person:', person);
+      return person;
+    } catch (error) {
+      console.error('[TinyTroupe] Person creation failed:', error);
+      throw new Error(`Person creation failed: ${error.message}`);
+    }
   }
 }